@@ -8,7 +8,7 @@
 # ─────────────────────────────────────────────────────────────
 
 from __future__ import annotations
-import os, sys, ctypes, logging, tkinter as tk
+import os, sys, time, ctypes, logging, tkinter as tk
 from tkinter import ttk, messagebox
 
 # ────────────────────── Configurar logging ───────────────────
@@ -57,6 +57,7 @@ def open_log() -> None:
 
 # ──────────────────── Importar acciones reales ───────────────
 from modules.create_user       import create_user
+from modules.bulk_create       import bulk_create_users
 from modules.delete_user       import delete_user
 from modules.replace_user      import replace_user
 from modules.batch_delete      import batch_delete_folders, has_residuals
@@ -64,6 +65,9 @@ from modules.wallpaper         import apply_and_lock_wallpaper
 from modules.block_wallpaper   import block_wallpaper
 from modules.unblock_wallpaper import unblock_wallpaper
 from modules.shortcuts         import create_shortcuts
+from modules.metrics_view      import show_metrics
+from utils.run_powershell      import prewarm_pool
+from utils                     import metrics, profiling, user_inventory, tombstones, journal
 
 # ───────────────────────── Tooltip simple ────────────────────
 class ToolTip(tk.Toplevel):
@@ -114,6 +118,12 @@ def build_ui() -> tuple[tk.Tk, callable]:
     menubar = tk.Menu(root)
     helpm   = tk.Menu(menubar, tearoff=False)
     helpm.add_command(label="Ver log", command=open_log)
+    helpm.add_command(label="Métricas de PowerShell…",
+                      command=lambda: show_metrics(root))
+    profile_var = tk.BooleanVar(master=root, value=profiling.enabled())
+    helpm.add_checkbutton(label="Perfilar acciones (cProfile + memoria)",
+                          variable=profile_var,
+                          command=lambda: profiling.set_enabled(profile_var.get()))
     helpm.add_separator()
     helpm.add_command(
         label="Acerca de…",
@@ -135,6 +145,8 @@ def build_ui() -> tuple[tk.Tk, callable]:
         # Usuarios
         ("Crear nuevo usuario",   "Crea una cuenta local vacía.",
          "Usuarios", create_user, None),
+        ("Crear usuarios en lote", "Alta de muchas cuentas (alumno{01..40}, lista o CSV).",
+         "Usuarios", bulk_create_users, None),
         ("Borrar usuario(s)",     "Elimina cuentas y sus carpetas.",
          "Usuarios", delete_user, None),
         ("Reemplazar usuario",    "Borra uno y crea otro con accesos.",
@@ -230,7 +242,8 @@ def launch(fn: callable, name: str, parent: tk.Tk, refresh_cb):
     """Lanza una acción, muestra los mensajes y refresca botones."""
     logger.debug("→ %s", name)
     try:
-        fn()
+        with metrics.span(name, cat="action"), profiling.profile_action(name):
+            fn()
     except Exception as err:
         logger.exception("Error en %s", name)
         messagebox.showerror(f"Error – {name}", str(err), parent=parent)
@@ -240,6 +253,39 @@ def launch(fn: callable, name: str, parent: tk.Tk, refresh_cb):
     finally:
         refresh_cb()
 
+# ─────────────── Lotes interrumpidos (diario) ────────────────
+RESUMABLE = {
+    "batch_delete": ("Borrado en lote de carpetas", batch_delete_folders),
+    "delete_user":  ("Borrar usuario(s)", delete_user),
+}
+
+def offer_resume(parent: tk.Tk, refresh_cb) -> None:
+    """Si el último cierre cortó un lote a medias, ofrece seguir donde quedó."""
+    jr = journal.get()
+    if jr is None:
+        return
+    try:
+        jr.prune()
+        unfinished = [i for i in jr.unfinished() if i.kind in RESUMABLE]
+    except Exception:
+        logger.exception("No se pudo leer el diario de operaciones")
+        return
+    for info in unfinished:
+        name, fn = RESUMABLE[info.kind]
+        when = time.strftime("%d/%m %H:%M", time.localtime(info.created))
+        pending = "\n".join(info.remaining[:15]) + ("\n…" if len(info.remaining) > 15 else "")
+        answer = messagebox.askyesnocancel(
+            "Trabajo sin terminar",
+            f"«{name}» se interrumpió ({when}): {info.done}/{info.planned} hecho(s), "
+            f"{len(info.remaining)} pendiente(s):\n\n{pending}\n\n"
+            "Sí: reanudar ahora\nNo: descartar\nCancelar: preguntar en el próximo inicio",
+            parent=parent,
+        )
+        if answer:
+            launch(lambda f=fn, i=info: f(resume=i), f"Reanudar {name}", parent, refresh_cb)
+        elif answer is False:
+            jr.discard(info.id)
+
 # ─────────────────────────── Main ────────────────────────────
 def main():
     if not is_admin():
@@ -251,7 +297,11 @@ def main():
             elevate()
         sys.exit()
 
-    root, _ = build_ui()
+    prewarm_pool()  # host PowerShell listo antes del primer clic (si hay pool)
+    user_inventory.prefetch()  # lista de cuentas lista antes de abrir diálogos
+    tombstones.start_reclaimer()  # termina borrados diferidos de sesiones previas
+    root, refresh = build_ui()
+    root.after(300, lambda: offer_resume(root, refresh))
     root.mainloop()
 
 if __name__ == "__main__":
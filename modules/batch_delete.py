@@ -1,37 +1,115 @@
 # modules/batch_delete.py
 from __future__ import annotations
 import os
-import shutil
+import time
+import queue
 import logging
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
+from utils import user_inventory, orphan_profiles, archiver, journal, metrics
+from utils.fast_delete import TreeDeleter, DeleteStats
+from utils.folder_scan import FolderScanner, FolderInfo, human_size
+from utils.selection_model import SelectionModel
+from utils.throttling import LoadMonitor, Throttle
+from modules.virtual_list import VirtualList
 
 logger = logging.getLogger(__name__)
 
 
+def _account_profiles(root_dir: str) -> dict[str, str]:
+    """
+    Carpetas directas de root_dir que son el perfil de una cuenta existente
+    ({carpeta en minúsculas: usuario}), según el proveedor de cuentas.
+    """
+    root = os.path.normcase(os.path.abspath(root_dir))
+    owners: dict[str, str] = {}
+    for user in user_inventory.get_users():
+        if not user.profile_path:
+            continue
+        path = os.path.normcase(os.path.abspath(user.profile_path))
+        if os.path.dirname(path) == root:
+            owners[os.path.basename(path).lower()] = user.name
+    return owners
+
+
+def _spin_int(var: tk.IntVar, default: int) -> int:
+    """Valor de un Spinbox numérico; default si el texto no es un número."""
+    try:
+        return max(0, int(var.get()))
+    except (tk.TclError, ValueError):
+        return default
+
+
+def _resume_selection(resume: journal.RunInfo, subdirs: list[str]) -> set[str]:
+    """Pendientes del lote interrumpido que aún existen; los demás se dan por hechos."""
+    present = set(subdirs)
+    jr = journal.get()
+    old = jr.resume(resume.id) if jr else None
+    for folder in resume.remaining:
+        if folder not in present and old is not None:
+            old.skipped(folder, "ya no existe")
+    return present.intersection(resume.remaining)
+
+
 def has_residuals() -> bool:
-    """Siempre habilita el botón para mostrar el diálogo."""
-    return True
+    """Habilita el botón solo si hay perfiles huérfanos en C:\\Users (con caché)."""
+    try:
+        return bool(orphan_profiles.orphans())
+    except Exception:
+        logger.exception("No se pudieron detectar perfiles huérfanos")
+        return True
 
 
-def batch_delete_folders() -> None:
+def batch_delete_folders(resume: journal.RunInfo | None = None) -> None:
     """
-    Diálogo con dos Listbox para mover carpetas disponibles a seleccionadas,
+    Diálogo con dos listas para mover carpetas disponibles a seleccionadas,
     con doble clic ilimitado y botones, y confirmación final antes de eliminar en lote.
+    Las listas son virtuales (solo se dibujan las filas visibles) y admiten
+    filtro al escribir, así que decenas de miles de carpetas no la frenan.
+    Tamaño, nº de archivos y última modificación se calculan en segundo plano
+    (con caché en disco) y las columnas se ordenan al pulsar su cabecera.
+    Cada carpeta queda anotada en el diario de operaciones; con resume
+    (lote cortado a medias) se abre la misma raíz con lo pendiente ya
+    seleccionado.
     """
-    # 1) Pedir carpeta raíz
-    root_dir = filedialog.askdirectory(
-        title="Selecciona la carpeta raíz para borrado en lote"
-    )
+    # 1) Carpeta raíz: C:\Users con los huérfanos ya seleccionados, u otra
+    orphans = [] if resume else orphan_profiles.orphans()
+    choice = False
+    if orphans:
+        choice = messagebox.askyesnocancel(
+            "Perfiles huérfanos",
+            f"Hay {len(orphans)} perfil(es) huérfano(s) en {orphan_profiles.USERS_DIR}:\n\n"
+            + "\n".join(os.path.basename(p) for p in orphans[:15])
+            + ("\n…" if len(orphans) > 15 else "")
+            + "\n\nSí: revisarlos ahora\nNo: elegir otra carpeta"
+        )
+        if choice is None:
+            return  # Cancelado
+    if resume:
+        root_dir = resume.params.get("root_dir", "")
+    elif choice:
+        root_dir = orphan_profiles.USERS_DIR
+    else:
+        root_dir = filedialog.askdirectory(
+            title="Selecciona la carpeta raíz para borrado en lote"
+        )
     if not root_dir:
         return  # Cancelado
+    preselect = set()
+    if os.path.normcase(os.path.abspath(root_dir)) == \
+            os.path.normcase(os.path.abspath(orphan_profiles.USERS_DIR)):
+        preselect = {os.path.basename(p) for p in orphans}
 
-    # 2) Listar subcarpetas directas
+    # 2) Listar subcarpetas directas (scandir: sin un stat extra por entrada)
     try:
-        subdirs = sorted(
-            d for d in os.listdir(root_dir)
-            if os.path.isdir(os.path.join(root_dir, d))
-        )
+        with os.scandir(root_dir) as it:
+            subdirs = sorted(
+                (e.name for e in it if e.is_dir(follow_symlinks=False)),
+                key=str.lower,
+            )
+        if resume:
+            preselect = _resume_selection(resume, subdirs)
     except Exception as e:
         logger.exception("No se pudo listar %s: %s", root_dir, e)
         messagebox.showerror(
@@ -50,30 +128,122 @@ def batch_delete_folders() -> None:
     # 3) Construir ventana modal
     win = tk.Toplevel()
     win.title("Borrado en lote")
-    win.geometry("700x450")
-    win.minsize(500, 350)
+    win.geometry("900x520")
+    win.minsize(640, 380)
     win.resizable(True, True)
     win.grab_set()
 
     # Etiqueta superior
     ttk.Label(
         win,
-        text=f"Carpeta raíz:\n{root_dir}",
+        text=f"Carpeta raíz:\n{root_dir}"
+             + (f"\nReanudando lote interrumpido: {len(preselect)} carpeta(s) pendiente(s)"
+                if resume else ""),
         anchor="w"
     ).pack(fill="x", padx=10, pady=(10, 5))
 
-    # Frame central con dos Listbox y botones de mover
+    # Frame central con dos listas y botones de mover
     mid = ttk.Frame(win)
     mid.pack(fill="both", expand=True, padx=10, pady=5)
 
-    # Listbox de disponibles
-    lbl_avail = ttk.Label(mid, text="Disponibles:")
-    lbl_avail.grid(row=0, column=0, padx=5, pady=(0,5))
-    avail_lb = tk.Listbox(mid, selectmode="extended", activestyle="none")
-    avail_lb.grid(row=1, column=0, sticky="nsew", padx=5)
-    sb_av = ttk.Scrollbar(mid, orient="vertical", command=avail_lb.yview)
-    sb_av.grid(row=1, column=1, sticky="ns")
-    avail_lb.config(yscrollcommand=sb_av.set)
+    # Selección: un set dentro de SelectionModel; cada lista es una vista
+    model = SelectionModel(subdirs)
+    model.select(preselect)
+
+    # Tamaños calculados en segundo plano: carpeta → FolderInfo
+    infos: dict[str, FolderInfo] = {}
+
+    def row_values(folder: str) -> tuple[str, str, str, str]:
+        info = infos.get(folder)
+        if info is None:
+            return (folder, "…", "…", "…")
+        newest = time.strftime("%Y-%m-%d", time.localtime(info.newest)) if info.newest else "—"
+        return (folder, human_size(info.size), f"{info.files:,}", newest)
+
+    def sort_key(col: str):
+        if col == "name":
+            return str.lower
+        if col == "size":
+            return lambda f: infos[f].size if f in infos else -1
+        if col == "files":
+            return lambda f: infos[f].files if f in infos else -1
+        return lambda f: infos[f].newest if f in infos else -1
+
+    columns = (("name", "Carpeta", 0, "w"), ("size", "Tamaño", 80, "e"),
+               ("files", "Archivos", 75, "e"), ("newest", "Modificado", 90, "center"))
+
+    class Pane:
+        """Una de las dos listas: filtro, orden y la VirtualList."""
+
+        def __init__(self, column: int, title: str, selected: bool):
+            self.selected = selected
+            self.sort: tuple[str, bool] = ("name", False)
+            head = ttk.Frame(mid)
+            head.grid(row=0, column=column, sticky="ew", padx=5, pady=(0, 5))
+            self.count_var = tk.StringVar(value=title)
+            ttk.Label(head, textvariable=self.count_var).pack(side="left")
+            self.filter_var = tk.StringVar()
+            entry = ttk.Entry(head, textvariable=self.filter_var, width=18)
+            entry.pack(side="right")
+            ttk.Label(head, text="Filtrar:").pack(side="right", padx=(0, 4))
+            self.title = title
+            self.filter_var.trace_add("write", lambda *_: self.schedule())
+            self.lst = VirtualList(mid, columns, row_values,
+                                   on_double=lambda key: move([key], not self.selected),
+                                   on_sort=self.on_sort)
+            self.lst.grid(row=1, column=column, sticky="nsew", padx=5)
+            self.lst.set_sort_mark(*self.sort)
+            # Escribir sobre la lista lleva el texto al filtro
+            self.lst.canvas.bind("<Key>", self.on_key, add=True)
+            self._pending = None
+
+        def on_key(self, event):
+            if event.char and event.char.isprintable() and not (event.state & 0x4):
+                self.filter_var.set(self.filter_var.get() + event.char)
+                return "break"
+            if event.keysym == "BackSpace":
+                self.filter_var.set(self.filter_var.get()[:-1])
+                return "break"
+            if event.keysym == "Escape":
+                self.filter_var.set("")
+                return "break"
+            return None
+
+        def schedule(self) -> None:
+            """Refresca tras una pausa corta al teclear (no en cada tecla)."""
+            if self._pending is not None:
+                win.after_cancel(self._pending)
+            self._pending = win.after(120, self.refresh)
+
+        def on_sort(self, col: str) -> None:
+            prev_col, prev_rev = self.sort
+            # Tamaño/archivos/fecha: de mayor a menor en el primer clic
+            reverse = (not prev_rev) if prev_col == col else col != "name"
+            self.sort = (col, reverse)
+            self.lst.set_sort_mark(col, reverse)
+            self.refresh()
+
+        def refresh(self) -> None:
+            self._pending = None
+            col, reverse = self.sort
+            rows = model.view(self.selected, self.filter_var.get(),
+                              key=sort_key(col), reverse=reverse)
+            self.lst.set_rows(rows)
+            shown = f" ({len(rows):,})"
+            self.count_var.set(self.title + shown)
+
+    avail = Pane(0, "Disponibles", selected=False)
+    chosen = Pane(3, "Seleccionadas", selected=True)
+
+    def move(items, to_selected: bool) -> None:
+        """Pasa items al otro lado; O(len(items)) + recalcular vistas."""
+        if to_selected:
+            model.select(items)
+        else:
+            model.deselect(items)
+        avail.refresh()
+        chosen.refresh()
+        update_dry_run()
 
     # Botones de movimiento
     btn_frame = ttk.Frame(mid)
@@ -82,67 +252,95 @@ def batch_delete_folders() -> None:
         btn_frame,
         text="≫",
         width=3,
-        command=lambda: move_items(avail_lb, sel_lb)
-    ).pack(pady=10)
+        command=lambda: move(avail.lst.selected_rows(), True)
+    ).pack(pady=(10, 4))
     ttk.Button(
         btn_frame,
         text="≪",
         width=3,
-        command=lambda: move_items(sel_lb, avail_lb)
+        command=lambda: move(chosen.lst.selected_rows(), False)
+    ).pack()
+    # Todo lo visible (respeta el filtro)
+    ttk.Button(
+        btn_frame,
+        text="⋙",
+        width=3,
+        command=lambda: move(avail.lst.rows, True)
+    ).pack(pady=(16, 4))
+    ttk.Button(
+        btn_frame,
+        text="⋘",
+        width=3,
+        command=lambda: move(chosen.lst.rows, False)
     ).pack()
 
-    # Listbox de seleccionadas
-    lbl_sel = ttk.Label(mid, text="Seleccionadas:")
-    lbl_sel.grid(row=0, column=3, padx=5, pady=(0,5))
-    sel_lb = tk.Listbox(mid, selectmode="extended", activestyle="none")
-    sel_lb.grid(row=1, column=3, sticky="nsew", padx=5)
-    sb_sel = ttk.Scrollbar(mid, orient="vertical", command=sel_lb.yview)
-    sb_sel.grid(row=1, column=4, sticky="ns")
-    sel_lb.config(yscrollcommand=sb_sel.set)
-
-    # Configurar grid para expandir Listboxes
+    # Configurar grid para expandir las listas
     mid.columnconfigure(0, weight=1)
     mid.columnconfigure(3, weight=1)
     mid.rowconfigure(1, weight=1)
 
-    # Rellenar disponibles
-    for folder in subdirs:
-        avail_lb.insert("end", folder)
-
-    def move_items(src: tk.Listbox, dst: tk.Listbox):
-        """Mueve ítems seleccionados de src a dst (mantiene orden)."""
-        items = [src.get(i) for i in src.curselection()]
-        for item in items:
-            if item not in dst.get(0, "end"):
-                dst.insert("end", item)
-        for i in reversed(src.curselection()):
-            src.delete(i)
-
-    # 4) Doble clic ilimitado para mover
-    def on_avail_dblclick(event):
-        idx = avail_lb.nearest(event.y)
-        if idx < 0:
+    # Resumen de lo que liberaría la selección (simulación)
+    dry_var = tk.StringVar()
+    ttk.Label(mid, textvariable=dry_var, anchor="w")\
+        .grid(row=2, column=3, sticky="w", padx=5, pady=(4, 0))
+
+    def update_dry_run() -> None:
+        if not model.selected:
+            dry_var.set("")
             return
-        item = avail_lb.get(idx)
-        if item not in sel_lb.get(0, "end"):
-            sel_lb.insert("end", item)
-        avail_lb.delete(idx)
-
-    def on_sel_dblclick(event):
-        idx = sel_lb.nearest(event.y)
-        if idx < 0:
+        size = files = pending = 0
+        for f in model.selected:
+            info = infos.get(f)
+            if info is None:
+                pending += 1
+            else:
+                size += info.size
+                files += info.files
+        text = f"Se liberarían {human_size(size)} en {files:,} archivos"
+        if pending:
+            text += f" (faltan {pending:,} por calcular)"
+        dry_var.set(text)
+
+    avail.refresh()
+    chosen.refresh()
+    update_dry_run()
+
+    # Escaneo de tamaños mientras el diálogo está abierto
+    scan_updates: queue.Queue = queue.Queue()
+    scan_order = sorted(subdirs, key=lambda d: d not in preselect)  # selección primero
+    scanner = FolderScanner([os.path.join(root_dir, d) for d in scan_order],
+                            on_result=scan_updates.put)
+    scanner.start()
+
+    def poll_scan():
+        if not win.winfo_exists():
             return
-        item = sel_lb.get(idx)
-        if item not in avail_lb.get(0, "end"):
-            avail_lb.insert("end", item)
-        sel_lb.delete(idx)
+        changed = False
+        while True:
+            try:
+                info = scan_updates.get_nowait()
+            except queue.Empty:
+                break
+            infos[os.path.basename(info.path)] = info
+            changed = True
+        if changed:
+            update_dry_run()
+            for pane in (avail, chosen):
+                # Reordenar solo si el orden depende de lo escaneado
+                if pane.sort[0] != "name":
+                    pane.refresh()
+                else:
+                    pane.lst.redraw()
+        if len(infos) < len(subdirs):
+            win.after(500, poll_scan)
 
-    avail_lb.bind("<Double-Button-1>", on_avail_dblclick, add=True)
-    sel_lb.bind("<Double-Button-1>", on_sel_dblclick, add=True)
+    win.after(250, poll_scan)
+    win.bind("<Destroy>", lambda e: scanner.cancel() if e.widget is win else None, add=True)
 
     # 5) Función de confirmación y borrado
     def on_confirm():
-        selected = sel_lb.get(0, "end")
+        nonlocal running
+        selected = model.selected_in_order()
         if not selected:
             messagebox.showwarning(
                 "Nada seleccionado",
@@ -151,44 +349,263 @@ def batch_delete_folders() -> None:
             )
             return
 
-        lista = "\n".join(selected)
+        owners = _account_profiles(root_dir)
+        in_use = [
+            f"{folder} (cuenta '{owners[folder.lower()]}')"
+            for folder in selected if folder.lower() in owners
+        ]
+        if in_use and not messagebox.askyesno(
+            "Perfiles de cuentas existentes",
+            "Estas carpetas son el perfil de una cuenta que todavía existe:\n\n"
+            + "\n".join(in_use)
+            + "\n\nBorrarlas deja esas cuentas sin perfil. ¿Continuar?",
+            icon="warning",
+            parent=win
+        ):
+            return
+
+        arch_dir = dest_var.get().strip() if archive_var.get() else ""
+        if archive_var.get():
+            if not arch_dir:
+                messagebox.showwarning("Sin destino", "Elige dónde guardar los archivos.", parent=win)
+                return
+            if os.path.normcase(os.path.abspath(arch_dir)).startswith(
+                    os.path.normcase(os.path.abspath(root_dir)) + os.sep):
+                messagebox.showwarning(
+                    "Destino no válido",
+                    "El destino no puede estar dentro de la carpeta que se va a borrar.",
+                    parent=win
+                )
+                return
+
+        lista = "\n".join(selected[:20])
+        if len(selected) > 20:
+            lista += f"\n… y {len(selected) - 20:,} más"
         if not messagebox.askyesno(
             "Confirmar BORRAR",
-            f"Vas a borrar {len(selected)} carpeta(s):\n\n{lista}\n\n¿Seguro?",
+            f"Vas a borrar {len(selected)} carpeta(s):\n\n{lista}\n\n"
+            f"{dry_var.get()}\n\n"
+            + (f"Antes se archivará cada una en {arch_dir} ({fmt_var.get()}).\n\n" if arch_dir else "")
+            + "¿Seguro?",
             parent=win
         ):
             return
 
-        errors: list[str] = []
-        for folder in selected:
-            path = os.path.join(root_dir, folder)
-            try:
-                shutil.rmtree(path)
-                logger.info("Carpeta eliminada: %s", path)
-            except Exception as e:
-                errors.append(f"{folder}: {e}")
-                logger.error("Error al borrar %s → %s", folder, e)
-
-        if errors:
-            messagebox.showerror(
-                "Completado con errores",
-                "\n".join(errors),
-                parent=win
+        # Borrado en segundo plano; la ventana solo muestra el avance
+        updates: queue.Queue = queue.Queue()
+        if soft_var.get():
+            throttle = Throttle(_spin_int(files_var, 0), _spin_int(mb_var, 0))
+            cpu = _spin_int(cpu_var, 60)
+            deleter = TreeDeleter(
+                workers=2,
+                on_progress=updates.put,
+                throttle=throttle,
+                low_priority=True,
+                load_monitor=LoadMonitor(cpu) if pause_var.get() else None,
             )
+            logger.info("Borrado en modo suave: %s, pausa por carga %s",
+                        throttle.describe(), f"> {cpu} %" if pause_var.get() else "no")
         else:
-            messagebox.showinfo(
-                "Hecho",
-                "Carpetas eliminadas correctamente.",
-                parent=win
+            deleter = TreeDeleter(on_progress=updates.put)
+        results: list[DeleteStats] = []
+        not_archived: list[str] = []
+        jr = journal.get()
+        if resume is not None and jr is not None:
+            jr.discard(resume.id, "reanudado")   # lo pendiente sigue en el lote nuevo
+        run = journal.begin("batch_delete", selected, {
+            "root_dir": root_dir, "archive_dir": arch_dir, "format": fmt_var.get(),
+            "resumed_from": resume.id if resume else None,
+        })
+        arch_cancel.clear()
+
+        def archive(folder: str) -> bool:
+            """Archiva folder; True solo si el archivo quedó verificado."""
+            res = archiver.archive_folder(
+                os.path.join(root_dir, folder), arch_dir, fmt=fmt_var.get(),
+                on_progress=lambda n, bi, bo: updates.put(("archive", folder, n, bi, bo)),
+                cancel=arch_cancel,
             )
-            win.destroy()
+            if not res.verified:
+                first = res.errors[0] if res.errors else ("", "verificación fallida")
+                not_archived.append(f"{folder}: sin archivar, no se borró – {first[0]} {first[1]}".strip())
+            return res.verified
+
+        def worker():
+            try:
+                for folder in selected:
+                    if deleter.cancelled:
+                        break
+                    run.started(folder)
+                    if arch_dir and not archive(folder):
+                        run.failed(folder, not_archived[-1])
+                        continue
+                    st = deleter.delete(os.path.join(root_dir, folder))
+                    results.append(st)
+                    if st.ok:
+                        run.done(folder, st.bytes)
+                    else:
+                        run.failed(folder, "cancelado" if st.cancelled
+                                   else f"{st.error_count} error(es)")
+            except Exception:
+                logger.exception("Error en el borrado en lote")
+            finally:
+                run.close()
+                updates.put(None)
+
+        running = deleter
+        btn_delete.state(["disabled"])
+        prog_bar.config(maximum=len(selected), value=0)
+        prog_bar.pack(side="left", fill="x", expand=True, padx=(0, 10))
+        threading.Thread(target=metrics.carry(worker), name="batch-delete", daemon=True).start()
+
+        def poll():
+            nonlocal running
+            finished = False
+            last: DeleteStats | None = None
+            while True:
+                try:
+                    item = updates.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    finished = True
+                    break
+                if isinstance(item, tuple):
+                    _, folder, n, read, written = item
+                    status_var.set(f"Archivando {folder}: {n:,} archivos, "
+                                   f"{human_size(read)} → {human_size(written)}")
+                    continue
+                last = item
+            if last is not None:
+                done = len(results) + (0 if last.finished else 1)
+                prog_bar.config(value=len(results))
+                status_var.set(f"{min(done, len(selected))}/{len(selected)} "
+                               f"{os.path.basename(last.root)}: {last.rate_text()}")
+            if not finished:
+                win.after(200, poll)
+                return
+
+            running = None
+            prog_bar.config(value=len(results))
+            errors: list[str] = list(not_archived)
+            for st in results:
+                folder = os.path.basename(st.root)
+                if st.ok:
+                    logger.info("Carpeta eliminada: %s", st.root)
+                    continue
+                first = st.errors[0] if st.errors else ("", "cancelado")
+                errors.append(f"{folder}: {st.error_count} error(es) – {first[0]} {first[1]}".strip())
+                logger.error("Error al borrar %s → %s errores", folder, st.error_count)
+            if deleter.cancelled:
+                errors.append(f"Cancelado: {len(selected) - len(results) - len(not_archived)} "
+                              "carpeta(s) sin tocar.")
+            files = sum(st.files for st in results)
+            size = sum(st.bytes for st in results)
+            total = f"\n\n{files:,} archivos, {size / 2**20:,.1f} MiB liberados."
+
+            if errors:
+                messagebox.showerror(
+                    "Completado con errores",
+                    "\n".join(errors) + total,
+                    parent=win
+                )
+                btn_delete.state(["!disabled"])
+            else:
+                messagebox.showinfo(
+                    "Hecho",
+                    "Carpetas eliminadas correctamente." + total,
+                    parent=win
+                )
+                win.destroy()
+
+        win.after(200, poll)
+
+    running: TreeDeleter | None = None
+    arch_cancel = threading.Event()
+
+    def on_cancel():
+        if running is not None:
+            if messagebox.askyesno("Cancelar", "¿Detener el borrado en curso?", parent=win):
+                arch_cancel.set()
+                running.cancel()
+            return
+        win.destroy()
+
+    # Modo suave: para borrar sin molestar mientras hay clase
+    soft = ttk.LabelFrame(win, text="Modo suave", padding=(8, 4))
+    soft.pack(fill="x", padx=10, pady=(0, 4))
+    soft_var = tk.BooleanVar(value=False)
+    files_var = tk.IntVar(value=0)
+    mb_var = tk.IntVar(value=20)
+    pause_var = tk.BooleanVar(value=True)
+    cpu_var = tk.IntVar(value=60)
+    soft_widgets: list[tk.Widget] = []
+
+    def toggle_soft():
+        for w in soft_widgets:
+            w.state(["!disabled"] if soft_var.get() else ["disabled"])
+
+    ttk.Checkbutton(soft, text="Baja prioridad", variable=soft_var,
+                    command=toggle_soft).pack(side="left")
+    for label, var, hi in (("Máx. archivos/s (0 = sin tope):", files_var, 100000),
+                           ("Máx. MB/s:", mb_var, 10000)):
+        ttk.Label(soft, text=label).pack(side="left", padx=(12, 4))
+        sp = ttk.Spinbox(soft, from_=0, to=hi, width=6, textvariable=var)
+        sp.pack(side="left")
+        soft_widgets.append(sp)
+    cb = ttk.Checkbutton(soft, text="Pausar si la CPU supera", variable=pause_var)
+    cb.pack(side="left", padx=(12, 4))
+    sp = ttk.Spinbox(soft, from_=10, to=100, width=4, textvariable=cpu_var)
+    sp.pack(side="left")
+    ttk.Label(soft, text="%").pack(side="left")
+    soft_widgets += [cb, sp]
+    toggle_soft()
+
+    # Archivar antes de borrar: solo se borra lo que quedó archivado y verificado
+    arch = ttk.LabelFrame(win, text="Copia de seguridad", padding=(8, 4))
+    arch.pack(fill="x", padx=10, pady=(0, 4))
+    archive_var = tk.BooleanVar(value=False)
+    fmt_var = tk.StringVar(value=archiver.FORMATS[0])
+    dest_var = tk.StringVar()
+    arch_widgets: list[tk.Widget] = []
+
+    def toggle_archive():
+        for w in arch_widgets:
+            w.state(["!disabled"] if archive_var.get() else ["disabled"])
+
+    def choose_dest():
+        path = filedialog.askdirectory(title="Destino de los archivos", parent=win)
+        if path:
+            dest_var.set(os.path.normpath(path))
+
+    ttk.Checkbutton(arch, text="Archivar antes de borrar", variable=archive_var,
+                    command=toggle_archive).pack(side="left")
+    fmt_box = ttk.Combobox(arch, textvariable=fmt_var, values=archiver.FORMATS,
+                           state="readonly", width=8)
+    fmt_box.pack(side="left", padx=(12, 4))
+    dest_entry = ttk.Entry(arch, textvariable=dest_var)
+    dest_entry.pack(side="left", fill="x", expand=True, padx=4)
+    dest_btn = ttk.Button(arch, text="Examinar…", command=choose_dest)
+    dest_btn.pack(side="left")
+    arch_widgets += [fmt_box, dest_entry, dest_btn]
+    if resume and resume.params.get("archive_dir"):
+        archive_var.set(True)
+        dest_var.set(resume.params["archive_dir"])
+        if resume.params.get("format") in archiver.FORMATS:
+            fmt_var.set(resume.params["format"])
+    toggle_archive()
 
     # 6) Botones de acción abajo
     bottom = ttk.Frame(win)
     bottom.pack(fill="x", padx=10, pady=10)
-    ttk.Button(bottom, text="Cancelar", command=win.destroy)\
+    ttk.Button(bottom, text="Cancelar", command=on_cancel)\
         .pack(side="right", padx=(0,5))
-    ttk.Button(bottom, text="Eliminar seleccionadas", command=on_confirm)\
-        .pack(side="right", padx=(0,10))
+    btn_delete = ttk.Button(bottom, text="Eliminar seleccionadas", command=on_confirm)
+    btn_delete.pack(side="right", padx=(0,10))
+    prog_bar = ttk.Progressbar(bottom, mode="determinate")
+    status_var = tk.StringVar()
+    ttk.Label(win, textvariable=status_var, anchor="w")\
+        .pack(fill="x", padx=10, pady=(0, 6), before=bottom)
+    win.protocol("WM_DELETE_WINDOW", on_cancel)
 
     win.mainloop()
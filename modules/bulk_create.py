@@ -0,0 +1,204 @@
+# modules/bulk_create.py
+
+from __future__ import annotations
+import logging
+import queue
+import threading
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from utils import metrics, user_inventory
+from utils.user_provisioning import (
+    parse_names, read_csv_names, validate_names, provision_users,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def bulk_create_users() -> None:
+    """
+    Alta de muchas cuentas de una vez. Acepta:
+      • Patrones:  alumno{01..40}
+      • Listas:    un nombre por línea (o separados por espacios / ';')
+      • CSV:       columna usuario/username/nombre o la primera
+    Valida todo antes de empezar y crea las cuentas (sin contraseña) en
+    una sola ejecución de PowerShell, mostrando el resultado de cada una.
+    """
+    modal = tk.Toplevel()
+    modal.title("Crear usuarios en lote")
+    modal.resizable(False, False)
+    modal.grab_set()
+
+    frm = ttk.Frame(modal, padding=20)
+    frm.pack(fill="both", expand=True)
+
+    ttk.Label(frm, text="Nombres, patrones (alumno{01..40}) o CSV:")\
+        .pack(anchor="w", pady=(0, 4))
+    text = tk.Text(frm, width=40, height=5, font=("Consolas", 10))
+    text.pack(fill="x")
+    text.insert("1.0", "alumno{01..40}")
+
+    tools = ttk.Frame(frm)
+    tools.pack(fill="x", pady=(4, 0))
+    never_expire_var = tk.BooleanVar(value=True)
+    ttk.Checkbutton(tools, text="Password nunca expira",
+                    variable=never_expire_var).pack(side="left")
+
+    tree = ttk.Treeview(frm, columns=("estado",), height=10)
+    tree.heading("#0", text="Usuario")
+    tree.heading("estado", text="Estado")
+    tree.column("#0", width=150)
+    tree.column("estado", width=260)
+    tree.pack(fill="both", expand=True, pady=(8, 0))
+    tree.tag_configure("error", foreground="#b00020")
+    tree.tag_configure("ok", foreground="#1b7f3b")
+
+    summary_var = tk.StringVar()
+    ttk.Label(frm, textvariable=summary_var).pack(anchor="w", pady=(4, 0))
+
+    def collect() -> tuple[list[str], dict[int, str]] | None:
+        try:
+            names = parse_names(text.get("1.0", "end"))
+        except ValueError as e:
+            messagebox.showwarning("Patrón no válido", str(e), parent=modal)
+            return None
+        existing = [u.name for u in user_inventory.get_users()]
+        return names, validate_names(names, existing)
+
+    def preview() -> tuple[list[str], dict[int, str]] | None:
+        res = collect()
+        if res is None:
+            return None
+        names, errors = res
+        tree.delete(*tree.get_children())
+        for idx, name in enumerate(names):
+            if idx in errors:
+                tree.insert("", "end", iid=str(idx), text=name,
+                            values=(errors[idx],), tags=("error",))
+            else:
+                tree.insert("", "end", iid=str(idx), text=name, values=("Listo para crear",))
+        summary_var.set(f"{len(names)} nombre(s), {len(errors)} con errores")
+        return res
+
+    def load_csv():
+        path = filedialog.askopenfilename(
+            parent=modal, title="Elegir CSV",
+            filetypes=[("CSV", "*.csv"), ("Texto", "*.txt"), ("Todos", "*.*")])
+        if not path:
+            return
+        try:
+            names = read_csv_names(path)
+        except (OSError, UnicodeDecodeError) as e:
+            messagebox.showerror("Error", f"No se pudo leer el CSV:\n{e}", parent=modal)
+            return
+        text.delete("1.0", "end")
+        text.insert("1.0", "\n".join(names))
+        preview()
+
+    ttk.Button(tools, text="Cargar CSV…", command=load_csv).pack(side="right")
+    ttk.Button(tools, text="Vista previa", command=preview).pack(side="right", padx=4)
+
+    btn_frame = ttk.Frame(frm)
+    btn_frame.pack(fill="x", pady=(10, 0))
+
+    running = False
+
+    def on_close():
+        if not running:
+            modal.destroy()
+
+    def on_create():
+        nonlocal running
+        res = preview()
+        if res is None:
+            return
+        names, errors = res
+        if not names:
+            messagebox.showwarning("Atención", "No hay nombres que crear.", parent=modal)
+            return
+        if errors:
+            messagebox.showwarning(
+                "Nombres no válidos",
+                f"Corrige los {len(errors)} nombre(s) marcados antes de continuar.",
+                parent=modal)
+            return
+        if not messagebox.askyesno("Confirmar",
+                                   f"¿Crear {len(names)} cuenta(s) sin contraseña?",
+                                   parent=modal):
+            return
+
+        iid_of = {name: str(idx) for idx, name in enumerate(names)}
+        for iid in iid_of.values():
+            tree.set(iid, "estado", "En cola")
+        updates: queue.Queue = queue.Queue()
+        outcome: dict = {}
+        never_expire = never_expire_var.get()   # Tk solo desde este hilo
+
+        def worker():
+            try:
+                outcome["results"] = provision_users(
+                    names, never_expire=never_expire,
+                    on_result=lambda n, ok, err: updates.put((n, ok, err)))
+            except Exception as e:
+                logger.exception("Error en alta en lote")
+                outcome["error"] = str(e)
+            finally:
+                updates.put(None)
+
+        btn_create.state(["disabled"])
+        btn_cancel.state(["disabled"])
+        running = True
+        threading.Thread(target=metrics.carry(worker), name="bulk-create", daemon=True).start()
+
+        created = failed = 0
+
+        def poll():
+            nonlocal running, created, failed
+            finished = False
+            while True:
+                try:
+                    item = updates.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    finished = True
+                    break
+                name, ok, err = item
+                iid = iid_of.get(name)
+                if iid is not None:
+                    tree.item(iid, values=("Creada" if ok else err,),
+                              tags=("ok",) if ok else ("error",))
+                    tree.see(iid)
+                created += ok
+                failed += not ok
+            summary_var.set(f"{created + failed}/{len(names)} procesadas, {failed} con error")
+            if not finished:
+                modal.after(150, poll)
+                return
+
+            running = False
+            user_inventory.invalidate()
+            btn_cancel.state(["!disabled"])
+            if "error" in outcome:
+                messagebox.showerror("Error", outcome["error"], parent=modal)
+            elif failed:
+                messagebox.showerror("Completado con errores",
+                                     f"{created} cuenta(s) creadas, {failed} con error.",
+                                     parent=modal)
+            else:
+                messagebox.showinfo("Hecho", f"{created} cuenta(s) creadas.", parent=modal)
+                modal.destroy()
+
+        modal.after(150, poll)
+
+    btn_create = ttk.Button(btn_frame, text="Crear", command=on_create)
+    btn_create.pack(side="right", padx=5)
+    btn_cancel = ttk.Button(btn_frame, text="Cancelar", command=on_close)
+    btn_cancel.pack(side="right")
+    modal.protocol("WM_DELETE_WINDOW", on_close)
+
+    preview()
+    modal.transient()
+    modal.wait_window()
+
+
+__all__ = ["bulk_create_users"]
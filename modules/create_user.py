@@ -6,6 +6,7 @@ import logging
 import tkinter as tk
 from tkinter import ttk, messagebox
 from utils.run_powershell import run_powershell_script as run_script
+from utils import user_inventory
 
 logger = logging.getLogger(__name__)
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
@@ -94,6 +95,7 @@ def _run_create_user(username: str,
 
     logger.debug("Lanzando PowerShell: %s %s", script_path, ps_args)
     out, err, code = run_script(script_path, *ps_args)
+    user_inventory.invalidate()
 
     if code != 0:
         logger.error("PowerShell terminó con error %s: %s", code, err)
@@ -1,42 +1,33 @@
 # modules/delete_user.py
 
 from __future__ import annotations
-import subprocess
+import os
 import logging
 import tkinter as tk
-from tkinter import ttk, messagebox
-from utils.run_powershell import run_powershell_script as run_script
+from tkinter import ttk, messagebox, filedialog
+import queue
+from utils import user_inventory, tombstones, archiver, journal
+from utils.user_deletion import UserDeletionEngine, FINAL_STATES
 
 logger = logging.getLogger(__name__)
 
-def _local_users() -> list[str]:
+def delete_user(resume: journal.RunInfo | None = None) -> None:
     """
-    Obtiene usuarios locales habilitados (excluye cuentas de sistema)
-    usando PowerShell inline con subprocess.check_output.
+    Ventana de borrado múltiple de usuarios con check-buttons. Con resume
+    (lote cortado a medias) salen marcadas las cuentas pendientes; las que
+    ya no existen se dan por borradas.
     """
-    ps_cmd = (
-        'Get-LocalUser | Where-Object { $_.Enabled -eq $true } | '
-        'Where-Object { $_.Name -notin @("Administrator","DefaultAccount","Guest","WDAGUtilityAccount") } | '
-        'Select-Object -ExpandProperty Name'
-    )
-    try:
-        out = subprocess.check_output(
-            ["powershell.exe", "-NoProfile", "-Command", ps_cmd],
-            stderr=subprocess.DEVNULL,
-            text=True,
-            encoding="utf-8"
-        )
-    except subprocess.CalledProcessError as e:
-        logger.error("Error listando usuarios con PowerShell: %s", e)
-        return []
-
-    users = [line.strip() for line in out.splitlines() if line.strip()]
-    return sorted(users)
-
-
-def delete_user() -> None:
-    """Ventana de borrado múltiple de usuarios con check-buttons."""
-    users = _local_users()
+    records = user_inventory.managed_users()
+    users = [u.name for u in records]
+    pending: set[str] = set()
+    if resume:
+        pending = set(resume.remaining) & set(users)
+        jr = journal.get()
+        if jr is not None:
+            old = jr.resume(resume.id)
+            existing = {u.name for u in user_inventory.get_users()}
+            for user in set(resume.remaining) - existing:
+                old.skipped(user, "ya no existe")
     if not users:
         messagebox.showinfo("Vacío", "No hay usuarios locales habilitados para borrar.")
         return
@@ -81,60 +72,156 @@ def delete_user() -> None:
 
     # Crear los checkbuttons
     vars_: dict[str, tk.BooleanVar] = {}
-    for idx, user in enumerate(users):
-        var = tk.BooleanVar(value=False)
-        vars_[user] = var
+    for idx, rec in enumerate(records):
+        var = tk.BooleanVar(value=rec.name in pending)
+        vars_[rec.name] = var
         row, col = divmod(idx, 2)
         ttk.Checkbutton(
             inner,
-            text=user,
+            text=f"{rec.name}  (sesión abierta)" if rec.profile_loaded else rec.name,
             variable=var
         ).grid(row=row, column=col, sticky="w", padx=4, pady=2)
 
+    # Progreso en vivo (visible al empezar el borrado)
+    prog_frame = ttk.Frame(frm)
+    prog_tree = ttk.Treeview(prog_frame, columns=("estado", "tiempo"), height=6)
+    prog_tree.heading("#0", text="Usuario")
+    prog_tree.heading("estado", text="Estado")
+    prog_tree.heading("tiempo", text="Tiempo")
+    prog_tree.column("#0", width=160)
+    prog_tree.column("estado", width=160)
+    prog_tree.column("tiempo", width=70, anchor="e")
+    prog_tree.pack(fill="both", expand=True)
+    prog_bar = ttk.Progressbar(prog_frame, mode="determinate")
+    prog_bar.pack(fill="x", pady=(4, 0))
+
     # Botones de acción
     btn_frame = ttk.Frame(frm)
     btn_frame.pack(fill="x", pady=(10,0))
 
+    ttk.Label(btn_frame, text="En paralelo:").pack(side="left")
+    workers_var = tk.IntVar(value=4)
+    ttk.Spinbox(btn_frame, from_=1, to=8, width=3, textvariable=workers_var,
+                state="readonly").pack(side="left", padx=(4, 0))
+    defer_var = tk.BooleanVar(value=resume.params.get("defer", True) if resume else True)
+    ttk.Checkbutton(btn_frame, text="Borrado diferido del perfil (rápido)",
+                    variable=defer_var).pack(side="left", padx=(10, 0))
+
+    # Copia del perfil antes de borrarlo (se borra solo si quedó verificada)
+    arch_frame = ttk.Frame(frm)
+    arch_frame.pack(fill="x", pady=(6, 0), before=btn_frame)
+    params = resume.params if resume else {}
+    archive_var = tk.BooleanVar(value=bool(params.get("archive_dir")))
+    dest_var = tk.StringVar(value=params.get("archive_dir") or "")
+    fmt_var = tk.StringVar(value=params.get("format") if params.get("format") in archiver.FORMATS
+                           else archiver.FORMATS[0])
+
+    def choose_dest():
+        path = filedialog.askdirectory(title="Destino de los perfiles archivados", parent=modal)
+        if path:
+            dest_var.set(os.path.normpath(path))
+            archive_var.set(True)
+
+    ttk.Checkbutton(arch_frame, text="Archivar perfiles en:",
+                    variable=archive_var).pack(side="left")
+    ttk.Entry(arch_frame, textvariable=dest_var, width=30).pack(side="left", padx=4)
+    ttk.Button(arch_frame, text="…", width=3, command=choose_dest).pack(side="left")
+    ttk.Combobox(arch_frame, textvariable=fmt_var, values=archiver.FORMATS,
+                 state="readonly", width=8).pack(side="left", padx=(6, 0))
+
+    running = False
+
+    def on_close():
+        if not running:
+            modal.destroy()
+
     def on_delete():
+        nonlocal running
         sel = [u for u, v in vars_.items() if v.get()]
         if not sel:
             messagebox.showwarning("Nada seleccionado",
                                    "Marca al menos una cuenta.",
                                    parent=modal)
             return
-        if not messagebox.askyesno("Confirmar",
-                                   f"¿Borrar {len(sel)} cuenta(s)?",
-                                   parent=modal):
+        arch_dir = dest_var.get().strip() if archive_var.get() else ""
+        if archive_var.get() and not arch_dir:
+            messagebox.showwarning("Sin destino",
+                                   "Elige dónde guardar los perfiles archivados.",
+                                   parent=modal)
+            return
+        question = f"¿Borrar {len(sel)} cuenta(s)?"
+        if arch_dir:
+            question += f"\n\nLos perfiles se archivarán antes en {arch_dir}."
+        if not messagebox.askyesno("Confirmar", question, parent=modal):
             return
 
-        errors = []
-        for user in sel:
-            out, err, code = run_script(
-                r"powershell\borrar_usuario_completo.ps1",
-                "-Username", user,
-                "-Force"
-            )
-            if code != 0:
-                msg = err.strip() or out.strip()
-                errors.append(f"{user}: {msg}")
-                logger.error("Error borrando %s → %s", user, msg)
+        # El borrado corre en hilos; la ventana solo refleja los cambios
+        updates: queue.Queue = queue.Queue()
+        extra = ["-Force"]
+        if defer_var.get() and not arch_dir:   # archivar ya implica apartar
+            extra += ["-TombstoneDir", tombstones.TOMBSTONE_DIR]
+        jr = journal.get()
+        if resume is not None and jr is not None:
+            jr.discard(resume.id, "reanudado")   # lo pendiente sigue en el lote nuevo
+        run = journal.begin("delete_user", sel, {
+            "defer": defer_var.get(), "archive_dir": arch_dir, "format": fmt_var.get(),
+            "resumed_from": resume.id if resume else None,
+        })
+        engine = UserDeletionEngine(sel, workers=workers_var.get(),
+                                    on_update=updates.put, extra_args=extra,
+                                    archive_dir=arch_dir or None,
+                                    archive_format=fmt_var.get(), run=run)
+        prog_tree.delete(*prog_tree.get_children())
+        for st in engine.statuses.values():
+            prog_tree.insert("", "end", iid=st.user, text=st.user,
+                             values=(st.label, ""))
+        prog_bar.config(maximum=len(sel), value=0)
+        prog_frame.pack(fill="both", expand=True, pady=(10, 0), before=btn_frame)
+        btn_delete.state(["disabled"])
+        btn_cancel.state(["disabled"])
+        running = True
+        engine.start()
+
+        def poll():
+            nonlocal running
+            while True:
+                try:
+                    updates.get_nowait()
+                except queue.Empty:
+                    break
+            finished = 0
+            for st in engine.statuses.values():
+                prog_tree.item(st.user, values=(
+                    st.label, f"{st.elapsed:.1f}s" if st.started else ""))
+                finished += st.state in FINAL_STATES
+            prog_bar.config(value=finished)
+            if not engine.done:
+                modal.after(200, poll)
+                return
+
+            running = False
+            user_inventory.invalidate()
+            tombstones.wake()
+            btn_cancel.state(["!disabled"])
+            failed = [st for st in engine.statuses.values() if st.state == "failed"]
+            if failed:
+                messagebox.showerror("Completado con errores",
+                                     engine.summary(),
+                                     parent=modal)
             else:
-                logger.info("Usuario %s eliminado.", user)
-
-        if errors:
-            messagebox.showerror("Errores",
-                                 "\n".join(errors),
-                                 parent=modal)
-        else:
-            messagebox.showinfo("Hecho",
-                                "Usuarios eliminados correctamente.",
-                                parent=modal)
-            modal.destroy()
-
-    ttk.Button(btn_frame, text="Borrar", command=on_delete)\
-        .pack(side="right", padx=5)
-    ttk.Button(btn_frame, text="Cancelar", command=modal.destroy)\
-        .pack(side="right")
+                messagebox.showinfo("Hecho",
+                                    "Usuarios eliminados correctamente.\n\n"
+                                    + engine.summary(),
+                                    parent=modal)
+                modal.destroy()
+
+        modal.after(200, poll)
+
+    btn_delete = ttk.Button(btn_frame, text="Borrar", command=on_delete)
+    btn_delete.pack(side="right", padx=5)
+    btn_cancel = ttk.Button(btn_frame, text="Cancelar", command=on_close)
+    btn_cancel.pack(side="right")
+    modal.protocol("WM_DELETE_WINDOW", on_close)
 
     # Esperar cierre
     modal.transient()
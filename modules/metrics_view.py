@@ -0,0 +1,135 @@
+# modules/metrics_view.py
+
+from __future__ import annotations
+import time
+import logging
+import tkinter as tk
+from tkinter import ttk, messagebox, filedialog
+from utils import metrics, journal
+from utils.folder_scan import human_size
+
+logger = logging.getLogger(__name__)
+
+
+def show_metrics(parent: tk.Misc | None = None) -> None:
+    """
+    Ventana con la latencia por script PowerShell (p50 / p95 / máx) y
+    botón para exportar la traza en formato Chrome/Perfetto.
+    """
+    win = tk.Toplevel(parent)
+    win.title("Métricas de PowerShell")
+    win.geometry("640x320")
+    win.minsize(480, 220)
+
+    frm = ttk.Frame(win, padding=12)
+    frm.pack(fill="both", expand=True)
+
+    cols = ("count", "p50", "p95", "max", "total", "errors", "kb")
+    heads = ("N", "p50 (s)", "p95 (s)", "Máx (s)", "Total (s)", "Errores", "Salida KB")
+    tree = ttk.Treeview(frm, columns=cols, height=10)
+    tree.heading("#0", text="Script")
+    tree.column("#0", width=200, anchor="w")
+    for col, head in zip(cols, heads):
+        tree.heading(col, text=head)
+        tree.column(col, width=70, anchor="e")
+    sb = ttk.Scrollbar(frm, orient="vertical", command=tree.yview)
+    tree.configure(yscrollcommand=sb.set)
+    tree.grid(row=0, column=0, sticky="nsew")
+    sb.grid(row=0, column=1, sticky="ns")
+    frm.columnconfigure(0, weight=1)
+    frm.rowconfigure(0, weight=1)
+
+    def refresh():
+        tree.delete(*tree.get_children())
+        for row in metrics.summary():
+            tree.insert("", "end", text=row["script"], values=(
+                row["count"],
+                f"{row['p50']:.2f}",
+                f"{row['p95']:.2f}",
+                f"{row['max']:.2f}",
+                f"{row['total']:.1f}",
+                row["errors"],
+                f"{row['out_bytes'] / 1024:.1f}",
+            ))
+
+    def export():
+        path = filedialog.asksaveasfilename(
+            parent=win,
+            title="Exportar traza",
+            defaultextension=".json",
+            initialfile=time.strftime("labtool-trace-%Y%m%d-%H%M%S.json"),
+            filetypes=[("Chrome/Perfetto trace", "*.json")],
+        )
+        if not path:
+            return
+        try:
+            n = metrics.export_trace(path)
+        except Exception as e:
+            logger.exception("Error exportando traza")
+            messagebox.showerror("Error", str(e), parent=win)
+            return
+        messagebox.showinfo(
+            "Traza exportada",
+            f"{n} eventos guardados en:\n{path}\n\n"
+            "Ábrela en chrome://tracing o ui.perfetto.dev.",
+            parent=win,
+        )
+
+    bottom = ttk.Frame(frm)
+    bottom.grid(row=1, column=0, columnspan=2, sticky="ew", pady=(10, 0))
+    ttk.Button(bottom, text="Cerrar", command=win.destroy).pack(side="right")
+    ttk.Button(bottom, text="Exportar traza…", command=export).pack(side="right", padx=5)
+    ttk.Button(bottom, text="Actualizar", command=refresh).pack(side="left")
+    ttk.Button(bottom, text="Historial de lotes…",
+               command=lambda: show_history(win)).pack(side="left", padx=5)
+
+    refresh()
+    win.transient(parent)
+
+
+def show_history(parent: tk.Misc | None = None) -> None:
+    """Rendimiento de los últimos lotes anotados en el diario de operaciones."""
+    jr = journal.get()
+    if jr is None:
+        messagebox.showerror("Historial", "No se pudo abrir el diario de operaciones.",
+                             parent=parent)
+        return
+    win = tk.Toplevel(parent)
+    win.title("Historial de lotes")
+    win.geometry("640x320")
+    win.minsize(480, 220)
+
+    frm = ttk.Frame(win, padding=12)
+    frm.pack(fill="both", expand=True)
+
+    cols = ("when", "done", "failed", "seconds", "rate", "bytes")
+    heads = ("Fecha", "Hechos", "Fallidos", "Tiempo (s)", "Unid./s", "Datos/s")
+    tree = ttk.Treeview(frm, columns=cols, height=10)
+    tree.heading("#0", text="Operación")
+    tree.column("#0", width=140, anchor="w")
+    for col, head in zip(cols, heads):
+        tree.heading(col, text=head)
+        tree.column(col, width=120 if col == "when" else 70, anchor="e")
+    sb = ttk.Scrollbar(frm, orient="vertical", command=tree.yview)
+    tree.configure(yscrollcommand=sb.set)
+    tree.grid(row=0, column=0, sticky="nsew")
+    sb.grid(row=0, column=1, sticky="ns")
+    frm.columnconfigure(0, weight=1)
+    frm.rowconfigure(0, weight=1)
+
+    for row in jr.throughput(limit=200):
+        tree.insert("", "end", text=row["kind"], values=(
+            time.strftime("%d/%m/%Y %H:%M", time.localtime(row["created"])),
+            row["done"],
+            row["failed"],
+            f"{row['seconds']:.1f}",
+            f"{row['units_per_s']:.2f}",
+            f"{human_size(row['bytes_per_s'])}/s" if row["bytes_per_s"] else "",
+        ))
+
+    ttk.Button(frm, text="Cerrar", command=win.destroy)\
+        .grid(row=1, column=0, columnspan=2, sticky="e", pady=(10, 0))
+    win.transient(parent)
+
+
+__all__ = ["show_metrics", "show_history"]
@@ -1,37 +1,14 @@
 # modules/replace_user.py
 
 from __future__ import annotations
-import os
-import subprocess
 import logging
+import queue
 import tkinter as tk
 from tkinter import ttk, messagebox
-from utils.run_powershell import run_powershell_script as run_script
+from utils import user_inventory
+from utils.replace_pipeline import ReplacePipeline
 
 logger = logging.getLogger(__name__)
-BASE_DIR = os.path.abspath(os.path.dirname(__file__))
-
-
-def _local_users() -> list[str]:
-    """
-    Devuelve la lista de usuarios locales habilitados,
-    excluyendo cuentas de sistema.
-    """
-    ps_cmd = (
-        'Get-LocalUser | Where-Object { $_.Enabled -eq $true } | '
-        'Where-Object { $_.Name -notin @("Administrator","DefaultAccount","Guest","WDAGUtilityAccount") } | '
-        'Select-Object -ExpandProperty Name'
-    )
-    try:
-        out = subprocess.check_output(
-            ["powershell.exe", "-NoProfile", "-Command", ps_cmd],
-            stderr=subprocess.DEVNULL,
-            text=True, encoding="utf-8"
-        )
-    except subprocess.CalledProcessError as e:
-        logger.error("Error listando usuarios locales: %s", e)
-        return []
-    return sorted(u.strip() for u in out.splitlines() if u.strip())
 
 
 def replace_user() -> None:
@@ -39,9 +16,11 @@ def replace_user() -> None:
     Abre un diálogo con:
       1. Combo de usuarios actuales.
       2. Campo para el nuevo nombre.
-    Al confirmar, borra la cuenta antigua y crea la nueva sin contraseña.
+      3. Lista de pares a reemplazar (uno o varios).
+    Al confirmar, crea las cuentas nuevas sin contraseña mientras retira
+    las antiguas, y después borra las antiguas (ver ReplacePipeline).
     """
-    users = _local_users()
+    users = user_inventory.enabled_user_names()
     if not users:
         messagebox.showinfo("Vacío", "No hay usuarios locales habilitados para reemplazar.")
         return
@@ -66,64 +45,124 @@ def replace_user() -> None:
     new_var = tk.StringVar()
     ttk.Entry(frm, textvariable=new_var).grid(row=1, column=1, sticky="ew", pady=4)
 
-    btn_frame = ttk.Frame(frm)
-    btn_frame.grid(row=2, column=0, columnspan=2, pady=(10,0))
-
-    def on_confirm():
+    # Pares pendientes (y su progreso una vez lanzados)
+    pairs_tree = ttk.Treeview(frm, columns=("nuevo", "estado", "tiempo"), height=5)
+    pairs_tree.heading("#0", text="Antiguo")
+    pairs_tree.heading("nuevo", text="Nuevo")
+    pairs_tree.heading("estado", text="Estado")
+    pairs_tree.heading("tiempo", text="Tiempo")
+    pairs_tree.column("#0", width=120)
+    pairs_tree.column("nuevo", width=120)
+    pairs_tree.column("estado", width=210)
+    pairs_tree.column("tiempo", width=60, anchor="e")
+    pairs_tree.grid(row=3, column=0, columnspan=2, sticky="nsew", pady=(6, 0))
+
+    pairs: dict[str, str] = {}   # antiguo → nuevo
+
+    def add_pair() -> bool:
         old = user_cb.get()
         new = new_var.get().strip()
         if not new:
             messagebox.showwarning("Atención", "Escribe el nuevo nombre de usuario.", parent=modal)
-            return
-        modal.destroy()
-        _run_replace_user(old, new)
+            return False
+        taken = {n.lower() for n in pairs.values()} | {u.lower() for u in users}
+        if new.lower() in taken and pairs.get(old, "").lower() != new.lower():
+            messagebox.showwarning("Atención", f"El nombre '{new}' ya está en uso.", parent=modal)
+            return False
+        pairs[old] = new
+        if pairs_tree.exists(old):
+            pairs_tree.item(old, values=(new, "", ""))
+        else:
+            pairs_tree.insert("", "end", iid=old, text=old, values=(new, "", ""))
+        new_var.set("")
+        return True
+
+    def remove_pair():
+        for iid in pairs_tree.selection():
+            pairs.pop(iid, None)
+            pairs_tree.delete(iid)
+
+    pair_btns = ttk.Frame(frm)
+    pair_btns.grid(row=2, column=0, columnspan=2, sticky="w", pady=(4, 0))
+    ttk.Button(pair_btns, text="Añadir a la lista", command=add_pair).pack(side="left")
+    ttk.Button(pair_btns, text="Quitar", command=remove_pair).pack(side="left", padx=4)
+
+    btn_frame = ttk.Frame(frm)
+    btn_frame.grid(row=4, column=0, columnspan=2, sticky="ew", pady=(10,0))
+
+    ttk.Label(btn_frame, text="En paralelo:").pack(side="left")
+    workers_var = tk.IntVar(value=2)
+    ttk.Spinbox(btn_frame, from_=1, to=8, width=3, textvariable=workers_var,
+                state="readonly").pack(side="left", padx=(4, 0))
+
+    running = False
+    outcome: dict = {}      # "failed": pares que no acabaron en "done"
+
+    def on_close():
+        if not running:
+            modal.destroy()
 
-    ttk.Button(btn_frame, text="Cancelar", command=modal.destroy)\
-        .pack(side="right", padx=5)
-    ttk.Button(btn_frame, text="Reemplazar", command=on_confirm)\
-        .pack(side="right")
+    def on_confirm():
+        nonlocal running
+        # Sin lista: se reemplaza el par escrito en los campos
+        if new_var.get().strip() or not pairs:
+            if not add_pair():
+                return
+
+        updates: queue.Queue = queue.Queue()
+        pipeline = ReplacePipeline(list(pairs.items()), workers=workers_var.get(),
+                                   on_update=updates.put)
+        btn_ok.state(["disabled"])
+        btn_cancel.state(["disabled"])
+        running = True
+        pipeline.start()
+
+        def poll():
+            nonlocal running
+            while True:
+                try:
+                    updates.get_nowait()
+                except queue.Empty:
+                    break
+            for job in pipeline.jobs:
+                pairs_tree.item(job.old, values=(
+                    job.new, job.label, f"{job.elapsed:.1f}s" if job.started else ""))
+            if not pipeline.done:
+                modal.after(200, poll)
+                return
+
+            running = False
+            user_inventory.invalidate()
+            btn_cancel.state(["!disabled"])
+            failed = [job for job in pipeline.jobs if job.state != "done"]
+            outcome["failed"] = failed
+            if failed:
+                messagebox.showerror("Completado con errores", pipeline.summary(), parent=modal)
+            else:
+                messagebox.showinfo(
+                    "Éxito",
+                    "Cuentas reemplazadas; las nuevas no tienen contraseña.\n\n"
+                    + pipeline.summary(),
+                    parent=modal,
+                )
+                modal.destroy()
+
+        modal.after(200, poll)
+
+    btn_cancel = ttk.Button(btn_frame, text="Cancelar", command=on_close)
+    btn_cancel.pack(side="right", padx=5)
+    btn_ok = ttk.Button(btn_frame, text="Reemplazar", command=on_confirm)
+    btn_ok.pack(side="right")
+    modal.protocol("WM_DELETE_WINDOW", on_close)
 
     modal.transient()
     modal.wait_window()
 
-
-def _run_replace_user(old_username: str, new_username: str) -> None:
-    """
-    1) Borra la cuenta antigua y su perfil completo.
-    2) Crea la cuenta nueva sin contraseña y la marca never-expire.
-    """
-    # 1) Borrar cuenta antigua y perfil
-    delete_script = os.path.abspath(
-        os.path.join(BASE_DIR, os.pardir, "powershell", "borrar_usuario_completo.ps1")
-    )
-    logger.debug("Borrando usuario: %s", old_username)
-    out, err, code = run_script(delete_script, "-Username", old_username)
-    if code != 0:
-        msg = err.strip() or out.strip()
-        logger.error("Error borrando %s: %s", old_username, msg)
-        raise RuntimeError(f"No se pudo borrar '{old_username}': {msg}")
-
-    # 2) Crear usuario nuevo sin contraseña, con passwordreq:no y never expire
-    create_script = os.path.abspath(
-        os.path.join(BASE_DIR, os.pardir, "powershell", "crear_usuario.ps1")
-    )
-    logger.debug("Creando usuario: %s sin contraseña", new_username)
-    out, err, code = run_script(
-        create_script,
-        "-Username", new_username,
-        "-NoPassword",
-        "-NeverExpire"
-    )
-    if code != 0:
-        msg = err.strip() or out.strip()
-        logger.error("Error creando %s: %s", new_username, msg)
-        raise RuntimeError(f"No se pudo crear '{new_username}': {msg}")
-
-    logger.info("Usuario '%s' eliminado y '%s' creado.", old_username, new_username)
-    messagebox.showinfo(
-        "Éxito",
-        f"Usuario '{old_username}' eliminado\ny se ha creado '{new_username}' sin contraseña."
-    )
+    failed = outcome.get("failed")
+    if failed:
+        # Para que quien lanzó la acción no la dé por buena
+        raise RuntimeError(f"{len(failed)} reemplazo(s) sin completar: "
+                           + ", ".join(f"{j.old} → {j.new} ({j.label})" for j in failed))
 
 
 __all__ = ["replace_user"]
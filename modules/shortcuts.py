@@ -2,44 +2,190 @@
 
 from __future__ import annotations
 import os
-import glob
+import re
+import queue
+import difflib
 import shutil
 import logging
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
+from utils import metrics, shortcut_deploy
+from utils.fuzzy_search import SearchIndex
+from utils.shortcut_index import CatalogItem, ShortcutIndex, catalog
 
 logger = logging.getLogger(__name__)
 
+_index: ShortcutIndex | None = None
+_index_lock = threading.Lock()
+_ALL_APPS = "(todas)"
+_BAD_NAME = re.compile(r'[<>:"/\\|?*]')
 
-def _scan_shortcuts() -> dict[str, str]:
+
+def _get_index() -> ShortcutIndex:
+    """Índice de accesos del Menú Inicio (uno por sesión, guardado en disco)."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ShortcutIndex()
+        return _index
+
+
+def _scan_shortcuts(index: ShortcutIndex) -> dict[str, CatalogItem]:
+    """
+    .lnk del Menú Inicio (ProgramData y AppData) según el índice, como
+    dict: { "Nombre": CatalogItem }. Los que abren lo mismo salen una vez,
+    los homónimos llevan su carpeta y los rotos " (roto)". No toca el
+    disco salvo para comprobar destinos: el índice se refresca aparte.
+    """
+    return {it.display: it for it in catalog(index.entries(), index.roots)}
+
+
+def _copy_name(item: CatalogItem, used: set[str]) -> str:
+    """Nombre del .lnk copiado; si ya se usó (homónimos), el mostrado."""
+    fname = os.path.basename(item.shortcut.path)
+    if fname.lower() in used:
+        fname = _BAD_NAME.sub("_", item.display) + ".lnk"
+    used.add(fname.lower())
+    return fname
+
+
+def _sync_listbox(lb: tk.Listbox, shown: list[str], new: list[str]) -> None:
     """
-    Busca todos los .lnk en Menú Inicio (ProgramData y AppData)
-    y devuelve un dict: { "Nombre": ruta_al_lnk }.
+    Cambia el contenido de lb de `shown` a `new` tocando solo lo que
+    difiere (se conserva la selección y el desplazamiento de lo demás).
     """
-    roots = [
-        os.path.join(os.getenv("ProgramData", ""), "Microsoft\\Windows\\Start Menu\\Programs"),
-        os.path.join(os.getenv("APPDATA", ""),    "Microsoft\\Windows\\Start Menu\\Programs"),
-    ]
-    mapping: dict[str, str] = {}
-    for root in roots:
-        pattern = os.path.join(root, "**", "*.lnk")
-        for path in glob.glob(pattern, recursive=True):
-            name = os.path.splitext(os.path.basename(path))[0]
-            if name not in mapping:
-                mapping[name] = path
-    return dict(sorted(mapping.items()))
+    ops = difflib.SequenceMatcher(None, shown, new, autojunk=False).get_opcodes()
+    for tag, i1, i2, j1, j2 in reversed(ops):   # de atrás adelante: índices estables
+        if tag in ("delete", "replace"):
+            lb.delete(i1, i2 - 1)
+        if tag in ("insert", "replace"):
+            lb.insert(i1, *new[j1:j2])
+    shown[:] = new
+
+
+def _deploy_dialog(parent: tk.Misc, sources: list[str]) -> None:
+    """
+    Lleva el conjunto de accesos elegido a los Escritorios de varios (o
+    todos los) perfiles a la vez, en paralelo. Lo que ya es idéntico no se
+    copia y, si se marca, se quita lo que LabTool puso antes y ya no está
+    en el conjunto. Al final, un informe por perfil.
+    """
+    targets = shortcut_deploy.profile_targets()
+    win = tk.Toplevel(parent)
+    win.title("Desplegar en escritorios")
+    win.resizable(False, False)
+    win.grab_set()
+
+    frm = ttk.Frame(win, padding=12)
+    frm.pack(fill="both", expand=True)
+    ttk.Label(frm, text=f"{len(sources)} acceso(s) → perfiles:").pack(anchor="w")
+
+    lb = tk.Listbox(frm, height=10, width=36, selectmode="extended", exportselection=False)
+    for t in targets:
+        lb.insert("end", t.label)
+    lb.select_set(0, "end")
+    lb.pack(fill="both", expand=True, pady=(4, 4))
+
+    public_var = tk.BooleanVar(value=False)
+    prune_var = tk.BooleanVar(value=True)
+    ttk.Checkbutton(frm, text="También el Escritorio Público",
+                    variable=public_var).pack(anchor="w")
+    ttk.Checkbutton(frm, text="Quitar los que desplegué antes y ya no están",
+                    variable=prune_var).pack(anchor="w")
+
+    status_var = tk.StringVar()
+    ttk.Label(frm, textvariable=status_var).pack(anchor="w", pady=(6, 0))
+    bar = ttk.Progressbar(frm, mode="determinate")
+    bar.pack(fill="x", pady=(2, 6))
+
+    btns = ttk.Frame(frm)
+    btns.pack(fill="x")
+    running = False
+
+    def on_close():
+        if not running:
+            win.destroy()
+
+    def run():
+        nonlocal running
+        chosen = [targets[i] for i in lb.curselection()]
+        if public_var.get():
+            chosen.append(shortcut_deploy.Target("Público", shortcut_deploy.public_desktop()))
+        if not chosen:
+            messagebox.showwarning("Sin perfiles", "Marca al menos un perfil.", parent=win)
+            return
+        updates: queue.Queue = queue.Queue()
+        results: list[shortcut_deploy.ProfileReport] = []
+        prune = prune_var.get()   # Tk solo desde este hilo
+
+        def worker():
+            try:
+                results.extend(shortcut_deploy.deploy(sources, chosen, prune=prune,
+                                                      on_report=updates.put))
+            except Exception:
+                logger.exception("Error desplegando accesos")
+            finally:
+                updates.put(None)
+
+        running = True
+        btn_run.state(["disabled"])
+        bar.config(maximum=len(chosen), value=0)
+        threading.Thread(target=metrics.carry(worker), name="lnk-deploy", daemon=True).start()
+
+        def poll():
+            nonlocal running
+            done = False
+            while True:
+                try:
+                    item = updates.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    done = True
+                    break
+                bar.step(1)
+                status_var.set(f"{item.label}: {len(item.copied)} copiado(s)")
+            if not done:
+                win.after(100, poll)
+                return
+            running = False
+            btn_run.state(["!disabled"])
+            text = shortcut_deploy.report_text(results) or "Nada que hacer."
+            if any(not r.ok for r in results) or len(results) < len(chosen):
+                messagebox.showerror("Completado con errores", text, parent=win)
+            else:
+                messagebox.showinfo("Hecho", text, parent=win)
+                win.destroy()
+
+        win.after(100, poll)
+
+    btn_run = ttk.Button(btns, text="Desplegar", command=run)
+    btn_run.pack(side="right")
+    ttk.Button(btns, text="Cancelar", command=on_close).pack(side="right", padx=5)
+    win.protocol("WM_DELETE_WINDOW", on_close)
+    win.transient(parent)
+    win.wait_window()
 
 
 def create_shortcuts() -> None:
     """
     Ventana con dos paneles:
-      • Disponibles: todos los .lnk filtrables.
+      • Disponibles: todos los .lnk filtrables (por texto y por aplicación).
       • Seleccionados: los que elijas.
     Luego:
       • Elegir carpeta destino.
       • Botón “Crear accesos” copia los .lnk allí y abre la carpeta.
+      • O “Desplegar en perfiles…” los lleva a los Escritorios de muchos
+        perfiles a la vez (sincronizando con lo desplegado antes).
+    La lista sale al instante del índice en disco y se pone al día en
+    segundo plano (solo se recorren las carpetas que cambiaron).
     """
-    mapping = _scan_shortcuts()
+    index = _get_index()
+    fresh = index.empty
+    if fresh:
+        index.refresh()  # primera vez: no hay nada que enseñar todavía
+    mapping = _scan_shortcuts(index)
     if not mapping:
         messagebox.showinfo("Vacío", "No se encontraron accesos .lnk en el Menú Inicio.")
         return
@@ -59,6 +205,19 @@ def create_shortcuts() -> None:
     search_entry.grid(row=0, column=1, columnspan=3, sticky="ew", pady=(0, 10))
     frm.columnconfigure(1, weight=1)
 
+    # Filtro por aplicación (carpeta del destino bajo Program Files…)
+    app_var = tk.StringVar(value=_ALL_APPS)
+    app_cb = ttk.Combobox(frm, textvariable=app_var, state="readonly", width=22)
+    app_cb.grid(row=0, column=4, sticky="e", padx=(10, 0), pady=(0, 10))
+
+    def refresh_apps():
+        groups = sorted({it.group for it in mapping.values() if it.group}, key=str.lower)
+        app_cb["values"] = [_ALL_APPS] + groups
+        if app_var.get() not in app_cb["values"]:
+            app_var.set(_ALL_APPS)
+
+    refresh_apps()
+
     # Paneles disponibles / seleccionados
     ttk.Label(frm, text="Disponibles").grid(row=1, column=0, padx=(0,5))
     ttk.Label(frm, text="Seleccionados").grid(row=1, column=2, padx=(15,0))
@@ -77,25 +236,72 @@ def create_shortcuts() -> None:
     lb_sel.grid(row=2, column=2, sticky="nsew", padx=(15,0))
     sb_s.grid(row=2, column=3, sticky="ns")
 
-    all_names = list(mapping.keys())
+    # Búsqueda aproximada (sin acentos, varias palabras, tolera erratas)
+    # con un índice que se construye una vez; al teclear se espera una
+    # pausa corta y la lista se actualiza con un diff, no entera.
+    search = SearchIndex(mapping.keys())
+    shown: list[str] = []
+    pending_search: str | None = None
+
     def update_available(*_):
-        query = search_var.get().lower()
-        lb_avail.delete(0, "end")
-        for name in all_names:
-            if query in name.lower():
-                lb_avail.insert("end", name)
-    search_var.trace_add("write", update_available)
+        nonlocal pending_search
+        pending_search = None
+        chosen = set(lb_sel.get(0, "end"))
+        app = app_var.get()
+        _sync_listbox(lb_avail, shown,
+                      [n for n in search.search(search_var.get()) if n not in chosen
+                       and (app == _ALL_APPS or mapping[n].group == app)])
+
+    def schedule_search(*_):
+        nonlocal pending_search
+        if pending_search is not None:
+            root.after_cancel(pending_search)
+        pending_search = root.after(80, update_available)
+
+    search_var.trace_add("write", schedule_search)
+    app_cb.bind("<<ComboboxSelected>>", update_available)
 
     update_available()  # inicial poblado
 
+    # Refresco del índice en segundo plano con la lista ya en pantalla
+    index_updates: queue.Queue = queue.Queue()
+
+    def poll_index():
+        nonlocal search
+        if not root.winfo_exists():
+            return
+        try:
+            changed = index_updates.get_nowait()
+        except queue.Empty:
+            root.after(200, poll_index)
+            return
+        if changed:
+            mapping.clear()
+            mapping.update(_scan_shortcuts(index))
+            search = SearchIndex(mapping.keys())
+            refresh_apps()
+            for i in reversed(range(lb_sel.size())):
+                if lb_sel.get(i) not in mapping:
+                    lb_sel.delete(i)
+            update_available()
+
+    if not fresh:
+        index.refresh_async(index_updates.put)
+        root.after(200, poll_index)
+
     # Botones de mover
+    # Disponibles es siempre la búsqueda menos lo ya seleccionado
     def _move(src: tk.Listbox, dst: tk.Listbox):
         sel = list(src.curselection())
-        for i in reversed(sel):
-            item = src.get(i)
-            if item not in dst.get(0, "end"):
-                dst.insert("end", item)
-            src.delete(i)
+        if dst is lb_sel:
+            current = set(lb_sel.get(0, "end"))
+            for i in sel:
+                if src.get(i) not in current:
+                    lb_sel.insert("end", src.get(i))
+        else:
+            for i in reversed(sel):
+                lb_sel.delete(i)
+        update_available()
 
     btns = ttk.Frame(frm)
     btns.grid(row=2, column=4, padx=(10,0))
@@ -130,9 +336,10 @@ def create_shortcuts() -> None:
             return
 
         errors = []
+        used: set[str] = set()
         for name in selected:
-            src = mapping[name]
-            dst = os.path.join(dest, os.path.basename(src))
+            src = mapping[name].shortcut.path
+            dst = os.path.join(dest, _copy_name(mapping[name], used))
             try:
                 shutil.copy2(src, dst)
                 logger.info("Copiado: %s → %s", src, dst)
@@ -150,9 +357,17 @@ def create_shortcuts() -> None:
                 pass
             root.destroy()
 
+    def do_deploy():
+        selected = list(lb_sel.get(0, "end"))
+        if not selected:
+            messagebox.showwarning("Nada seleccionado", "Marca al menos un acceso.", parent=root)
+            return
+        _deploy_dialog(root, [mapping[name].shortcut.path for name in selected])
+
     bottom = ttk.Frame(frm)
     bottom.grid(row=5, column=0, columnspan=5, pady=(0,5))
     ttk.Button(bottom, text="Crear accesos", command=do_create).pack(side="left", padx=5)
+    ttk.Button(bottom, text="Desplegar en perfiles…", command=do_deploy).pack(side="left", padx=5)
     ttk.Button(bottom, text="Cancelar",       command=root.destroy).pack(side="left")
 
     root.mainloop()
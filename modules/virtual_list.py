@@ -0,0 +1,292 @@
+# modules/virtual_list.py
+
+from __future__ import annotations
+import tkinter as tk
+from tkinter import ttk
+from tkinter import font as tkfont
+from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+# (clave, título, ancho px, alineación "w"|"e"|"center"); ancho 0 = se estira
+Column = Tuple[str, str, int, str]
+
+
+class VirtualList(ttk.Frame):
+    """
+    Lista con columnas que solo dibuja las filas visibles (Canvas con un
+    grupo fijo de elementos que se reutilizan), así que 50 000 filas
+    cuestan lo mismo que 50. Las filas son claves de texto; el contenido
+    de cada celda se pide a values(clave) al dibujar.
+
+    Selección: clic, Ctrl+clic, Mayús+clic, Ctrl+A, flechas.
+    on_double(clave) en doble clic / Enter; on_sort(columna) al pulsar una
+    cabecera.
+    """
+
+    def __init__(
+        self,
+        master: tk.Misc,
+        columns: Sequence[Column],
+        values: Callable[[str], Sequence[str]],
+        on_double: Optional[Callable[[str], None]] = None,
+        on_sort: Optional[Callable[[str], None]] = None,
+        on_select: Optional[Callable[[], None]] = None,
+        height: int = 12,
+    ):
+        super().__init__(master)
+        self.columns = list(columns)
+        self.values = values
+        self.on_double = on_double
+        self.on_sort = on_sort
+        self.on_select = on_select
+
+        self._font = tkfont.nametofont("TkDefaultFont")
+        self.row_h = self._font.metrics("linespace") + 6
+        self._char_w = max(1, self._font.measure("0"))
+        self.rows: List[str] = []
+        self._pos: Dict[str, int] = {}
+        self.selection: Set[str] = set()
+        self._anchor: Optional[int] = None
+        self._cursor: Optional[int] = None
+        self._top = 0                     # desplazamiento en píxeles
+        self._pool: List[Tuple[int, List[int]]] = []   # (rect, [textos])
+        self._sort_mark: Tuple[str, bool] = ("", False)
+
+        bg = "#ffffff"
+        self._sel_bg = "#cce4f7"
+        self._bg = bg
+        self.header = tk.Canvas(self, height=self.row_h, highlightthickness=0, bg="#f0f0f0")
+        self.canvas = tk.Canvas(self, height=height * self.row_h, highlightthickness=1,
+                                highlightbackground="#c0c0c0", bg=bg, takefocus=1)
+        self.sb = ttk.Scrollbar(self, orient="vertical", command=self._yview)
+        self.header.grid(row=0, column=0, sticky="ew")
+        self.canvas.grid(row=1, column=0, sticky="nsew")
+        self.sb.grid(row=1, column=1, sticky="ns")
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(1, weight=1)
+
+        self.canvas.bind("<Configure>", lambda e: self._relayout())
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Shift-Button-1>", lambda e: self._on_click(e, shift=True))
+        self.canvas.bind("<Control-Button-1>", lambda e: self._on_click(e, ctrl=True))
+        self.canvas.bind("<Double-Button-1>", self._on_double)
+        self.canvas.bind("<MouseWheel>", lambda e: self._scroll_px(-e.delta // 120 * 3 * self.row_h))
+        self.canvas.bind("<Button-4>", lambda e: self._scroll_px(-3 * self.row_h))
+        self.canvas.bind("<Button-5>", lambda e: self._scroll_px(3 * self.row_h))
+        self.canvas.bind("<Control-a>", lambda e: (self.select_all(), "break")[1])
+        self.canvas.bind("<Up>", lambda e: self._move_cursor(-1, e))
+        self.canvas.bind("<Down>", lambda e: self._move_cursor(1, e))
+        self.canvas.bind("<Shift-Up>", lambda e: self._move_cursor(-1, e, shift=True))
+        self.canvas.bind("<Shift-Down>", lambda e: self._move_cursor(1, e, shift=True))
+        self.canvas.bind("<Prior>", lambda e: self._scroll_px(-self.canvas.winfo_height()))
+        self.canvas.bind("<Next>", lambda e: self._scroll_px(self.canvas.winfo_height()))
+        self.canvas.bind("<Return>", self._on_return)
+        self.header.bind("<Button-1>", self._on_header)
+
+    # ——— Datos ———
+    def set_rows(self, rows: Sequence[str], keep_selection: bool = True) -> None:
+        """Sustituye las filas (ya filtradas y ordenadas)."""
+        self.rows = list(rows)
+        self._pos = {r: i for i, r in enumerate(self.rows)}
+        if keep_selection:
+            self.selection.intersection_update(self._pos)
+        else:
+            self.selection.clear()
+        self._anchor = self._cursor = None
+        self._top = min(self._top, self._max_top())
+        self.redraw()
+
+    def selected_rows(self) -> List[str]:
+        """Filas seleccionadas en el orden en que se muestran."""
+        return sorted(self.selection, key=self._pos.__getitem__)
+
+    def select_all(self) -> None:
+        self.selection = set(self.rows)
+        self.redraw()
+        self._notify()
+
+    def clear_selection(self) -> None:
+        self.selection.clear()
+        self.redraw()
+        self._notify()
+
+    def set_sort_mark(self, column: str, reverse: bool) -> None:
+        self._sort_mark = (column, reverse)
+        self._draw_header()
+
+    # ——— Geometría ———
+    def _widths(self) -> List[int]:
+        total = max(1, self.canvas.winfo_width())
+        fixed = sum(w for _, _, w, _ in self.columns if w)
+        flex = [c for c in self.columns if not c[2]]
+        spare = max(60, total - fixed) // max(1, len(flex))
+        return [w or spare for _, _, w, _ in self.columns]
+
+    def _max_top(self) -> int:
+        return max(0, len(self.rows) * self.row_h - self.canvas.winfo_height())
+
+    def _relayout(self) -> None:
+        self._pool_fit()
+        self._draw_header()
+        self.redraw()
+
+    def _pool_fit(self) -> None:
+        """Crea los elementos justos para llenar la altura visible."""
+        need = self.canvas.winfo_height() // self.row_h + 2
+        while len(self._pool) < need:
+            rect = self.canvas.create_rectangle(0, 0, 0, 0, width=0, fill=self._bg)
+            texts = [self.canvas.create_text(0, 0, anchor="w", font=self._font)
+                     for _ in self.columns]
+            self._pool.append((rect, texts))
+
+    # ——— Dibujo ———
+    def _draw_header(self) -> None:
+        h = self.header
+        h.delete("all")
+        x = 0
+        col_mark, rev = self._sort_mark
+        for (key, title, _, anchor), w in zip(self.columns, self._widths()):
+            h.create_rectangle(x, 0, x + w, self.row_h, outline="#c0c0c0", fill="#f0f0f0")
+            label = title + ((" ▼" if rev else " ▲") if key == col_mark else "")
+            tx, ta = self._text_pos(x, w, anchor)
+            h.create_text(tx, self.row_h // 2, text=label, anchor=ta, font=self._font)
+            x += w
+
+    @staticmethod
+    def _text_pos(x: int, w: int, anchor: str) -> Tuple[int, str]:
+        if anchor == "e":
+            return x + w - 6, "e"
+        if anchor == "center":
+            return x + w // 2, "center"
+        return x + 6, "w"
+
+    def _fit(self, text: str, width: int) -> str:
+        """Recorta con "…" lo que no cabe en la columna (aproximado)."""
+        room = max(1, (width - 12) // self._char_w)
+        return text if len(text) <= room else text[:max(1, room - 1)] + "…"
+
+    def redraw(self) -> None:
+        if not self._pool:
+            self._pool_fit()
+        width = self.canvas.winfo_width()
+        widths = self._widths()
+        first = self._top // self.row_h
+        offset = -(self._top % self.row_h)
+        for slot, (rect, texts) in enumerate(self._pool):
+            idx = first + slot
+            y = offset + slot * self.row_h
+            if idx >= len(self.rows):
+                self.canvas.itemconfigure(rect, state="hidden")
+                for t in texts:
+                    self.canvas.itemconfigure(t, state="hidden")
+                continue
+            key = self.rows[idx]
+            fill = self._sel_bg if key in self.selection else self._bg
+            self.canvas.coords(rect, 0, y, width, y + self.row_h)
+            self.canvas.itemconfigure(rect, state="normal", fill=fill,
+                                      outline="#3c7fb1" if idx == self._cursor else "")
+            vals = self.values(key)
+            x = 0
+            for t, (_, _, _, anchor), w, val in zip(texts, self.columns, widths, vals):
+                tx, ta = self._text_pos(x, w, anchor)
+                self.canvas.coords(t, tx, y + self.row_h // 2)
+                self.canvas.itemconfigure(t, state="normal", text=self._fit(val, w), anchor=ta)
+                x += w
+        total = max(1, len(self.rows) * self.row_h)
+        h = max(1, self.canvas.winfo_height())
+        self.sb.set(self._top / total, min(1.0, (self._top + h) / total))
+
+    # ——— Desplazamiento ———
+    def _yview(self, *args) -> None:
+        total = len(self.rows) * self.row_h
+        if args[0] == "moveto":
+            self._top = int(float(args[1]) * total)
+        elif args[0] == "scroll":
+            n, what = int(args[1]), args[2]
+            step = self.canvas.winfo_height() if what == "pages" else self.row_h
+            self._top += n * step
+        self._top = max(0, min(self._top, self._max_top()))
+        self.redraw()
+
+    def _scroll_px(self, delta: int) -> str:
+        self._top = max(0, min(self._top + delta, self._max_top()))
+        self.redraw()
+        return "break"
+
+    def see(self, idx: int) -> None:
+        y = idx * self.row_h
+        h = self.canvas.winfo_height()
+        if y < self._top:
+            self._top = y
+        elif y + self.row_h > self._top + h:
+            self._top = y + self.row_h - h
+        self._top = max(0, min(self._top, self._max_top()))
+
+    # ——— Eventos ———
+    def _row_at(self, y: int) -> Optional[int]:
+        idx = (self._top + y) // self.row_h
+        return idx if 0 <= idx < len(self.rows) else None
+
+    def _on_click(self, event, shift: bool = False, ctrl: bool = False) -> str:
+        self.canvas.focus_set()
+        idx = self._row_at(event.y)
+        if idx is None:
+            if not (shift or ctrl):
+                self.clear_selection()
+            return "break"
+        key = self.rows[idx]
+        if shift and self._anchor is not None:
+            lo, hi = sorted((self._anchor, idx))
+            if not ctrl:
+                self.selection.clear()
+            self.selection.update(self.rows[lo:hi + 1])
+        elif ctrl:
+            self.selection ^= {key}
+            self._anchor = idx
+        else:
+            self.selection = {key}
+            self._anchor = idx
+        self._cursor = idx
+        self.redraw()
+        self._notify()
+        return "break"
+
+    def _move_cursor(self, step: int, event, shift: bool = False) -> str:
+        if not self.rows:
+            return "break"
+        cur = self._cursor if self._cursor is not None else -1 if step > 0 else len(self.rows)
+        idx = max(0, min(len(self.rows) - 1, cur + step))
+        if shift and self._anchor is not None:
+            lo, hi = sorted((self._anchor, idx))
+            self.selection = set(self.rows[lo:hi + 1])
+        else:
+            self.selection = {self.rows[idx]}
+            self._anchor = idx
+        self._cursor = idx
+        self.see(idx)
+        self.redraw()
+        self._notify()
+        return "break"
+
+    def _on_double(self, event) -> str:
+        idx = self._row_at(event.y)
+        if idx is not None and self.on_double:
+            self.on_double(self.rows[idx])
+        return "break"
+
+    def _on_return(self, event) -> str:
+        if self.on_double and self._cursor is not None and self._cursor < len(self.rows):
+            self.on_double(self.rows[self._cursor])
+        return "break"
+
+    def _on_header(self, event) -> None:
+        x = 0
+        for (key, *_), w in zip(self.columns, self._widths()):
+            if x <= event.x < x + w:
+                if self.on_sort:
+                    self.on_sort(key)
+                return
+            x += w
+
+    def _notify(self) -> None:
+        if self.on_select:
+            self.on_select()
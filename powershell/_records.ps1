@@ -0,0 +1,19 @@
+﻿<#
+.SYNOPSIS
+    Canal ##RECORD de LabTool: definición única de Write-Record.
+
+.DESCRIPTION
+    Se carga con dot-sourcing desde los scripts que emiten registros:
+        . (Join-Path $PSScriptRoot '_records.ps1')
+    Cada registro sale como una línea "##RECORD {json}" (JSON compacto).
+    Los caracteres no ASCII se escapan (\uXXXX) para que el JSON llegue
+    intacto sea cual sea la página de códigos de la consola.
+#>
+
+function Write-Record($Data) {
+    $json = $Data | ConvertTo-Json -Compress -Depth 4
+    $json = [regex]::Replace($json, '[^\x00-\x7F]', {
+        param($m) '\u{0:x4}' -f [int][char]$m.Value
+    })
+    Write-Output "##RECORD $json"
+}
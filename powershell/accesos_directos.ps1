@@ -1,6 +1,6 @@
 ﻿<#
 .SYNOPSIS
-  Copia archivos .lnk al Escritorio de un usuario o al Público.
+  Copia archivos .lnk al Escritorio de uno o varios usuarios o al Público.
 
 .PARAMETER Public
   Si está presente, copia en el Escritorio Público.
@@ -8,8 +8,18 @@
 .PARAMETER User
   Nombre de usuario local (sin dominio). Copia en C:\Users\<User>\Desktop.
 
+.PARAMETER Users
+  Varios usuarios separados por comas (alumno01,alumno02…).
+
+.PARAMETER AllProfiles
+  Todos los perfiles de C:\Users con Escritorio (sin Public ni Default).
+
+  Con varios destinos, los .lnk que ya son idénticos (mismo tamaño y
+  fecha) no se vuelven a copiar y se emite un ##RECORD por perfil.
+
 .PARAMETER WhatIf
-  Simula la acción.
+  Simula la acción: no copia nada y el ##RECORD de cada perfil cuenta lo
+  que se habría copiado en "simulated" (con "copied" a 0).
 
 .PARAMETER Programs
   Rutas completas a archivos .lnk (capturados con ValueFromRemainingArguments).
@@ -19,28 +29,52 @@
 param(
     [switch] $Public,
     [string] $User,
+    [string] $Users,
+    [switch] $AllProfiles,
     [switch] $WhatIf,
 
     [Parameter(ValueFromRemainingArguments=$true)]
     [string[]] $Programs
 )
 
-# Determinar carpeta destino
+# Determinar carpetas destino: @{ perfil = escritorio }
+$usersRoot = Join-Path $Env:SystemDrive "Users"
+$targets = [ordered]@{}
 if ($Public) {
-    $dest = [Environment]::GetFolderPath("CommonDesktopDirectory")
+    $targets["Public"] = [Environment]::GetFolderPath("CommonDesktopDirectory")
 }
-elseif ($User) {
-    $dest = Join-Path $Env:SystemDrive "Users\$User\Desktop"
+if ($User) {
+    $targets[$User] = Join-Path $usersRoot "$User\Desktop"
 }
-else {
-    Write-Error "Debes indicar -Public o -User <nombre>."
+if ($Users) {
+    foreach ($u in ($Users -split ',') | ForEach-Object { $_.Trim() } | Where-Object { $_ }) {
+        $targets[$u] = Join-Path $usersRoot "$u\Desktop"
+    }
+}
+if ($AllProfiles) {
+    $skip = 'Public', 'Default', 'Default User', 'All Users'
+    Get-ChildItem -LiteralPath $usersRoot -Directory -Force -ErrorAction SilentlyContinue |
+        Where-Object { $skip -notcontains $_.Name -and -not $_.Name.StartsWith('.') -and
+                       (Test-Path -LiteralPath (Join-Path $_.FullName 'Desktop')) } |
+        ForEach-Object { $targets[$_.Name] = Join-Path $_.FullName 'Desktop' }
+}
+if ($targets.Count -eq 0) {
+    Write-Error "Debes indicar -Public, -User <nombre>, -Users <a,b> o -AllProfiles."
     exit 1
 }
 
-Write-Host "Destino: $dest"
-if (-not (Test-Path $dest)) {
-    Write-Error "No existe carpeta destino: $dest"
-    exit 1
+$single = $targets.Count -eq 1
+foreach ($name in @($targets.Keys)) {
+    $dest = $targets[$name]
+    Write-Host "Destino: $dest"
+    if (-not (Test-Path $dest)) {
+        if ($single) {
+            Write-Error "No existe carpeta destino: $dest"
+            exit 1
+        }
+        Write-Warning "No existe carpeta destino: $dest (se omite)"
+        $targets.Remove($name)
+    }
 }
 
 if (-not $Programs) {
@@ -48,6 +82,9 @@ if (-not $Programs) {
     exit 1
 }
 
+# Registro NDJSON para LabTool (canal ##RECORD)
+. (Join-Path $PSScriptRoot '_records.ps1')
+
 function Invoke-Act {
     param($ScriptBlock, $Desc)
     Write-Host "→ $Desc"
@@ -58,17 +95,47 @@ function Invoke-Act {
     }
 }
 
-foreach ($lnk in $Programs) {
+$sources = foreach ($lnk in $Programs) {
     if (-not (Test-Path $lnk)) {
         Write-Warning "No existe: $lnk"
+        Write-Record ([ordered]@{ type = 'shortcut'; source = $lnk; copied = $false; error = 'missing' })
         continue
     }
-    $file = Split-Path $lnk -Leaf
-    $target = Join-Path $dest $file
-    Invoke-Act -ScriptBlock {
-        Copy-Item -Path $lnk -Destination $target -Force
-    } -Desc "Copiar '$file' → '$dest'"
+    Get-Item -LiteralPath $lnk
+}
+
+foreach ($name in $targets.Keys) {
+    $dest = $targets[$name]
+    $copied = 0; $simulated = 0; $same = 0; $failed = 0
+    foreach ($src in $sources) {
+        $target = Join-Path $dest $src.Name
+        if (-not $single) {
+            $existing = Get-Item -LiteralPath $target -Force -ErrorAction SilentlyContinue
+            if ($existing -and $existing.Length -eq $src.Length -and
+                $existing.LastWriteTimeUtc -eq $src.LastWriteTimeUtc) {
+                $same++
+                continue
+            }
+        }
+        try {
+            Invoke-Act -ScriptBlock {
+                Copy-Item -LiteralPath $src.FullName -Destination $target -Force -ErrorAction Stop
+            } -Desc "Copiar '$($src.Name)' → '$dest'"
+            if ($WhatIf) { $simulated++ } else { $copied++ }
+            if ($single) {
+                Write-Record ([ordered]@{ type = 'shortcut'; source = $src.FullName; target = $target; copied = (-not $WhatIf) })
+            }
+        }
+        catch {
+            $failed++
+            Write-Warning "✖ $($src.Name) → $dest : $_"
+        }
+    }
+    if (-not $single) {
+        Write-Record ([ordered]@{ type = 'profile'; user = $name; desktop = $dest; copied = $copied; simulated = $simulated; skipped = $same; errors = $failed })
+    }
 }
 
-Write-Host "✅ Accesos copiados."
+if ($WhatIf) { Write-Host "✅ Simulación terminada: no se copió nada." }
+else        { Write-Host "✅ Accesos copiados." }
 exit 0
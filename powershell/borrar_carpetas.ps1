@@ -30,6 +30,9 @@ param (
 
 $ErrorActionPreference = "Stop"
 
+# Registro NDJSON para LabTool (canal ##RECORD)
+. (Join-Path $PSScriptRoot '_records.ps1')
+
 try {
     # 1) Carpeta raíz: parámetro o prompt
     if (-not $Root) {
@@ -92,9 +95,11 @@ try {
         try {
             Remove-Item -LiteralPath $path -Recurse -Force
             Write-Host "🗑️ Borrada: $path"
+            Write-Record ([ordered]@{ type = 'folder'; path = $path; deleted = $true })
         }
         catch {
             Write-Warning "❌ Error borrando '$path': $_"
+            Write-Record ([ordered]@{ type = 'folder'; path = $path; deleted = $false; error = "$_" })
         }
     }
 
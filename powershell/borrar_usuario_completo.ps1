@@ -10,6 +10,10 @@
       3. Descarga hives colgados en HKU.
       4. Borra la carpeta de perfil en  C:\Users\<Usuario>  (si existe).
 
+    Cada paso emite una línea "##PROGRESS n/4 texto" que LabTool usa
+    para mostrar el avance en tiempo real, y el borrado del perfil un
+    registro "##RECORD {json}" con el resultado.
+
 .PARAMETER Username
     Nombre exacto de la cuenta local a eliminar.
 
@@ -18,6 +22,16 @@
 
 .PARAMETER Force
     Permite llamar al script con `-Force` desde Python sin error.
+
+.PARAMETER TombstoneDir
+    Si se indica, la carpeta de perfil no se borra: se renombra (operación
+    atómica en el mismo volumen) dentro de esta carpeta oculta y LabTool
+    la elimina después en segundo plano. Si el renombrado falla se borra
+    como siempre.
+
+.PARAMETER RequireTombstone
+    Con -TombstoneDir: si el perfil no se puede apartar, se deja donde está
+    en lugar de borrarlo (LabTool lo usa cuando hay que archivarlo antes).
 #>
 
 param (
@@ -27,7 +41,11 @@ param (
 
     [switch]$WhatIf,
 
-    [switch]$Force
+    [switch]$Force,
+
+    [string]$TombstoneDir,
+
+    [switch]$RequireTombstone
 )
 
 # ─────── Comprobación de administrador ───────
@@ -45,6 +63,9 @@ if (-not $Username) {
 
 Write-Host "`n*** Eliminación completa de '$Username' ***`n"
 
+# Registro NDJSON para LabTool (canal ##RECORD)
+. (Join-Path $PSScriptRoot '_records.ps1')
+
 # WhatIf helper
 function Invoke-Action($ScriptBlock, $Description) {
     if ($WhatIf) { 
@@ -56,6 +77,7 @@ function Invoke-Action($ScriptBlock, $Description) {
 }
 
 # 1) Cerrar sesiones activas del usuario
+Write-Host "##PROGRESS 1/4 Cerrando sesiones"
 Invoke-Action {
     Write-Host "🔒 Cerrando sesiones activas..."
     $sessions = query session 2>$null
@@ -75,6 +97,7 @@ Invoke-Action {
 } "Cerrar sesiones del usuario"
 
 # 2) Eliminar la cuenta local
+Write-Host "##PROGRESS 2/4 Eliminando cuenta"
 Invoke-Action {
     Write-Host "`n🗑️ Eliminando cuenta '$Username'..."
     try {
@@ -85,6 +108,7 @@ Invoke-Action {
 } "Eliminar cuenta local"
 
 # 3) Descargar hives montados
+Write-Host "##PROGRESS 3/4 Descargando hives"
 Invoke-Action {
     Write-Host "`n⚙️ Descargando hives huérfanos en HKU..."
     $hives = reg query "HKU" 2>$null | Where-Object { $_ -match 'S-1-5-21' }
@@ -100,14 +124,49 @@ Invoke-Action {
 
 # 4) Borrar carpeta de perfil
 $profilePath = Join-Path $Env:SystemDrive "Users\$Username"
+Write-Host "##PROGRESS 4/4 Borrando perfil"
 Invoke-Action {
-    if (Test-Path $profilePath) {
+    $moved = $false
+    if ((Test-Path $profilePath) -and $TombstoneDir) {
+        try {
+            if (-not (Test-Path -LiteralPath $TombstoneDir)) {
+                $dir = New-Item -ItemType Directory -Path $TombstoneDir -Force
+                $dir.Attributes = $dir.Attributes -bor [IO.FileAttributes]::Hidden
+            }
+            $stamp = Get-Date -Format 'yyyyMMdd-HHmmss'
+            $tomb  = Join-Path $TombstoneDir "$Username.$stamp"
+            [IO.Directory]::Move($profilePath, $tomb)
+            $moved = $true
+            Write-Host "`n🪦 Perfil apartado para borrado diferido: $tomb"
+            Write-Record ([ordered]@{ type = 'profile'; path = $profilePath; deleted = $true; tombstone = $tomb })
+        }
+        catch {
+            if ($RequireTombstone) {
+                Write-Warning "✖ No se pudo apartar el perfil ($_); se conserva sin borrar."
+                Write-Record ([ordered]@{ type = 'profile'; path = $profilePath; deleted = $false; error = "$_" })
+            }
+            else {
+                Write-Warning "✖ No se pudo apartar el perfil ($_); se borra ahora."
+            }
+        }
+    }
+    if ($moved) {
+        Write-Host "✔ Carpeta de perfil liberada."
+    }
+    elseif ($RequireTombstone -and $TombstoneDir -and (Test-Path $profilePath)) {
+        Write-Host "ℹ️ Perfil conservado en $profilePath."
+    }
+    elseif (Test-Path $profilePath) {
         Write-Host "`n🗑️ Borrando carpeta de perfil: $profilePath"
         try {
             Remove-Item -LiteralPath $profilePath -Recurse -Force
             Write-Host "✔ Carpeta de perfil borrada."
+            Write-Record ([ordered]@{ type = 'profile'; path = $profilePath; deleted = $true })
+        }
+        catch {
+            Write-Warning "✖ Error borrando carpeta → $_"
+            Write-Record ([ordered]@{ type = 'profile'; path = $profilePath; deleted = $false; error = "$_" })
         }
-        catch { Write-Warning "✖ Error borrando carpeta → $_" }
     }
     else {
         Write-Host "ℹ️ Carpeta de perfil no encontrada."
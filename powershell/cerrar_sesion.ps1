@@ -10,12 +10,18 @@
       4. Ejecuta LOGOFF en cada SessionID encontrado (o muestra la acción con -WhatIf).
       5. Informa el total de sesiones cerradas (o que se cerrarían).
 
+    Con -Disable la cuenta se deshabilita antes de cerrar las sesiones,
+    para que nadie vuelva a entrar mientras se reemplaza.
+
 .PARAMETER Username
     Nombre exacto de la cuenta local / de dominio a cerrar.
 
 .PARAMETER WhatIf
     Simula la operación: solo muestra qué se haría, no cierra nada.
 
+.PARAMETER Disable
+    Deshabilita la cuenta local antes de cerrar sus sesiones.
+
 .EXAMPLE
     .\cerrar_sesion.ps1 -Username alumno2025
 
@@ -27,7 +33,9 @@
 param (
     [Parameter(Mandatory = $true)]
     [ValidateNotNullOrEmpty()]
-    [string]$Username
+    [string]$Username,
+
+    [switch]$Disable
 )
 
 # ─── Verificar que corremos como administrador ───
@@ -37,6 +45,18 @@ if (-not ([Security.Principal.WindowsPrincipal][Security.Principal.WindowsIdenti
     exit 1
 }
 
+# ─── Deshabilitar la cuenta (opcional) ──────────
+if ($Disable -and $PSCmdlet.ShouldProcess($Username, "Deshabilitar cuenta")) {
+    try {
+        Disable-LocalUser -Name $Username -ErrorAction Stop
+        Write-Host "✔ Cuenta '$Username' deshabilitada." -ForegroundColor Green
+    }
+    catch {
+        Write-Error "❌ No se pudo deshabilitar '$Username'. $_"
+        exit 1
+    }
+}
+
 # ─── Obtener sesiones ───────────────────────────
 try {
     $sessions = & query session 2>$null
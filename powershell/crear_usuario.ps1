@@ -12,6 +12,10 @@
 
 .PARAMETER NeverExpire
   Si se pasa, marca la contraseña como “never expires”.
+
+.NOTES
+  Si algo falla después de crear la cuenta, se quita para no dejarla a
+  medias. Código de salida 2: falló y la cuenta a medio crear sigue ahí.
 #>
 
 [CmdletBinding()]
@@ -21,10 +25,12 @@ param(
     [Parameter(Mandatory=$false)] [switch] $NeverExpire
 )
 
+$created = $false
 try {
     # Crear usuario con o sin contraseña
     if ($NoPassword.IsPresent) {
         New-LocalUser -Name $Username -NoPassword -ErrorAction Stop
+        $created = $true
     }
     else {
         throw "Debe indicarse -NoPassword para crear sin contraseña"
@@ -50,6 +56,18 @@ try {
     exit 0
 }
 catch {
-    Write-Error $_.Exception.Message
+    $msg = $_.Exception.Message
+    if ($created) {
+        try {
+            Remove-LocalUser -Name $Username -ErrorAction Stop
+            Write-Error "$msg (se quitó la cuenta a medio crear)"
+            exit 1
+        }
+        catch {
+            Write-Error "$msg; no se pudo quitar la cuenta a medio crear: $($_.Exception.Message)"
+            exit 2
+        }
+    }
+    Write-Error $msg
     exit 1
 }
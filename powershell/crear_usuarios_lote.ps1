@@ -0,0 +1,75 @@
+﻿<#
+.SYNOPSIS
+    Crea varias cuentas locales de una sola pasada.
+
+.DESCRIPTION
+    Lee los nombres (uno por línea) de -NamesFile y, para cada uno:
+    crea la cuenta sin contraseña, la habilita, la añade al grupo
+    Users/Usuarios y, si se indica, marca "nunca expira".
+    El nombre real del grupo se resuelve una sola vez por SID
+    (S-1-5-32-545) para todo el lote.
+
+    Por cada cuenta emite "##PROGRESS n/total nombre" y un registro
+    "##RECORD {json}" con type = 'user', name, ok y error (o null).
+    Termina con código 0 si todas se crearon y 1 si alguna falló.
+
+.PARAMETER NamesFile
+    Archivo de texto UTF-8 con un nombre de cuenta por línea.
+
+.PARAMETER NoPassword
+    Crea las cuentas sin contraseña (obligatorio, igual que crear_usuario.ps1).
+
+.PARAMETER NeverExpire
+    Marca la contraseña como "never expires".
+#>
+
+[CmdletBinding()]
+param(
+    [Parameter(Mandatory=$true)] [string] $NamesFile,
+    [switch] $NoPassword,
+    [switch] $NeverExpire
+)
+
+. (Join-Path $PSScriptRoot '_records.ps1')
+
+if (-not $NoPassword.IsPresent) {
+    Write-Error "Debe indicarse -NoPassword para crear sin contraseña"
+    exit 1
+}
+
+try {
+    $names = @(Get-Content -LiteralPath $NamesFile -Encoding UTF8 -ErrorAction Stop |
+               ForEach-Object { $_.Trim() } | Where-Object { $_ })
+    # Detectar una sola vez el nombre real del grupo Users/Usuarios
+    $sid   = New-Object System.Security.Principal.SecurityIdentifier 'S-1-5-32-545'
+    $group = $sid.Translate([System.Security.Principal.NTAccount]).Value.Split('\')[-1]
+}
+catch {
+    Write-Error $_.Exception.Message
+    exit 1
+}
+
+$total  = $names.Count
+$failed = 0
+$i = 0
+foreach ($name in $names) {
+    $i++
+    Write-Output "##PROGRESS $i/$total $name"
+    try {
+        New-LocalUser -Name $name -NoPassword -ErrorAction Stop | Out-Null
+        Enable-LocalUser -Name $name -ErrorAction Stop
+        Add-LocalGroupMember -Group $group -Member $name -ErrorAction Stop
+        if ($NeverExpire.IsPresent) {
+            Set-LocalUser -Name $name -PasswordNeverExpires $true -ErrorAction Stop
+        }
+        Write-Record ([ordered]@{ type = 'user'; name = $name; ok = $true; error = $null })
+    }
+    catch {
+        $failed++
+        Write-Record ([ordered]@{ type = 'user'; name = $name; ok = $false; error = $_.Exception.Message })
+    }
+}
+
+Write-Output "$($total - $failed)/$total cuenta(s) creadas en el grupo '$group'."
+if ($failed) { exit 1 }
+exit 0
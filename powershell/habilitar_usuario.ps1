@@ -0,0 +1,27 @@
+﻿<#
+.SYNOPSIS
+    Vuelve a habilitar una cuenta local (deshacer de un reemplazo fallido).
+
+.PARAMETER Username
+    Nombre exacto de la cuenta local.
+
+.EXAMPLE
+    .\habilitar_usuario.ps1 -Username alumno2025
+#>
+
+[CmdletBinding()]
+param (
+    [Parameter(Mandatory = $true)]
+    [ValidateNotNullOrEmpty()]
+    [string]$Username
+)
+
+try {
+    Enable-LocalUser -Name $Username -ErrorAction Stop
+    Write-Output "✔ Cuenta '$Username' habilitada de nuevo."
+    exit 0
+}
+catch {
+    Write-Error $_.Exception.Message
+    exit 1
+}
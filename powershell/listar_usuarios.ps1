@@ -0,0 +1,78 @@
+﻿<#
+.SYNOPSIS
+    Lista las cuentas locales como registros NDJSON para LabTool.
+
+.DESCRIPTION
+    Emite una línea "##RECORD {json}" por cuenta local con:
+      name, sid, enabled, last_logon (epoch UTC o null),
+      profile_path (o null) y profile_loaded
+    Los perfiles se consultan una sola vez (Win32_UserProfile) y se cruzan
+    por SID. Cada registro lleva type = 'user'.
+    Los caracteres no ASCII se escapan (\uXXXX) para que el JSON llegue
+    intacto sea cual sea la página de códigos de la consola.
+
+.PARAMETER IncludeDisabled
+    Incluye también las cuentas deshabilitadas.
+
+.PARAMETER Profiles
+    Emite además un registro type = 'profile' (sid, path, loaded) por cada
+    perfil no especial registrado, tenga o no cuenta asociada.
+#>
+
+[CmdletBinding()]
+param(
+    [switch] $IncludeDisabled,
+    [switch] $Profiles
+)
+
+. (Join-Path $PSScriptRoot '_records.ps1')
+
+try {
+    $users = Get-LocalUser -ErrorAction Stop
+}
+catch {
+    Write-Error "No se pudieron listar los usuarios locales: $_"
+    exit 1
+}
+
+$profileBySid = @{}
+try {
+    foreach ($p in Get-CimInstance -ClassName Win32_UserProfile -ErrorAction Stop) {
+        $profileBySid[$p.SID] = $p
+    }
+}
+catch {
+    Write-Warning "No se pudieron leer los perfiles: $_"
+}
+
+foreach ($u in $users) {
+    if (-not $IncludeDisabled -and -not $u.Enabled) { continue }
+    $sid  = $u.SID.Value
+    $prof = $profileBySid[$sid]
+    $lastLogon = $null
+    if ($u.LastLogon) {
+        $lastLogon = [DateTimeOffset]::new($u.LastLogon.ToUniversalTime()).ToUnixTimeSeconds()
+    }
+    Write-Record ([ordered]@{
+        type           = 'user'
+        name           = $u.Name
+        sid            = $sid
+        enabled        = [bool]$u.Enabled
+        last_logon     = $lastLogon
+        profile_path   = if ($prof) { $prof.LocalPath } else { $null }
+        profile_loaded = if ($prof) { [bool]$prof.Loaded } else { $false }
+    })
+}
+
+if ($Profiles) {
+    foreach ($p in $profileBySid.Values) {
+        if ($p.Special) { continue }
+        Write-Record ([ordered]@{
+            type   = 'profile'
+            sid    = $p.SID
+            path   = $p.LocalPath
+            loaded = [bool]$p.Loaded
+        })
+    }
+}
+exit 0
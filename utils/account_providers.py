@@ -0,0 +1,310 @@
+# utils/account_providers.py
+
+from __future__ import annotations
+import os
+import time
+import ctypes
+import logging
+from typing import Iterable, List, NamedTuple, Optional
+
+from utils.run_powershell import run_powershell_records
+
+logger = logging.getLogger(__name__)
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+PROVIDER_ENV = "LABTOOL_ACCOUNT_PROVIDER"   # auto | native | powershell
+
+
+class UserRecord(NamedTuple):
+    """Cuenta local con los datos de su perfil."""
+    name: str
+    sid: str
+    enabled: bool
+    last_logon: Optional[float]     # epoch UTC; None si nunca inició sesión
+    profile_path: Optional[str]     # C:\Users\<x> o None si no hay perfil
+    profile_loaded: bool            # hive cargado (sesión abierta)
+
+
+class ProfileRecord(NamedTuple):
+    """Perfil registrado en ProfileList (puede no tener cuenta)."""
+    sid: str
+    path: str
+    loaded: bool
+
+
+class AccountProvider:
+    """
+    Interfaz para enumerar cuentas locales y perfiles.
+    Las implementaciones deben ser de solo lectura y seguras entre hilos.
+    """
+    name = "base"
+
+    def list_users(self) -> List[UserRecord]:
+        """Todas las cuentas locales (incluidas las deshabilitadas)."""
+        raise NotImplementedError
+
+    def list_profiles(self) -> List[ProfileRecord]:
+        """Todos los perfiles de usuario no especiales."""
+        raise NotImplementedError
+
+
+# ——— PowerShell (respaldo) ———
+class PowerShellAccountProvider(AccountProvider):
+    """Usa listar_usuarios.ps1: siempre funciona, pero arranca PowerShell."""
+    name = "powershell"
+
+    def _records(self, *args: str) -> list:
+        script = os.path.abspath(
+            os.path.join(BASE_DIR, os.pardir, "powershell", "listar_usuarios.ps1")
+        )
+        records, err, code = run_powershell_records(script, "-IncludeDisabled", *args)
+        if code != 0:
+            raise RuntimeError(err or f"Exit code {code}")
+        return records
+
+    def list_users(self) -> List[UserRecord]:
+        return [
+            UserRecord(
+                name=rec["name"],
+                sid=rec.get("sid") or "",
+                enabled=bool(rec.get("enabled")),
+                last_logon=rec.get("last_logon"),
+                profile_path=rec.get("profile_path"),
+                profile_loaded=bool(rec.get("profile_loaded")),
+            )
+            for rec in self._records()
+            if rec.get("type", "user") == "user" and rec.get("name")
+        ]
+
+    def list_profiles(self) -> List[ProfileRecord]:
+        return [
+            ProfileRecord(rec.get("sid") or "", rec.get("path") or "", bool(rec.get("loaded")))
+            for rec in self._records("-Profiles")
+            if rec.get("type") == "profile" and rec.get("path")
+        ]
+
+
+# ——— Nativo (ctypes + winreg, sin procesos hijos) ———
+_PROFILE_LIST = r"SOFTWARE\Microsoft\Windows NT\CurrentVersion\ProfileList"
+_UF_ACCOUNTDISABLE = 0x0002
+_FILTER_NORMAL_ACCOUNT = 0x0002
+_MAX_PREFERRED_LENGTH = 0xFFFFFFFF
+_ERROR_MORE_DATA = 234
+_ERROR_INSUFFICIENT_BUFFER = 122
+
+
+class NativeAccountProvider(AccountProvider):
+    """
+    Llama directamente a NetUserEnum / LookupAccountNameW y lee ProfileList
+    del registro. Solo Windows; tarda milisegundos.
+    """
+    name = "native"
+
+    def __init__(self):
+        if os.name != "nt":
+            raise OSError("NativeAccountProvider solo funciona en Windows.")
+        from ctypes import wintypes
+        import winreg
+        self._winreg = winreg
+        self._netapi = ctypes.WinDLL("netapi32")
+        self._advapi = ctypes.WinDLL("advapi32", use_last_error=True)
+        self._kernel = ctypes.WinDLL("kernel32")
+
+        class USER_INFO_2(ctypes.Structure):
+            _fields_ = [
+                ("name", wintypes.LPWSTR), ("password", wintypes.LPWSTR),
+                ("password_age", wintypes.DWORD), ("priv", wintypes.DWORD),
+                ("home_dir", wintypes.LPWSTR), ("comment", wintypes.LPWSTR),
+                ("flags", wintypes.DWORD), ("script_path", wintypes.LPWSTR),
+                ("auth_flags", wintypes.DWORD), ("full_name", wintypes.LPWSTR),
+                ("usr_comment", wintypes.LPWSTR), ("parms", wintypes.LPWSTR),
+                ("workstations", wintypes.LPWSTR), ("last_logon", wintypes.DWORD),
+                ("last_logoff", wintypes.DWORD), ("acct_expires", wintypes.DWORD),
+                ("max_storage", wintypes.DWORD), ("units_per_week", wintypes.DWORD),
+                ("logon_hours", ctypes.c_void_p), ("bad_pw_count", wintypes.DWORD),
+                ("num_logons", wintypes.DWORD), ("logon_server", wintypes.LPWSTR),
+                ("country_code", wintypes.DWORD), ("code_page", wintypes.DWORD),
+            ]
+
+        self._USER_INFO_2 = USER_INFO_2
+        self._netapi.NetUserEnum.argtypes = [
+            wintypes.LPCWSTR, wintypes.DWORD, wintypes.DWORD,
+            ctypes.POINTER(ctypes.c_void_p), wintypes.DWORD,
+            ctypes.POINTER(wintypes.DWORD), ctypes.POINTER(wintypes.DWORD),
+            ctypes.POINTER(wintypes.DWORD),
+        ]
+        self._netapi.NetUserEnum.restype = wintypes.DWORD
+        self._netapi.NetApiBufferFree.argtypes = [ctypes.c_void_p]
+        self._advapi.LookupAccountNameW.argtypes = [
+            wintypes.LPCWSTR, wintypes.LPCWSTR, ctypes.c_void_p,
+            ctypes.POINTER(wintypes.DWORD), wintypes.LPWSTR,
+            ctypes.POINTER(wintypes.DWORD), ctypes.POINTER(wintypes.DWORD),
+        ]
+        self._advapi.LookupAccountNameW.restype = wintypes.BOOL
+        self._advapi.ConvertSidToStringSidW.argtypes = [
+            ctypes.c_void_p, ctypes.POINTER(wintypes.LPWSTR),
+        ]
+        self._advapi.ConvertSidToStringSidW.restype = wintypes.BOOL
+        self._kernel.LocalFree.argtypes = [ctypes.c_void_p]
+        self._wintypes = wintypes
+
+    def _enum_users(self) -> Iterable:
+        wt = self._wintypes
+        resume = wt.DWORD(0)
+        while True:
+            buf = ctypes.c_void_p()
+            read, total = wt.DWORD(0), wt.DWORD(0)
+            status = self._netapi.NetUserEnum(
+                None, 2, _FILTER_NORMAL_ACCOUNT, ctypes.byref(buf),
+                _MAX_PREFERRED_LENGTH, ctypes.byref(read), ctypes.byref(total),
+                ctypes.byref(resume),
+            )
+            if status not in (0, _ERROR_MORE_DATA):
+                raise OSError(f"NetUserEnum falló con código {status}")
+            try:
+                if buf:
+                    arr = ctypes.cast(buf, ctypes.POINTER(self._USER_INFO_2))
+                    for i in range(read.value):
+                        info = arr[i]
+                        yield info.name, info.flags, info.last_logon
+            finally:
+                if buf:
+                    self._netapi.NetApiBufferFree(buf)
+            if status != _ERROR_MORE_DATA:
+                break
+
+    def _sid_of(self, account: str) -> str:
+        wt = self._wintypes
+        sid_size, dom_size, use = wt.DWORD(0), wt.DWORD(0), wt.DWORD(0)
+        self._advapi.LookupAccountNameW(None, account, None, ctypes.byref(sid_size),
+                                        None, ctypes.byref(dom_size), ctypes.byref(use))
+        if ctypes.get_last_error() != _ERROR_INSUFFICIENT_BUFFER:
+            return ""
+        sid = ctypes.create_string_buffer(sid_size.value)
+        dom = ctypes.create_unicode_buffer(dom_size.value)
+        if not self._advapi.LookupAccountNameW(None, account, sid, ctypes.byref(sid_size),
+                                               dom, ctypes.byref(dom_size), ctypes.byref(use)):
+            return ""
+        out = wt.LPWSTR()
+        if not self._advapi.ConvertSidToStringSidW(sid, ctypes.byref(out)):
+            return ""
+        try:
+            return out.value or ""
+        finally:
+            self._kernel.LocalFree(out)
+
+    def list_profiles(self) -> List[ProfileRecord]:
+        winreg = self._winreg
+        profiles: List[ProfileRecord] = []
+        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, _PROFILE_LIST) as root:
+            i = 0
+            while True:
+                try:
+                    sid = winreg.EnumKey(root, i)
+                except OSError:
+                    break
+                i += 1
+                if not sid.startswith("S-1-5-21-"):
+                    continue  # SYSTEM, LocalService, NetworkService…
+                try:
+                    with winreg.OpenKey(root, sid) as key:
+                        path, _ = winreg.QueryValueEx(key, "ProfileImagePath")
+                except OSError:
+                    continue
+                profiles.append(ProfileRecord(sid, os.path.expandvars(path), self._hive_loaded(sid)))
+        return profiles
+
+    def _hive_loaded(self, sid: str) -> bool:
+        try:
+            self._winreg.OpenKey(self._winreg.HKEY_USERS, sid).Close()
+            return True
+        except OSError:
+            return False
+
+    def list_users(self) -> List[UserRecord]:
+        computer = os.environ.get("COMPUTERNAME", "")
+        by_sid = {p.sid: p for p in self.list_profiles()}
+        users: List[UserRecord] = []
+        for name, flags, last_logon in self._enum_users():
+            sid = self._sid_of(f"{computer}\\{name}" if computer else name)
+            prof = by_sid.get(sid)
+            users.append(UserRecord(
+                name=name,
+                sid=sid,
+                enabled=not (flags & _UF_ACCOUNTDISABLE),
+                last_logon=float(last_logon) if last_logon else None,
+                profile_path=prof.path if prof else None,
+                profile_loaded=prof.loaded if prof else False,
+            ))
+        return users
+
+
+# ——— Falso (pruebas en cualquier SO) ———
+class FakeAccountProvider(AccountProvider):
+    """Devuelve datos fijos; útil para probar la interfaz fuera de Windows."""
+    name = "fake"
+
+    def __init__(self, users: Iterable[UserRecord] = (), profiles: Iterable[ProfileRecord] = ()):
+        self.users = list(users)
+        self.profiles = list(profiles)
+        self.calls = 0
+
+    def list_users(self) -> List[UserRecord]:
+        self.calls += 1
+        return list(self.users)
+
+    def list_profiles(self) -> List[ProfileRecord]:
+        self.calls += 1
+        return list(self.profiles)
+
+
+class FallbackAccountProvider(AccountProvider):
+    """Intenta el proveedor principal y, si falla, usa el de respaldo."""
+
+    def __init__(self, primary: AccountProvider, fallback: AccountProvider):
+        self.primary = primary
+        self.fallback = fallback
+        self.name = f"{primary.name}+{fallback.name}"
+
+    def _call(self, method: str):
+        try:
+            return getattr(self.primary, method)()
+        except Exception:
+            logger.exception("Proveedor %s falló en %s; se usa %s",
+                             self.primary.name, method, self.fallback.name)
+            return getattr(self.fallback, method)()
+
+    def list_users(self) -> List[UserRecord]:
+        return self._call("list_users")
+
+    def list_profiles(self) -> List[ProfileRecord]:
+        return self._call("list_profiles")
+
+
+def default_provider() -> AccountProvider:
+    """
+    Elige proveedor según LABTOOL_ACCOUNT_PROVIDER: "native", "powershell"
+    o "auto" (por defecto: nativo con PowerShell de respaldo en Windows).
+    """
+    choice = os.environ.get(PROVIDER_ENV, "auto").strip().lower()
+    if choice == "powershell":
+        return PowerShellAccountProvider()
+    try:
+        native = NativeAccountProvider()
+    except Exception as e:
+        if choice == "native":
+            raise
+        logger.debug("Proveedor nativo no disponible (%s); se usa PowerShell", e)
+        return PowerShellAccountProvider()
+    if choice == "native":
+        return native
+    return FallbackAccountProvider(native, PowerShellAccountProvider())
+
+
+def timed(provider: AccountProvider, method: str) -> list:
+    """Llama provider.<method>() y registra en DEBUG cuánto tardó."""
+    start = time.perf_counter()
+    result = getattr(provider, method)()
+    logger.debug("%s.%s: %s elementos en %.3fs",
+                 provider.name, method, len(result), time.perf_counter() - start)
+    return result
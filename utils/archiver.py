@@ -0,0 +1,411 @@
+# utils/archiver.py
+
+from __future__ import annotations
+import os
+import time
+import zlib
+import struct
+import logging
+import tarfile
+import zipfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Deque, Iterator, List, NamedTuple, Optional, Tuple
+
+from utils.fast_delete import _is_link, long_path
+
+try:  # opcional: tar.zst solo si está instalado
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CHUNK = 4 * 2**20          # bytes por tarea de compresión
+DEFAULT_LEVEL = 6
+FORMATS = ("zip", "tar.zst") if zstandard is not None else ("zip",)
+
+_ZIP64_LIMIT = 0xFFFFFFFF
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+
+
+class ArchiveResult(NamedTuple):
+    path: str
+    files: int
+    bytes_in: int
+    bytes_out: int
+    seconds: float
+    errors: List[Tuple[str, str]]   # (ruta, mensaje) de lo que no se pudo leer
+    verified: bool
+
+
+# ——— CRC32 de trozos comprimidos en paralelo ———
+def _gf2_times(mat: List[int], vec: int) -> int:
+    s = i = 0
+    while vec:
+        if vec & 1:
+            s ^= mat[i]
+        vec >>= 1
+        i += 1
+    return s
+
+
+def _gf2_square(mat: List[int]) -> List[int]:
+    return [_gf2_times(mat, mat[n]) for n in range(32)]
+
+
+def crc32_combine(crc1: int, crc2: int, len2: int) -> int:
+    """CRC32 de A+B a partir de crc(A), crc(B) y len(B) (algoritmo de zlib)."""
+    if len2 <= 0:
+        return crc1
+    odd = [0xEDB88320] + [1 << n for n in range(31)]
+    even = _gf2_square(odd)
+    odd = _gf2_square(even)
+    while True:
+        even = _gf2_square(odd)
+        if len2 & 1:
+            crc1 = _gf2_times(even, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+        odd = _gf2_square(even)
+        if len2 & 1:
+            crc1 = _gf2_times(odd, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+    return crc1 ^ crc2
+
+
+def _dos_time(ts: float) -> Tuple[int, int]:
+    t = time.localtime(max(ts, 315532800))   # la fecha DOS empieza en 1980
+    return ((t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2),
+            ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday)
+
+
+# ——— Recorrido ———
+class _Entry(NamedTuple):
+    path: str          # ruta real (con \\?\ en Windows)
+    name: str          # nombre dentro del archivo, con "/"
+    size: int
+    mtime: float
+    is_dir: bool
+
+
+def _walk(root: str, errors: List[Tuple[str, str]]) -> Iterator[_Entry]:
+    """
+    Archivos y carpetas vacías de root, sin seguir enlaces ni uniones
+    (los perfiles traen uniones heredadas como "Application Data" que
+    niegan el listado y algunas apuntan a su propia carpeta padre).
+    """
+    base = long_path(root)
+    stack = [(base, "")]
+    while stack:
+        current, rel = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda e: e.name)
+            empty_mtime = os.stat(current).st_mtime if not entries and rel else None
+        except OSError as e:
+            errors.append((current, str(e)))
+            continue
+        if empty_mtime is not None:
+            yield _Entry(current, rel + "/", 0, empty_mtime, True)
+        subdirs = []
+        for entry in entries:
+            name = f"{rel}/{entry.name}" if rel else entry.name
+            try:
+                if _is_link(entry):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append((entry.path, name))
+                    continue
+                st = entry.stat(follow_symlinks=False)
+            except OSError as e:
+                errors.append((entry.path, str(e)))
+                continue
+            yield _Entry(entry.path, name, st.st_size, st.st_mtime, False)
+        stack.extend(reversed(subdirs))
+
+
+# ——— Zip con compresión en paralelo ———
+def _compress_chunk(path: str, offset: int, length: int, last: bool, level: int
+                    ) -> Tuple[bytes, int, int]:
+    """Lee y comprime un trozo como deflate crudo; (datos, crc, bytes leídos)."""
+    with open(path, "rb") as fh:
+        fh.seek(offset)
+        data = fh.read(length)
+    comp = zlib.compressobj(level, zlib.DEFLATED, -15)
+    # Los trozos intermedios acaban en Z_SYNC_FLUSH (alineados y sin bloque
+    # final), así que concatenarlos da un único flujo deflate válido.
+    out = comp.compress(data) + comp.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+    return out, zlib.crc32(data), len(data)
+
+
+class _ZipWriter:
+    """Escritor de zip en streaming (descriptor de datos + zip64 cuando hace falta)."""
+
+    def __init__(self, fh):
+        self.fh = fh
+        self.offset = 0
+        self.central: List[bytes] = []
+
+    def _write(self, data: bytes) -> None:
+        self.fh.write(data)
+        self.offset += len(data)
+
+    def begin(self, e: _Entry, zip64: bool) -> Tuple[int, int, int, int]:
+        name = e.name.encode("utf-8")
+        dtime, ddate = _dos_time(e.mtime)
+        method = 0 if e.is_dir else zipfile.ZIP_DEFLATED
+        flags = _FLAG_UTF8 | (0 if e.is_dir else _FLAG_DATA_DESCRIPTOR)
+        extra = struct.pack("<HHQQ", 1, 16, 0, 0) if zip64 else b""
+        header_offset = self.offset
+        self._write(struct.pack(
+            "<IHHHHHIIIHH", 0x04034B50, 45 if zip64 else 20, flags, method, dtime, ddate,
+            0, _ZIP64_LIMIT if zip64 else 0, _ZIP64_LIMIT if zip64 else 0,
+            len(name), len(extra)) + name + extra)
+        return header_offset, flags, dtime, ddate
+
+    def end(self, e: _Entry, header: Tuple[int, int, int, int], crc: int,
+            csize: int, usize: int, zip64: bool) -> None:
+        header_offset, flags, dtime, ddate = header
+        if flags & _FLAG_DATA_DESCRIPTOR:
+            if zip64:
+                self._write(struct.pack("<IIQQ", 0x08074B50, crc, csize, usize))
+            else:
+                self._write(struct.pack("<IIII", 0x08074B50, crc, csize, usize))
+        # Directorio central (con zip64 solo para los campos que lo necesitan)
+        fields: List[int] = []
+        c_usize, c_csize, c_off = usize, csize, header_offset
+        if usize >= _ZIP64_LIMIT:
+            fields.append(usize)
+            c_usize = _ZIP64_LIMIT
+        if csize >= _ZIP64_LIMIT:
+            fields.append(csize)
+            c_csize = _ZIP64_LIMIT
+        if header_offset >= _ZIP64_LIMIT:
+            fields.append(header_offset)
+            c_off = _ZIP64_LIMIT
+        extra = struct.pack(f"<HH{len(fields)}Q", 1, 8 * len(fields), *fields) if fields else b""
+        name = e.name.encode("utf-8")
+        method = 0 if e.is_dir else zipfile.ZIP_DEFLATED
+        ext_attr = (0o40755 << 16) | 0x10 if e.is_dir else (0o100644 << 16)
+        self.central.append(struct.pack(
+            "<IHHHHHHIIIHHHHHII", 0x02014B50, 45 if (zip64 or fields) else 20,
+            45 if (zip64 or fields) else 20, flags, method, dtime, ddate, crc,
+            c_csize, c_usize, len(name), len(extra), 0, 0, 0, ext_attr, c_off) + name + extra)
+
+    def close(self) -> None:
+        cd_offset = self.offset
+        for rec in self.central:
+            self._write(rec)
+        cd_size = self.offset - cd_offset
+        count = len(self.central)
+        if count >= 0xFFFF or cd_offset >= _ZIP64_LIMIT or cd_size >= _ZIP64_LIMIT:
+            eocd64 = self.offset
+            self._write(struct.pack("<IQHHIIQQQQ", 0x06064B50, 44, 45, 45, 0, 0,
+                                    count, count, cd_size, cd_offset))
+            self._write(struct.pack("<IIQI", 0x07064B50, 0, eocd64, 1))
+            self._write(struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, 0xFFFF, 0xFFFF,
+                                    _ZIP64_LIMIT, _ZIP64_LIMIT, 0))
+        else:
+            self._write(struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, count, count,
+                                    cd_size, cd_offset, 0))
+
+
+def _zip_tasks(src: str, errors: List[Tuple[str, str]]) -> Iterator[Tuple[_Entry, int, int]]:
+    """(entrada, nº de trozo, total de trozos) en orden; las carpetas, un solo trozo."""
+    for e in _walk(src, errors):
+        n_chunks = 1 if e.is_dir else max(1, -(-e.size // CHUNK))
+        for i in range(n_chunks):
+            yield e, i, n_chunks
+
+
+def _zip_folder(src: str, dest: str, level: int, workers: int,
+                on_progress: Optional[Callable[[int, int, int], None]],
+                cancel: threading.Event, errors: List[Tuple[str, str]]) -> Tuple[int, int]:
+    """
+    Tubería: el recorrido genera trozos, el pool los lee y comprime en
+    paralelo y este hilo los escribe en orden. Un trozo se encarga solo
+    cuando hay sitio en la ventana de 2×workers (también dentro de un
+    mismo archivo grande) y se suelta en cuanto se escribe, así que la
+    memoria queda acotada (~2×workers×CHUNK) sea cual sea el tamaño.
+    """
+    window = max(2, workers * 2)
+    files = bytes_in = 0
+    # Trozos en vuelo, en orden de escritura: (entrada, nº, total, futuro)
+    inflight: Deque[Tuple[_Entry, int, int, Optional[Future]]] = deque()
+    tasks = _zip_tasks(src, errors)
+    skip: Optional[_Entry] = None     # entrada cuyo primer trozo no se pudo leer
+
+    with open(dest, "wb", buffering=2**20) as fh, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="zip") as pool:
+        zw = _ZipWriter(fh)
+        header = None
+        zip64 = False
+        crc = csize = usize = 0
+
+        def fill() -> None:
+            while len(inflight) < window and not cancel.is_set():
+                task = next(tasks, None)
+                if task is None:
+                    return
+                e, i, n = task
+                if e is skip:
+                    continue
+                fut = None if e.is_dir else pool.submit(
+                    _compress_chunk, e.path, i * CHUNK, CHUNK, i == n - 1, level)
+                inflight.append((e, i, n, fut))
+
+        fill()
+        while inflight and not cancel.is_set():
+            e, i, n, fut = inflight.popleft()
+            if e is skip:
+                if fut is not None:
+                    fut.cancel()
+                fill()
+                continue
+            if e.is_dir:
+                zw.end(e, zw.begin(e, False), 0, 0, 0, False)
+                fill()
+                continue
+            try:
+                data, ccrc, read = fut.result()
+            except OSError as ex:
+                errors.append((e.path, str(ex)))
+                if i:
+                    raise   # entrada a medias: el zip ya no sería válido
+                skip = e
+                fill()
+                continue
+            del fut
+            if i == 0:
+                zip64 = e.size >= _ZIP64_LIMIT - 2**20
+                header = zw.begin(e, zip64)
+                crc = csize = usize = 0
+            zw._write(data)
+            crc = crc32_combine(crc, ccrc, read) if usize else ccrc
+            csize += len(data)
+            usize += read
+            del data
+            if i == n - 1:
+                zw.end(e, header, crc, csize, usize, zip64)
+                files += 1
+                bytes_in += usize
+                if on_progress:
+                    on_progress(files, bytes_in, zw.offset)
+            fill()
+        for _, _, _, fut in inflight:
+            if fut is not None:
+                fut.cancel()
+        zw.close()
+    return files, bytes_in
+
+
+def _tar_zst_folder(src: str, dest: str, level: int, workers: int,
+                    on_progress: Optional[Callable[[int, int, int], None]],
+                    cancel: threading.Event, errors: List[Tuple[str, str]]) -> Tuple[int, int]:
+    """tar en streaming dentro de zstd multihilo (requiere zstandard)."""
+    cctx = zstandard.ZstdCompressor(level=min(level, 19), threads=workers)
+    files = bytes_in = 0
+    with open(dest, "wb") as raw, cctx.stream_writer(raw) as zfh, \
+            tarfile.open(fileobj=zfh, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+        for e in _walk(src, errors):
+            if cancel.is_set():
+                break
+            info = tarfile.TarInfo(e.name.rstrip("/"))
+            info.mtime = int(e.mtime)
+            if e.is_dir:
+                info.type = tarfile.DIRTYPE
+                tar.addfile(info)
+                continue
+            try:
+                with open(e.path, "rb") as fh:
+                    info.size = os.fstat(fh.fileno()).st_size
+                    tar.addfile(info, fh)
+            except OSError as ex:
+                errors.append((e.path, str(ex)))
+                continue
+            files += 1
+            bytes_in += info.size
+            if on_progress:
+                on_progress(files, bytes_in, raw.tell())
+    return files, bytes_in
+
+
+# ——— Verificación ———
+def verify_archive(path: str, expected_files: int) -> bool:
+    """Relee el archivo completo comprobando CRC / integridad y nº de archivos."""
+    try:
+        if path.endswith(".zip"):
+            with zipfile.ZipFile(path) as zf:
+                bad = zf.testzip()
+                count = sum(1 for i in zf.infolist() if not i.is_dir())
+            if bad is not None:
+                logger.error("Archivo %s: CRC incorrecto en %s", path, bad)
+                return False
+        else:
+            dctx = zstandard.ZstdDecompressor()
+            count = 0
+            with open(path, "rb") as raw, dctx.stream_reader(raw) as zfh, \
+                    tarfile.open(fileobj=zfh, mode="r|") as tar:
+                for member in tar:
+                    if member.isfile():
+                        f = tar.extractfile(member)
+                        while f.read(2**20):
+                            pass
+                        count += 1
+    except Exception as e:
+        logger.error("No se pudo verificar %s: %s", path, e)
+        return False
+    if count != expected_files:
+        logger.error("Archivo %s: %s archivos, se esperaban %s", path, count, expected_files)
+        return False
+    return True
+
+
+def archive_folder(
+    src: str,
+    dest_dir: str,
+    fmt: str = "zip",
+    name: Optional[str] = None,
+    level: int = DEFAULT_LEVEL,
+    workers: Optional[int] = None,
+    on_progress: Optional[Callable[[int, int, int], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> ArchiveResult:
+    """
+    Comprime src en dest_dir/<name>-<fecha>.<fmt> y lo verifica.
+    verified=True solo si el archivo se releyó entero sin errores y no hubo
+    archivos ilegibles: solo entonces es seguro borrar el original.
+    on_progress(archivos, bytes leídos, bytes escritos).
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato no disponible: {fmt} (hay: {', '.join(FORMATS)})")
+    workers = workers or max(1, (os.cpu_count() or 2))
+    cancel = cancel or threading.Event()
+    base = name or os.path.basename(os.path.normpath(src))
+    os.makedirs(dest_dir, exist_ok=True)
+    dest = os.path.join(dest_dir, f"{base}-{time.strftime('%Y%m%d-%H%M%S')}.{fmt}")
+    errors: List[Tuple[str, str]] = []
+    start = time.perf_counter()
+
+    writer = _zip_folder if fmt == "zip" else _tar_zst_folder
+    try:
+        files, bytes_in = writer(src, dest, level, workers, on_progress, cancel, errors)
+    except Exception as e:
+        logger.exception("Error archivando %s", src)
+        errors.append((src, str(e)))
+        files = bytes_in = 0
+    bytes_out = os.path.getsize(dest) if os.path.exists(dest) else 0
+    verified = (not errors and not cancel.is_set()
+                and verify_archive(dest, files))
+    seconds = time.perf_counter() - start
+    logger.info("Archivado %s → %s: %s archivos, %.1f → %.1f MiB en %.1fs (%.1f MiB/s)%s",
+                src, dest, files, bytes_in / 2**20, bytes_out / 2**20, seconds,
+                bytes_in / 2**20 / max(seconds, 1e-6),
+                "" if verified else " – NO verificado")
+    return ArchiveResult(dest, files, bytes_in, bytes_out, seconds, errors, verified)
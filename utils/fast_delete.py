@@ -0,0 +1,301 @@
+# utils/fast_delete.py
+
+from __future__ import annotations
+import os
+import stat
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FutureTimeout
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from utils.throttling import LoadMonitor, Throttle, background_priority, enter_background
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 8
+_CHUNK = 128                         # archivos por tarea del pool
+_MAX_ERROR_DETAILS = 200             # se cuentan todos, se guardan estos
+_FILE_ATTRIBUTE_REPARSE_POINT = 0x400
+
+
+def long_path(path: str) -> str:
+    """
+    En Windows antepone \\\\?\\ (o \\\\?\\UNC\\) para saltarse el límite de
+    260 caracteres; en otros sistemas devuelve la ruta absoluta.
+    """
+    path = os.path.abspath(path)
+    if os.name != "nt" or path.startswith("\\\\?\\"):
+        return path
+    if path.startswith("\\\\"):
+        return "\\\\?\\UNC\\" + path[2:]
+    return "\\\\?\\" + path
+
+
+def _display(path: str) -> str:
+    if path.startswith("\\\\?\\UNC\\"):
+        return "\\\\" + path[8:]
+    if path.startswith("\\\\?\\"):
+        return path[4:]
+    return path
+
+
+class DeleteStats:
+    """Contadores de un borrado (seguros entre hilos vía TreeDeleter)."""
+
+    __slots__ = ("root", "files", "dirs", "bytes", "error_count", "errors",
+                 "started", "finished", "cancelled", "paused", "throttled", "paused_now")
+
+    def __init__(self, root: str = ""):
+        self.root = root
+        self.files = 0
+        self.dirs = 0
+        self.bytes = 0
+        self.error_count = 0
+        self.errors: List[Tuple[str, str]] = []   # (ruta, mensaje)
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self.cancelled = False
+        self.paused = 0.0          # segundos en pausa por carga del equipo
+        self.throttled = 0.0       # segundos esperando por el tope de velocidad
+        self.paused_now = False
+
+    @property
+    def elapsed(self) -> float:
+        return max(1e-6, (self.finished or time.monotonic()) - self.started)
+
+    @property
+    def files_per_sec(self) -> float:
+        return self.files / self.elapsed
+
+    @property
+    def bytes_per_sec(self) -> float:
+        return self.bytes / self.elapsed
+
+    @property
+    def ok(self) -> bool:
+        return self.error_count == 0 and not self.cancelled
+
+    def rate_text(self) -> str:
+        text = (f"{self.files:,} archivos, {self.bytes / 2**20:,.1f} MiB en {self.elapsed:.1f}s "
+                f"({self.files_per_sec:,.0f} arch/s, {self.bytes_per_sec / 2**20:,.1f} MiB/s)")
+        if self.paused_now:
+            text += " – en pausa, equipo ocupado"
+        elif self.paused >= 1:
+            text += f" – {self.paused:.0f}s en pausa"
+        return text
+
+
+def _retry_writable(op: Callable[[str], None], path: str) -> None:
+    """Ejecuta op(path); si falla por permisos, quita solo-lectura y reintenta."""
+    try:
+        op(path)
+    except PermissionError:
+        os.chmod(path, stat.S_IWRITE)
+        op(path)
+
+
+def _is_link(entry: os.DirEntry) -> bool:
+    """Enlace simbólico o unión (reparse point): se quita sin entrar."""
+    if entry.is_symlink():
+        return True
+    if os.name == "nt":
+        try:
+            attrs = entry.stat(follow_symlinks=False).st_file_attributes
+        except OSError:
+            return False
+        return bool(attrs & _FILE_ATTRIBUTE_REPARSE_POINT)
+    return False
+
+
+class TreeDeleter:
+    """
+    Borra árboles de carpetas recorriéndolos con os.scandir y repartiendo
+    los unlink entre un pool de hilos. Los errores se acumulan en
+    DeleteStats sin detener el borrado; las carpetas se eliminan al final,
+    de la más profunda a la raíz.
+
+    on_progress(DeleteStats) se llama como mucho cada progress_interval
+    segundos (desde el hilo que borra) y una vez al terminar.
+
+    Modo suave (para borrar con clase en marcha): throttle limita
+    archivos/s y MB/s, low_priority pone los hilos en modo de fondo
+    (CPU y E/S de baja prioridad) y load_monitor pausa mientras el equipo
+    esté ocupado.
+    """
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        on_progress: Optional[Callable[[DeleteStats], None]] = None,
+        progress_interval: float = 0.25,
+        throttle: Optional[Throttle] = None,
+        low_priority: bool = False,
+        load_monitor: Optional[LoadMonitor] = None,
+    ):
+        self.workers = max(1, workers)
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+        self.throttle = throttle if throttle is not None and throttle.active else None
+        self.low_priority = low_priority
+        self.load_monitor = load_monitor
+        self._paused0 = 0.0
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    def cancel(self) -> None:
+        """Deja de encolar trabajo; lo ya borrado no se recupera."""
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    # ——— API ———
+    def delete(self, path: str) -> DeleteStats:
+        """Borra path (carpeta o archivo) por completo; bloqueante."""
+        stats = DeleteStats(path)
+        root = long_path(path)
+        self._paused0 = self.load_monitor.paused_seconds() if self.load_monitor else 0.0
+        init = enter_background if self.low_priority else None
+        with background_priority(self.low_priority), \
+                ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="rm",
+                                   initializer=init) as pool:
+            is_junction = getattr(os.path, "isjunction", lambda _p: False)
+            if os.path.isdir(root) and not (os.path.islink(root) or is_junction(root)):
+                dirs = self._walk(root, pool, stats)
+            else:
+                dirs = []
+                self._unlink_files([(root, self._size(root))], stats)
+        if not self.cancelled:
+            for d in reversed(dirs):
+                self._rmdir(d, stats)
+        stats.cancelled = self.cancelled
+        stats.finished = time.monotonic()
+        self._report(stats)
+        logger.info("Borrado %s: %s%s", path, stats.rate_text(),
+                    f", {stats.error_count} errores" if stats.error_count else "")
+        return stats
+
+    def delete_many(self, paths: Iterable[str]) -> List[DeleteStats]:
+        """Borra varias carpetas una tras otra (cada una en paralelo)."""
+        out = []
+        for p in paths:
+            if self.cancelled:
+                break
+            out.append(self.delete(p))
+        return out
+
+    # ——— Internos ———
+    @staticmethod
+    def _size(path: str) -> int:
+        try:
+            return os.lstat(path).st_size
+        except OSError:
+            return 0
+
+    def _walk(self, root: str, pool: ThreadPoolExecutor, stats: DeleteStats) -> List[str]:
+        """Recorre en preorden, encola archivos y devuelve las carpetas."""
+        dirs = [root]
+        stack = [root]
+        pending: List[Future] = []
+        batch: List[Tuple[str, int]] = []
+        last = 0.0
+        while stack and not self.cancelled:
+            self._gate(stats, 0, files=0)
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        try:
+                            if _is_link(entry):
+                                # enlace o unión: os.remove quita solo el enlace
+                                batch.append((entry.path, 0))
+                            elif entry.is_dir(follow_symlinks=False):
+                                dirs.append(entry.path)
+                                stack.append(entry.path)
+                            else:
+                                size = entry.stat(follow_symlinks=False).st_size
+                                batch.append((entry.path, size))
+                        except OSError as e:
+                            self._error(stats, entry.path, e)
+                        if len(batch) >= _CHUNK:
+                            pending.append(pool.submit(self._unlink_files, batch, stats))
+                            batch = []
+            except OSError as e:
+                self._error(stats, current, e)
+            now = time.monotonic()
+            if now - last >= self.progress_interval:
+                last = now
+                self._report(stats)
+                pending = [f for f in pending if not f.done()]
+        if batch and not self.cancelled:
+            pending.append(pool.submit(self._unlink_files, batch, stats))
+        for f in pending:
+            while True:
+                try:
+                    f.result(timeout=self.progress_interval)
+                    break
+                except FutureTimeout:
+                    self._report(stats)
+        return dirs
+
+    def _unlink_files(self, batch: List[Tuple[str, int]], stats: DeleteStats) -> None:
+        for path, size in batch:
+            if self.cancelled:
+                return
+            self._gate(stats, size)
+            try:
+                _retry_writable(os.remove, path)
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                self._error(stats, path, e)
+                continue
+            with self._lock:
+                stats.files += 1
+                stats.bytes += size
+
+    def _gate(self, stats: DeleteStats, nbytes: int, files: int = 1) -> None:
+        """Espera si el equipo está ocupado o si se supera el tope de velocidad."""
+        if self.load_monitor is not None:
+            def flag(on: bool) -> None:
+                stats.paused_now = on
+            self.load_monitor.wait_while_busy(self._cancel, flag)
+        if self.throttle is not None and files:
+            waited = self.throttle.acquire(files, nbytes)
+            if waited:
+                with self._lock:
+                    stats.throttled += waited
+
+    def _rmdir(self, path: str, stats: DeleteStats) -> None:
+        try:
+            _retry_writable(os.rmdir, path)
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            self._error(stats, path, e)
+            return
+        with self._lock:
+            stats.dirs += 1
+
+    def _error(self, stats: DeleteStats, path: str, exc: BaseException) -> None:
+        with self._lock:
+            stats.error_count += 1
+            if len(stats.errors) < _MAX_ERROR_DETAILS:
+                stats.errors.append((_display(path), str(exc)))
+        logger.debug("No se pudo borrar %s: %s", _display(path), exc)
+
+    def _report(self, stats: DeleteStats) -> None:
+        if self.load_monitor is not None:
+            stats.paused = self.load_monitor.paused_seconds() - self._paused0
+        if self.on_progress:
+            try:
+                self.on_progress(stats)
+            except Exception:
+                logger.exception("on_progress falló")
+
+
+def delete_tree(path: str, workers: int = DEFAULT_WORKERS) -> DeleteStats:
+    """Atajo: borra un árbol con un TreeDeleter propio."""
+    return TreeDeleter(workers).delete(path)
@@ -0,0 +1,211 @@
+# utils/folder_scan.py
+
+from __future__ import annotations
+import os
+import json
+import time
+import sqlite3
+import logging
+import tempfile
+import threading
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.path.join(
+    os.environ.get("LOCALAPPDATA") or tempfile.gettempdir(), "LabTool", "folder-scan.sqlite3"
+)
+_COMMIT_EVERY = 500        # carpetas reescaneadas entre commits
+_FILE_ATTRIBUTE_REPARSE_POINT = 0x400
+
+
+class FolderInfo(NamedTuple):
+    """Resumen de un árbol de carpetas."""
+    path: str
+    size: int              # bytes
+    files: int
+    newest: float          # mtime más reciente (epoch); 0 si vacío
+    scanned: float         # segundos que tardó
+    reused: int            # carpetas tomadas de la caché
+    rescanned: int         # carpetas leídas del disco
+
+
+def _is_link(entry: os.DirEntry) -> bool:
+    if entry.is_symlink():
+        return True
+    if os.name == "nt":
+        try:
+            return bool(entry.stat(follow_symlinks=False).st_file_attributes
+                        & _FILE_ATTRIBUTE_REPARSE_POINT)
+        except OSError:
+            return False
+    return False
+
+
+class FolderScanCache:
+    """
+    Caché en SQLite de lo que contiene cada carpeta *directamente*
+    (bytes, nº de archivos, mtime más reciente y subcarpetas), indexada
+    por ruta y validada con el mtime de la carpeta. Si el mtime no cambió
+    no se vuelve a listar; solo se baja a las subcarpetas.
+
+    Una conexión por hilo: crear una instancia en el hilo que la usa.
+    """
+
+    def __init__(self, path: str = CACHE_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=10)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS dirs ("
+            " path TEXT PRIMARY KEY, mtime INTEGER, size INTEGER,"
+            " files INTEGER, newest REAL, children TEXT)"
+        )
+        self._dirty = 0
+
+    def close(self) -> None:
+        self.db.commit()
+        self.db.close()
+
+    def _own(self, path: str) -> Tuple[Tuple[int, int, float], List[str], bool]:
+        """((bytes, archivos, newest), subcarpetas, venía_de_caché) de una carpeta."""
+        st = os.stat(path)
+        row = self.db.execute(
+            "SELECT mtime, size, files, newest, children FROM dirs WHERE path = ?", (path,)
+        ).fetchone()
+        if row and row[0] == st.st_mtime_ns:
+            return (row[1], row[2], row[3]), json.loads(row[4]), True
+
+        size = files = 0
+        newest = st.st_mtime
+        kids: List[str] = []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if not _is_link(entry) and entry.is_dir(follow_symlinks=False):
+                        kids.append(entry.name)
+                        continue
+                    est = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                size += est.st_size
+                files += 1
+                newest = max(newest, est.st_mtime)
+
+        if row:  # olvidar subcarpetas que ya no existen
+            gone = set(json.loads(row[4])) - set(kids)
+            for name in gone:
+                sub = os.path.join(path, name)
+                self.db.execute("DELETE FROM dirs WHERE path = ? OR path LIKE ? ESCAPE '\\'",
+                                (sub, _like_prefix(sub)))
+        self.db.execute(
+            "INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?, ?, ?)",
+            (path, st.st_mtime_ns, size, files, newest, json.dumps(kids)),
+        )
+        self._dirty += 1
+        if self._dirty >= _COMMIT_EVERY:
+            self.db.commit()
+            self._dirty = 0
+        return (size, files, newest), kids, False
+
+    def scan(self, root: str, cancelled: Callable[[], bool] = lambda: False) -> FolderInfo:
+        """Tamaño, archivos y mtime más reciente de todo el árbol de root."""
+        start = time.perf_counter()
+        own: Dict[str, Tuple[int, int, float]] = {}
+        kids_of: Dict[str, List[str]] = {}
+        order: List[str] = []
+        reused = rescanned = 0
+        stack = [root]
+        while stack and not cancelled():
+            d = stack.pop()
+            try:
+                stats, kids, hit = self._own(d)
+            except OSError as e:
+                logger.debug("No se pudo leer %s: %s", d, e)
+                continue
+            reused += hit
+            rescanned += not hit
+            own[d] = stats
+            kids_of[d] = [os.path.join(d, k) for k in kids]
+            order.append(d)
+            stack.extend(kids_of[d])
+
+        # Sumar de las hojas hacia la raíz
+        totals: Dict[str, Tuple[int, int, float]] = {}
+        for d in reversed(order):
+            size, files, newest = own[d]
+            for k in kids_of[d]:
+                if k in totals:
+                    ks, kf, kn = totals.pop(k)
+                    size += ks
+                    files += kf
+                    newest = max(newest, kn)
+            totals[d] = (size, files, newest)
+        self.db.commit()
+        self._dirty = 0
+        size, files, newest = totals.get(root, (0, 0, 0.0))
+        return FolderInfo(root, size, files, newest, time.perf_counter() - start, reused, rescanned)
+
+
+def _like_prefix(path: str) -> str:
+    esc = path.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return esc + ("\\\\" if os.sep == "\\" else os.sep) + "%"
+
+
+class FolderScanner:
+    """
+    Calcula en segundo plano el FolderInfo de cada carpeta de `paths`
+    (en el orden dado) y llama on_result(FolderInfo) al terminar cada una.
+    """
+
+    def __init__(self, paths: Iterable[str],
+                 on_result: Callable[[FolderInfo], None],
+                 cache_path: str = CACHE_PATH):
+        self.paths = list(paths)
+        self.on_result = on_result
+        self.cache_path = cache_path
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="folder-scan", daemon=True)
+        self._thread.start()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def _run(self) -> None:
+        try:
+            cache = FolderScanCache(self.cache_path)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Caché de tamaños no disponible (%s); se usa una en memoria", e)
+            cache = FolderScanCache(":memory:")
+        start = time.perf_counter()
+        reused = rescanned = 0
+        try:
+            for path in self.paths:
+                if self._cancel.is_set():
+                    break
+                info = cache.scan(path, self._cancel.is_set)
+                reused += info.reused
+                rescanned += info.rescanned
+                if not self._cancel.is_set():
+                    try:
+                        self.on_result(info)
+                    except Exception:
+                        logger.exception("on_result falló")
+        finally:
+            cache.close()
+        logger.info("Escaneo de %s carpetas en %.1fs (%s de caché, %s releídas)",
+                    len(self.paths), time.perf_counter() - start, reused, rescanned)
+
+
+def human_size(n: float) -> str:
+    """1536 → '1.5 KiB'."""
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if abs(n) < 1024 or unit == "TiB":
+            break
+        n /= 1024
+    return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
@@ -0,0 +1,148 @@
+# utils/fuzzy_search.py
+
+from __future__ import annotations
+import re
+import bisect
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Sequence, Set, Tuple
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize(text: str) -> str:
+    """Minúsculas, sin acentos y con cualquier separador como un espacio."""
+    folded = unicodedata.normalize("NFKD", text)
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(" ", folded.lower()).strip()
+
+
+def _trigrams(token: str) -> Set[str]:
+    return {token[i:i + 3] for i in range(len(token) - 2)}
+
+
+def _osa(a: str, b: str, limit: int) -> int:
+    """Distancia de edición con trasposiciones; corta en cuanto supera limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cost = ca != cb
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit:
+            return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+class SearchIndex:
+    """
+    Índice de búsqueda aproximada sobre una lista fija de textos.
+
+    Se construye una vez: textos normalizados (sin acentos), trigramas →
+    elementos y una lista ordenada de palabras para buscar por prefijo.
+    Una consulta se parte en palabras y cada una debe aparecer en el
+    elemento, por este orden de preferencia: palabra exacta, prefijo de
+    una palabra, subcadena o parecida (desde 4 letras: a una edición, o a
+    dos desde 7, del principio de una palabra; p. ej. "chorme" → "Chrome").
+    Los trigramas solo sirven para descartar candidatos rápido. Los
+    resultados se ordenan por puntuación; a igualdad, primero los nombres
+    más cortos.
+    """
+
+    FUZZY_FROM = 4      # letras mínimas para buscar palabras parecidas
+    SHORT = 6           # por debajo, los trigramas no bastan para hallar candidatos
+
+    def __init__(self, items: Sequence[str]):
+        self.items = list(items)
+        self.norm = [normalize(it) for it in self.items]
+        self.tokens: List[Tuple[str, ...]] = [tuple(n.split()) for n in self.norm]
+        self.grams: Dict[str, List[int]] = {}
+        words: Set[Tuple[str, int]] = set()
+        for idx, toks in enumerate(self.tokens):
+            grams: Set[str] = set()
+            for tok in toks:
+                words.add((tok, idx))
+                grams |= _trigrams(f" {tok} ")
+            for g in grams:
+                self.grams.setdefault(g, []).append(idx)
+        self.words = sorted(words)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _prefix_ids(self, prefix: str) -> Set[int]:
+        lo = bisect.bisect_left(self.words, (prefix, -1))
+        out = set()
+        for word, idx in self.words[lo:]:
+            if not word.startswith(prefix):
+                break
+            out.add(idx)
+        return out
+
+    def _token_scores(self, q: str) -> Dict[int, float]:
+        """Elemento → puntuación de una palabra de la consulta (solo los que casan)."""
+        scores: Dict[int, float] = {}
+        for idx in self._prefix_ids(q):
+            scores[idx] = 3.0 if q in self.tokens[idx] else 2.5
+        inner = _trigrams(q)
+        if not inner:
+            return scores   # 1-2 letras: solo prefijo
+        # Subcadena: tiene que tener todos los trigramas de q
+        hits = Counter()
+        for g in inner:
+            hits.update(self.grams.get(g, ()))
+        for idx, n in hits.items():
+            if idx not in scores and n == len(inner) and q in self.norm[idx]:
+                scores[idx] = 2.0
+        if len(q) < self.FUZZY_FROM:
+            return scores
+        # Parecida: candidatos que comparten al menos un tercio de los
+        # trigramas (con bordes) y se confirman con la distancia de edición.
+        # Una palabra corta con dos letras cambiadas de sitio ("wrod") puede
+        # no compartir ninguno: ahí valen también las palabras que empiezan
+        # por su primera o su segunda letra.
+        padded = _trigrams(f" {q} ")
+        hits = Counter()
+        for g in padded:
+            hits.update(self.grams.get(g, ()))
+        need = max(1, len(padded) // 3)
+        candidates = {idx for idx, n in hits.items() if n >= need}
+        if len(q) < self.SHORT:
+            candidates |= self._prefix_ids(q[0]) | self._prefix_ids(q[1])
+        limit = 1 if len(q) < 7 else 2
+        for idx in candidates:
+            if idx in scores:
+                continue
+            best = min(min(_osa(q, tok[:len(q)], limit), _osa(q, tok, limit))
+                       for tok in self.tokens[idx])
+            if best <= limit:
+                scores[idx] = 1.5 - 0.25 * best
+        return scores
+
+    def search(self, query: str) -> List[str]:
+        """Elementos que casan con query, del mejor al peor; sin consulta, todos."""
+        words = normalize(query).split()
+        if not words:
+            return list(self.items)
+        total: Dict[int, float] = {}
+        for i, q in enumerate(words):
+            scores = self._token_scores(q)
+            if i == 0:
+                total = scores
+            else:
+                total = {idx: s + scores[idx] for idx, s in total.items() if idx in scores}
+            if not total:
+                return []
+        first = words[0]
+        ranked = sorted(
+            total,
+            key=lambda idx: (-(total[idx] + (0.5 if self.norm[idx].startswith(first) else 0.0)),
+                             len(self.norm[idx]), self.norm[idx]),
+        )
+        return [self.items[idx] for idx in ranked]
@@ -0,0 +1,287 @@
+# utils/journal.py
+
+from __future__ import annotations
+import os
+import json
+import time
+import sqlite3
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_PATH = os.path.join(
+    os.environ.get("LOCALAPPDATA") or tempfile.gettempdir(), "LabTool", "journal.sqlite3"
+)
+
+# Estados de cada unidad de trabajo (carpeta, cuenta…)
+PLANNED, STARTED, DONE, FAILED, SKIPPED = "planned", "started", "done", "failed", "skipped"
+_CLOSED = "closed"          # evento de fin de lote (unit = '')
+_FINISHED = (DONE, SKIPPED)
+
+
+class RunInfo(NamedTuple):
+    """Lote registrado en el diario."""
+    id: int
+    kind: str              # "batch_delete", "delete_user"…
+    params: Dict[str, Any]
+    created: float         # epoch
+    planned: int
+    done: int
+    failed: int
+    remaining: List[str]   # unidades sin terminar, en el orden planificado
+
+
+class Journal:
+    """
+    Diario de operaciones en SQLite, solo de añadir: cada cambio de estado
+    de una unidad es una fila nueva en `events` que se confirma al momento
+    con synchronous=FULL (fsync), así que sobrevive a un cierre o un
+    reinicio a mitad de lote. El estado actual de una unidad es su último
+    evento; nunca se actualiza ni se borra nada salvo en prune().
+
+    Una sola conexión compartida entre hilos (protegida con un lock).
+    """
+
+    def __init__(self, path: str = JOURNAL_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=10, check_same_thread=False,
+                                  isolation_level=None)   # autocommit: 1 evento = 1 commit
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=FULL")
+        self.db.executescript(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " id INTEGER PRIMARY KEY, kind TEXT, params TEXT, created REAL);"
+            "CREATE TABLE IF NOT EXISTS events ("
+            " id INTEGER PRIMARY KEY, run INTEGER, unit TEXT, state TEXT, ts REAL,"
+            " duration REAL, amount INTEGER, detail TEXT);"
+            "CREATE INDEX IF NOT EXISTS events_run ON events(run, unit);"
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self.db.close()
+
+    @contextmanager
+    def _transaction(self):
+        """BEGIN…COMMIT con el lock tomado; si algo falla, ROLLBACK y se relanza
+        (si no, la conexión quedaría dentro de la transacción para siempre)."""
+        with self._lock:
+            self.db.execute("BEGIN")
+            try:
+                yield self.db
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+            self.db.execute("COMMIT")
+
+    def _append(self, run: int, rows: Iterable[tuple]) -> None:
+        with self._transaction() as db:
+            db.executemany(
+                "INSERT INTO events(run, unit, state, ts, duration, amount, detail)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)", ((run, *row) for row in rows))
+
+    # ——— Lotes ———
+    def begin(self, kind: str, units: Iterable[str], params: Optional[dict] = None) -> "Run":
+        """Registra un lote nuevo con todas sus unidades planificadas."""
+        units = list(dict.fromkeys(units))
+        now = time.time()
+        with self._lock:
+            cur = self.db.execute("INSERT INTO runs(kind, params, created) VALUES (?, ?, ?)",
+                                  (kind, json.dumps(params or {}), now))
+            run_id = cur.lastrowid
+        self._append(run_id, ((u, PLANNED, now, None, None, None) for u in units))
+        logger.info("Diario: lote %s (%s) con %s unidades", run_id, kind, len(units))
+        return Run(self, run_id, kind, params or {}, units)
+
+    def resume(self, run_id: int) -> "Run":
+        """Reabre un lote sin terminar; Run.remaining() dice qué falta."""
+        info = self.info(run_id)
+        if info is None:
+            raise KeyError(f"Lote {run_id} no está en el diario")
+        return Run(self, info.id, info.kind, info.params, self._planned(run_id))
+
+    def _planned(self, run_id: int) -> List[str]:
+        with self._lock:
+            rows = self.db.execute("SELECT unit FROM events WHERE run=? AND state=?"
+                                   " ORDER BY id", (run_id, PLANNED)).fetchall()
+        return [u for (u,) in rows]
+
+    def _last_states(self, run_id: int) -> Dict[str, str]:
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT unit, state FROM events WHERE id IN"
+                " (SELECT MAX(id) FROM events WHERE run=? AND unit<>'' GROUP BY unit)",
+                (run_id,)).fetchall()
+        return dict(rows)
+
+    def info(self, run_id: int) -> Optional[RunInfo]:
+        with self._lock:
+            row = self.db.execute("SELECT id, kind, params, created FROM runs WHERE id=?",
+                                  (run_id,)).fetchone()
+        if row is None:
+            return None
+        planned = self._planned(run_id)
+        states = self._last_states(run_id)
+        return RunInfo(
+            row[0], row[1], json.loads(row[2] or "{}"), row[3], len(planned),
+            sum(1 for s in states.values() if s in _FINISHED),
+            sum(1 for s in states.values() if s == FAILED),
+            [u for u in planned if states.get(u) not in _FINISHED],
+        )
+
+    def unfinished(self, kind: Optional[str] = None) -> List[RunInfo]:
+        """Lotes que no se cerraron (se cortaron a medias), del más reciente al más antiguo."""
+        sql = ("SELECT id FROM runs WHERE id NOT IN"
+               " (SELECT run FROM events WHERE state=?)")
+        args: list = [_CLOSED]
+        if kind:
+            sql += " AND kind=?"
+            args.append(kind)
+        with self._lock:
+            ids = [r for (r,) in self.db.execute(sql + " ORDER BY id DESC", args)]
+        out = []
+        for run_id in ids:
+            info = self.info(run_id)
+            if info and info.remaining:
+                out.append(info)
+        return out
+
+    def discard(self, run_id: int, detail: str = "descartado") -> None:
+        """Da por cerrado un lote sin terminarlo (descartado o seguido en otro)."""
+        self._append(run_id, [("", _CLOSED, time.time(), None, None, detail)])
+
+    # ——— Historial ———
+    def throughput(self, kind: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Rendimiento por lote (los `limit` más recientes): unidades hechas y
+        fallidas, segundos de reloj (del primer inicio al último fin: con
+        trabajos en paralelo la suma de duraciones sería mayor) y
+        unidades/s y bytes/s sobre ese tiempo.
+        """
+        sql = ("SELECT r.id, r.kind, r.created,"
+               " SUM(e.state='done'), SUM(e.state='failed'),"
+               " COALESCE(MAX(CASE WHEN e.state IN ('done','failed') THEN e.ts END)"
+               "  - COALESCE(MIN(CASE WHEN e.state='started' THEN e.ts END), r.created), 0),"
+               " COALESCE(SUM(e.amount), 0)"
+               " FROM runs r LEFT JOIN events e ON e.run = r.id")
+        args: list = []
+        if kind:
+            sql += " WHERE r.kind=?"
+            args.append(kind)
+        sql += " GROUP BY r.id ORDER BY r.id DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            rows = self.db.execute(sql, args).fetchall()
+        out = []
+        for run_id, k, created, done, failed, secs, amount in rows:
+            out.append({
+                "run": run_id, "kind": k, "created": created,
+                "done": done or 0, "failed": failed or 0, "seconds": secs,
+                "units_per_s": (done or 0) / secs if secs else 0.0,
+                "bytes_per_s": amount / secs if secs else 0.0,
+            })
+        return out
+
+    def prune(self, keep_days: float = 90) -> None:
+        """Quita lotes cerrados más antiguos que keep_days."""
+        cutoff = time.time() - keep_days * 86400
+        with self._lock:
+            old = [(r,) for (r,) in self.db.execute(
+                "SELECT id FROM runs WHERE created < ? AND id IN"
+                " (SELECT run FROM events WHERE state=?)", (cutoff, _CLOSED))]
+        with self._transaction() as db:
+            db.executemany("DELETE FROM events WHERE run=?", old)
+            db.executemany("DELETE FROM runs WHERE id=?", old)
+
+
+class Run:
+    """
+    Un lote abierto: registra el avance de cada unidad (seguro entre hilos).
+    Con journal=None no anota nada (se usa si el diario no se pudo abrir).
+    """
+
+    def __init__(self, journal: Optional[Journal], run_id: int, kind: str,
+                 params: Dict[str, Any], planned: List[str]):
+        self.journal = journal
+        self.id = run_id
+        self.kind = kind
+        self.params = params
+        self.planned = planned
+        self._started: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def remaining(self) -> List[str]:
+        """Unidades planificadas que aún no terminaron bien (en orden)."""
+        if self.journal is None:
+            return list(self.planned)
+        states = self.journal._last_states(self.id)
+        return [u for u in self.planned if states.get(u) not in _FINISHED]
+
+    def _event(self, unit: str, state: str, amount: Optional[int] = None,
+               detail: str = "") -> None:
+        if self.journal is None:
+            return
+        now = time.time()
+        with self._lock:
+            start = self._started.pop(unit, None) if state != STARTED else None
+            if state == STARTED:
+                self._started[unit] = time.monotonic()
+        duration = time.monotonic() - start if start is not None else None
+        try:
+            self.journal._append(self.id, [(unit, state, now, duration, amount, detail or None)])
+        except sqlite3.Error:
+            # El diario nunca debe parar el trabajo real
+            logger.exception("No se pudo anotar %s=%s en el diario", unit, state)
+
+    def started(self, unit: str) -> None:
+        self._event(unit, STARTED)
+
+    def done(self, unit: str, amount: Optional[int] = None, detail: str = "") -> None:
+        """amount: bytes (u otra cantidad) procesados, para el rendimiento."""
+        self._event(unit, DONE, amount, detail)
+
+    def failed(self, unit: str, detail: str = "") -> None:
+        self._event(unit, FAILED, None, detail)
+
+    def skipped(self, unit: str, detail: str = "") -> None:
+        self._event(unit, SKIPPED, None, detail)
+
+    def close(self) -> None:
+        """Cierra el lote: ya no se ofrecerá reanudarlo."""
+        self._event("", _CLOSED)
+
+
+# ——— Instancia compartida ———
+_journal: Optional[Journal] = None
+_journal_lock = threading.Lock()
+
+
+def get() -> Optional[Journal]:
+    """Diario de la aplicación, o None si no se pudo abrir (se trabaja sin él)."""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            try:
+                _journal = Journal()
+            except (sqlite3.Error, OSError):
+                logger.exception("No se pudo abrir el diario de operaciones")
+                return None
+        return _journal
+
+
+def begin(kind: str, units: Iterable[str], params: Optional[dict] = None) -> Run:
+    """Journal.begin() sobre el diario compartido; sin diario, un Run que no anota."""
+    units = list(units)
+    jr = get()
+    if jr is not None:
+        try:
+            return jr.begin(kind, units, params)
+        except sqlite3.Error:
+            logger.exception("No se pudo abrir un lote en el diario")
+    return Run(None, 0, kind, params or {}, units)
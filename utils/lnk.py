@@ -0,0 +1,274 @@
+# utils/lnk.py
+
+from __future__ import annotations
+import os
+import struct
+import ntpath
+import logging
+from typing import List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Formato Shell Link (MS-SHLLINK); solo lo necesario para leer destinos
+_HEADER_SIZE = 0x4C
+_LINK_CLSID = bytes.fromhex("0114020000000000c000000000000046")
+
+HAS_ID_LIST = 0x1
+HAS_LINK_INFO = 0x2
+HAS_NAME = 0x4
+HAS_RELATIVE_PATH = 0x8
+HAS_WORKING_DIR = 0x10
+HAS_ARGUMENTS = 0x20
+HAS_ICON_LOCATION = 0x40
+IS_UNICODE = 0x80
+HAS_EXP_STRING = 0x200
+HAS_DARWIN_ID = 0x1000
+HAS_EXP_ICON = 0x4000
+
+_ENV_BLOCK = 0xA0000001
+_DARWIN_BLOCK = 0xA0000006
+_ICON_ENV_BLOCK = 0xA0000007
+
+_ANSI = "mbcs" if os.name == "nt" else "cp1252"
+MAX_SIZE = 1 << 20    # un .lnk real ocupa unos pocos KB
+
+
+class LinkInfo(NamedTuple):
+    """Lo que interesa de un acceso directo."""
+    target: str            # ruta destino ("" si no se pudo resolver)
+    arguments: str
+    working_dir: str
+    icon: str
+    icon_index: int
+    description: str
+    advertised: bool       # acceso "anunciado" de Windows Installer (sin ruta real)
+    darwin: str = ""       # descriptor Darwin (producto/característica MSI) si es anunciado
+
+    def as_list(self) -> list:
+        return list(self)
+
+    @classmethod
+    def from_list(cls, data: list) -> "LinkInfo":
+        return cls(*data)
+
+
+class LnkError(ValueError):
+    """El archivo no es un .lnk válido."""
+
+
+def _cstr(buf: bytes, pos: int, unicode: bool = False) -> str:
+    """Cadena terminada en nulo a partir de pos."""
+    if unicode:
+        end = pos
+        while end + 1 < len(buf) and buf[end:end + 2] != b"\0\0":
+            end += 2
+        return buf[pos:end].decode("utf-16-le", "replace")
+    end = buf.find(b"\0", pos)
+    return buf[pos:end if end >= 0 else len(buf)].decode(_ANSI, "replace")
+
+
+def _parse_link_info(buf: bytes, pos: int) -> str:
+    """Ruta local o de red de la estructura LinkInfo."""
+    size, header, flags, _vol, base, net, suffix = struct.unpack_from("<7I", buf, pos)
+    base_u = suffix_u = 0
+    if header >= 0x24:
+        base_u, suffix_u = struct.unpack_from("<2I", buf, pos + 0x1C)
+    tail = _cstr(buf, pos + suffix_u, True) if suffix_u else _cstr(buf, pos + suffix)
+    if flags & 0x1:        # VolumeIDAndLocalBasePath
+        base_path = _cstr(buf, pos + base_u, True) if base_u else _cstr(buf, pos + base)
+        return ntpath.join(base_path, tail) if tail else base_path
+    if flags & 0x2:        # CommonNetworkRelativeLinkAndPathSuffix
+        npos = pos + net
+        _nsize, _nflags, net_name = struct.unpack_from("<3I", buf, npos)
+        share = _cstr(buf, npos + net_name)
+        if net_name > 0x14:
+            (net_name_u,) = struct.unpack_from("<I", buf, npos + 0x14)
+            share = _cstr(buf, npos + net_name_u, True)
+        return ntpath.join(share, tail) if tail else share
+    return ""
+
+
+def _file_entry_name(item: bytes) -> str:
+    """Nombre largo de un elemento de archivo/carpeta del IDList."""
+    # Nombre corto tras la cabecera fija (UTF-16 si el tipo trae 0x04), alineado a 2
+    if item[2] & 0x04:
+        name = _cstr(item, 14, True)
+        ext = 14 + 2 * len(name) + 2
+    else:
+        short_end = item.find(b"\0", 14)
+        if short_end < 0:
+            return ""
+        name = item[14:short_end].decode(_ANSI, "replace")
+        ext = short_end + 1 + ((short_end + 1) & 1)
+    # Bloque de extensión 0xBEEF0004: trae el nombre largo en UTF-16
+    while ext + 8 <= len(item):
+        ext_size, version, sig = struct.unpack_from("<HHI", item, ext)
+        if ext_size < 8:
+            break
+        if sig == 0xBEEF0004:
+            off = ext + 18
+            if version >= 7:
+                off += 18
+            if version >= 3:
+                off += 2
+            if version >= 9:
+                off += 4
+            if version >= 8:
+                off += 4
+            if off < ext + ext_size:
+                long_name = _cstr(item, off, True)
+                if long_name:
+                    return long_name
+            break
+        ext += ext_size
+    return name
+
+
+def _parse_id_list(buf: bytes, pos: int, end: int) -> str:
+    """Ruta de sistema de archivos de un IDList (unidad + carpetas + archivo)."""
+    parts: List[str] = []
+    while pos + 2 <= end:
+        (size,) = struct.unpack_from("<H", buf, pos)
+        if size < 3:
+            break
+        item = buf[pos:pos + size]
+        kind = item[2] & 0x70
+        if kind == 0x20 and len(item) > 6:             # unidad: "C:\"
+            parts = [_cstr(item, 3)]
+        elif kind == 0x30 and parts:                   # archivo o carpeta
+            name = _file_entry_name(item)
+            if not name:
+                return ""
+            parts.append(name)
+        pos += size
+    return ntpath.join(*parts) if parts else ""
+
+
+def parse_bytes(buf: bytes) -> LinkInfo:
+    """Interpreta el contenido de un .lnk (lanza LnkError si no lo es)."""
+    if len(buf) < _HEADER_SIZE or struct.unpack_from("<I", buf)[0] != _HEADER_SIZE \
+            or buf[4:20] != _LINK_CLSID:
+        raise LnkError("no es un Shell Link")
+    try:
+        (flags,) = struct.unpack_from("<I", buf, 0x14)
+        (icon_index,) = struct.unpack_from("<i", buf, 0x38)
+        pos = _HEADER_SIZE
+        target = ""
+        if flags & HAS_ID_LIST:
+            (size,) = struct.unpack_from("<H", buf, pos)
+            target = _parse_id_list(buf, pos + 2, pos + 2 + size)
+            pos += 2 + size
+        if flags & HAS_LINK_INFO:
+            (size,) = struct.unpack_from("<I", buf, pos)
+            target = _parse_link_info(buf, pos) or target
+            pos += size
+
+        unicode = bool(flags & IS_UNICODE)
+        strings: List[str] = []
+        for bit in (HAS_NAME, HAS_RELATIVE_PATH, HAS_WORKING_DIR, HAS_ARGUMENTS,
+                    HAS_ICON_LOCATION):
+            if not flags & bit:
+                strings.append("")
+                continue
+            (count,) = struct.unpack_from("<H", buf, pos)
+            pos += 2
+            nbytes = count * 2 if unicode else count
+            raw = buf[pos:pos + nbytes]
+            strings.append(raw.decode("utf-16-le" if unicode else _ANSI, "replace"))
+            pos += nbytes
+        description, relative, working_dir, arguments, icon = strings
+
+        advertised = bool(flags & HAS_DARWIN_ID)
+        env_target = env_icon = darwin = ""
+        while pos + 8 <= len(buf):
+            size, sig = struct.unpack_from("<II", buf, pos)
+            if size < 8:
+                break
+            if sig in (_ENV_BLOCK, _ICON_ENV_BLOCK) and size >= 0x314:
+                value = _cstr(buf, pos + 8 + 260, True) or _cstr(buf, pos + 8)
+                if sig == _ENV_BLOCK:
+                    env_target = value
+                else:
+                    env_icon = value
+            elif sig == _DARWIN_BLOCK:
+                advertised = True
+                if size >= 0x314:
+                    darwin = _cstr(buf, pos + 8 + 260, True) or _cstr(buf, pos + 8)
+            pos += size
+    except struct.error as e:
+        raise LnkError(f"truncado: {e}") from None
+
+    if flags & HAS_EXP_STRING and env_target:
+        target = ntpath.expandvars(env_target)
+    elif not target and relative:
+        target = relative
+    if flags & HAS_EXP_ICON and env_icon:
+        icon = env_icon
+    return LinkInfo(target, arguments, ntpath.expandvars(working_dir),
+                    ntpath.expandvars(icon), icon_index, description, advertised, darwin)
+
+
+def parse(path: str) -> LinkInfo:
+    """Lee y parsea un .lnk del disco (sin COM ni PowerShell)."""
+    with open(path, "rb") as fh:
+        buf = fh.read(MAX_SIZE)
+    info = parse_bytes(buf)
+    if info.target and not ntpath.isabs(info.target):
+        # Ruta relativa: respecto a la carpeta del propio .lnk
+        info = info._replace(target=ntpath.normpath(
+            ntpath.join(os.path.dirname(path), info.target)))
+    return info
+
+
+def try_parse(path: str) -> Optional[LinkInfo]:
+    """parse() que devuelve None si el archivo no se puede leer o no es válido."""
+    try:
+        return parse(path)
+    except (OSError, LnkError) as e:
+        logger.debug("No se pudo leer %s: %s", path, e)
+        return None
+
+
+def is_broken(info: Optional[LinkInfo]) -> bool:
+    """
+    True si el destino es una ruta local que ya no existe. Los accesos
+    anunciados, de red, de shell (sin ruta) o ilegibles no cuentan como rotos.
+    """
+    if info is None or info.advertised or not info.target:
+        return False
+    target = info.target
+    if target.startswith("\\\\") or "%" in target:
+        return False
+    return not os.path.exists(target)
+
+
+def app_group(info: Optional[LinkInfo], fallback: str = "") -> str:
+    """
+    Aplicación a la que pertenece un destino: la carpeta bajo Program
+    Files / Programs (p. ej. "Mozilla Firefox"), o el ejecutable.
+    """
+    if info is None or not info.target:
+        return fallback
+    parts = [p for p in ntpath.normpath(info.target).split("\\") if p]
+    lower = [p.lower() for p in parts]
+    for i, p in enumerate(lower[:-1]):
+        if p in ("program files", "program files (x86)", "programs") and i + 2 < len(parts):
+            return parts[i + 1]
+        if p == "windows" and i == 1:
+            return "Windows"
+    return ntpath.splitext(parts[-1])[0] if parts else fallback
+
+
+def dedupe_key(info: Optional[LinkInfo], path: str) -> Tuple[str, str]:
+    """
+    Clave para juntar accesos que abren lo mismo con nombres distintos.
+    Los anunciados apuntan al icono que comparten varios productos MSI:
+    se distinguen por su descriptor Darwin (o por su propia ruta).
+    """
+    if info is None or not info.target:
+        return (path.lower(), "")
+    if info.advertised:
+        if not info.darwin:
+            return (path.lower(), "")
+        return ("darwin:" + info.darwin.lower(), info.arguments.strip().lower())
+    return (ntpath.normcase(ntpath.normpath(info.target)), info.arguments.strip().lower())
@@ -0,0 +1,217 @@
+# utils/metrics.py
+
+from __future__ import annotations
+import os
+import json
+import math
+import time
+import logging
+import functools
+import threading
+import contextvars
+from collections import deque, defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from utils import profiling
+
+logger = logging.getLogger(__name__)
+
+# Referencia temporal común para todas las marcas (perf_counter)
+_T0 = time.perf_counter()
+_WALL0 = time.time()
+
+MAX_EVENTS = 20000        # eventos de traza guardados (los más antiguos se descartan)
+MAX_SAMPLES = 1000        # latencias guardadas por script
+
+_lock = threading.Lock()
+_events: deque[dict] = deque(maxlen=MAX_EVENTS)
+_invocations: deque[dict] = deque(maxlen=MAX_EVENTS)
+_latencies: Dict[str, deque[float]] = defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+_errors: Dict[str, int] = defaultdict(int)
+_bytes: Dict[str, int] = defaultdict(int)
+_threads: Dict[int, str] = {}
+# Pila de spans abiertos. Va en el contexto (no en el hilo) para que las
+# tareas asyncio la hereden solas y los hilos de trabajo con carry().
+_stack: contextvars.ContextVar[Tuple[str, ...]] = contextvars.ContextVar(
+    "labtool_span_stack", default=())
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+def _us(t: float) -> float:
+    """perf_counter → microsegundos desde el arranque (formato Chrome trace)."""
+    return round((t - _T0) * 1_000_000, 1)
+
+
+def carry(fn: _F) -> _F:
+    """
+    Envuelve fn para ejecutarla en otro hilo (Thread, executor) con los
+    spans abiertos de quien la crea: lo que haga queda atribuido a la
+    acción que la lanzó (y se perfila con ella si se está perfilando).
+    Cada llamada usa su propia copia del contexto, así que sirve también
+    para pool.map/submit concurrentes.
+    """
+    ctx = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def run(*args: Any, **kwargs: Any) -> Any:
+        return ctx.copy().run(_in_worker, fn, args, kwargs)
+    return run  # type: ignore[return-value]
+
+
+def _in_worker(fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+    with profiling.worker_scope():
+        return fn(*args, **kwargs)
+
+
+def current_span() -> Optional[str]:
+    """Span abierto más interno en este contexto (o None)."""
+    stack = _stack.get()
+    return stack[-1] if stack else None
+
+
+def _add_event(name: str, cat: str, start: float, end: float, args: Optional[dict] = None) -> None:
+    tid = threading.get_ident()
+    with _lock:
+        _threads.setdefault(tid, threading.current_thread().name)
+        _events.append({
+            "name": name, "cat": cat, "ph": "X",
+            "ts": _us(start), "dur": round((end - start) * 1_000_000, 1),
+            "pid": os.getpid(), "tid": tid,
+            "args": args or {},
+        })
+
+
+@contextmanager
+def span(name: str, cat: str = "python", **args: Any) -> Iterator[dict]:
+    """
+    Marca un tramo de trabajo (p. ej. una acción de la interfaz). Las
+    invocaciones de PowerShell hechas dentro quedan anidadas bajo él en la
+    traza: en el mismo hilo, en tareas asyncio y en los hilos lanzados con
+    carry(). El dict devuelto admite args extra.
+    """
+    parent = current_span()
+    token = _stack.set(_stack.get() + (name,))
+    start = time.perf_counter()
+    try:
+        yield args
+    finally:
+        end = time.perf_counter()
+        _stack.reset(token)
+        if parent:
+            args.setdefault("parent", parent)
+        _add_event(name, cat, start, end, args)
+
+
+def record_invocation(
+    script: str,
+    mode: str,
+    t_start: float,
+    t_resolved: float,
+    t_spawned: float,
+    t_end: float,
+    out_bytes: int,
+    exit_code: int,
+) -> None:
+    """
+    Registra una invocación de PowerShell. Las marcas son perf_counter():
+    inicio, intérprete/script resueltos, proceso lanzado y fin.
+    """
+    name = os.path.basename(script) or script
+    total = t_end - t_start
+    info = {
+        "script": name,
+        "mode": mode,
+        "time": _WALL0 + (t_start - _T0),
+        "resolve_s": t_resolved - t_start,
+        "spawn_s": t_spawned - t_resolved,
+        "exec_s": t_end - t_spawned,
+        "total_s": total,
+        "out_bytes": out_bytes,
+        "exit_code": exit_code,
+        "parent": current_span(),
+    }
+    with _lock:
+        _invocations.append(info)
+        _latencies[name].append(total)
+        _bytes[name] += out_bytes
+        if exit_code != 0:
+            _errors[name] += 1
+
+    args = {"mode": mode, "exit_code": exit_code, "out_bytes": out_bytes}
+    if info["parent"]:
+        args["parent"] = info["parent"]
+    _add_event(f"ps:{name}", "powershell", t_start, t_end, args)
+    _add_event("resolve", "powershell", t_start, t_resolved)
+    _add_event("spawn", "powershell", t_resolved, t_spawned)
+    _add_event("exec", "powershell", t_spawned, t_end)
+
+
+def _percentile(sorted_vals: List[float], pct: float) -> float:
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    if not sorted_vals:
+        return 0.0
+    k = max(0, min(len(sorted_vals) - 1, math.ceil(pct / 100 * len(sorted_vals)) - 1))
+    return sorted_vals[k]
+
+
+def summary() -> List[dict]:
+    """
+    Histograma resumido por script: [{script, count, p50, p95, max,
+    errors, out_bytes}], ordenado por tiempo total descendente.
+    """
+    with _lock:
+        data = {name: sorted(vals) for name, vals in _latencies.items()}
+        errors = dict(_errors)
+        out_bytes = dict(_bytes)
+    rows = [
+        {
+            "script": name,
+            "count": len(vals),
+            "p50": _percentile(vals, 50),
+            "p95": _percentile(vals, 95),
+            "max": vals[-1] if vals else 0.0,
+            "total": sum(vals),
+            "errors": errors.get(name, 0),
+            "out_bytes": out_bytes.get(name, 0),
+        }
+        for name, vals in data.items()
+    ]
+    return sorted(rows, key=lambda r: r["total"], reverse=True)
+
+
+def invocations() -> List[dict]:
+    """Copia de las últimas invocaciones registradas (más antigua primero)."""
+    with _lock:
+        return list(_invocations)
+
+
+def export_trace(path: str) -> int:
+    """
+    Escribe la traza en formato Chrome/Perfetto (JSON “traceEvents”).
+    Devuelve el número de eventos exportados.
+    """
+    with _lock:
+        events = list(_events)
+        threads = dict(_threads)
+    pid = os.getpid()
+    meta = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": "LabTool"}}]
+    meta += [
+        {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": tname}}
+        for tid, tname in threads.items()
+    ]
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({"traceEvents": meta + events, "displayTimeUnit": "ms"}, fh)
+    logger.info("Traza exportada (%s eventos): %s", len(events), path)
+    return len(events)
+
+
+def reset() -> None:
+    """Vacía el registro."""
+    with _lock:
+        _events.clear()
+        _invocations.clear()
+        _latencies.clear()
+        _errors.clear()
+        _bytes.clear()
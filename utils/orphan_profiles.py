@@ -0,0 +1,114 @@
+# utils/orphan_profiles.py
+
+from __future__ import annotations
+import os
+import time
+import logging
+import threading
+from typing import List, Optional, Tuple
+
+from utils import user_inventory
+from utils.tombstones import TOMBSTONE_DIR
+
+logger = logging.getLogger(__name__)
+
+USERS_DIR = os.path.join(os.environ.get("SystemDrive", "C:") + os.sep, "Users")
+
+# Carpetas de C:\Users que nunca son perfiles de alumnos
+SYSTEM_FOLDERS = {
+    "public", "default", "default user", "all users", "defaultapppool",
+    "wdagutilityaccount", os.path.basename(TOMBSTONE_DIR).lower(),
+}
+_FILE_ATTRIBUTE_REPARSE_POINT = 0x400
+_FILE_ATTRIBUTE_SYSTEM = 0x4
+
+_lock = threading.Lock()
+# (generación del inventario, mtime de USERS_DIR, marca) → huérfanos
+_cache: Optional[Tuple[int, int, float, List[str]]] = None
+
+
+def _candidate_dirs(users_dir: str) -> List[os.DirEntry]:
+    out = []
+    with os.scandir(users_dir) as it:
+        for entry in it:
+            try:
+                if entry.is_symlink() or not entry.is_dir(follow_symlinks=False):
+                    continue
+                if entry.name.lower() in SYSTEM_FOLDERS or entry.name.startswith("."):
+                    continue
+                if os.name == "nt":
+                    attrs = entry.stat(follow_symlinks=False).st_file_attributes
+                    if attrs & (_FILE_ATTRIBUTE_REPARSE_POINT | _FILE_ATTRIBUTE_SYSTEM):
+                        continue
+            except OSError:
+                continue
+            out.append(entry)
+    return out
+
+
+def _machine_prefix(sids: List[str]) -> str:
+    """S-1-5-21-a-b-c de las cuentas locales (sin el RID final)."""
+    for sid in sids:
+        if sid.startswith("S-1-5-21-"):
+            return sid.rsplit("-", 1)[0]
+    return ""
+
+
+def detect(users_dir: str = USERS_DIR, max_age: float = user_inventory.DEFAULT_TTL) -> List[str]:
+    """
+    Carpetas de users_dir que son restos de perfiles (rutas completas):
+      • no son el perfil de ninguna cuenta local existente ni se llaman
+        como una de ellas, y
+      • o no están registradas en ProfileList, o lo están con un SID
+        local cuya cuenta ya no existe (y su hive no está cargado).
+    Los perfiles de dominio (otro prefijo de SID) nunca se consideran
+    huérfanos. Se excluyen Public, Default, enlaces y carpetas de sistema.
+    """
+    users = user_inventory.get_users(max_age)
+    if not users:
+        return []   # sin inventario no se puede decidir nada con seguridad
+    profiles = user_inventory.get_profiles(max_age)
+
+    norm = lambda p: os.path.normcase(os.path.abspath(p))
+    account_paths = {norm(u.profile_path) for u in users if u.profile_path}
+    account_names = {u.name.lower() for u in users}
+    account_sids = {u.sid for u in users if u.sid}
+    local_prefix = _machine_prefix(sorted(account_sids))
+    registered = {norm(p.path): p for p in profiles if p.path}
+
+    orphans: List[str] = []
+    for entry in _candidate_dirs(users_dir):
+        path = norm(entry.path)
+        if path in account_paths or entry.name.lower() in account_names:
+            continue
+        prof = registered.get(path)
+        if prof is not None:
+            if prof.loaded or prof.sid in account_sids:
+                continue
+            if not local_prefix or prof.sid.rsplit("-", 1)[0] != local_prefix:
+                continue   # perfil de dominio u otro equipo: no tocar
+        orphans.append(entry.path)
+    return sorted(orphans, key=str.lower)
+
+
+def orphans(users_dir: str = USERS_DIR, max_age: float = user_inventory.DEFAULT_TTL) -> List[str]:
+    """
+    detect() con caché: se recalcula solo si cambió el inventario de
+    cuentas, cambió la carpeta users_dir (mtime) o pasaron max_age segundos.
+    Pensado para llamarse en cada refresh() de la ventana principal.
+    """
+    global _cache
+    try:
+        mtime = os.stat(users_dir).st_mtime_ns
+    except OSError:
+        return []
+    gen = user_inventory.generation()
+    with _lock:
+        if _cache and _cache[:2] == (gen, mtime) and time.monotonic() - _cache[2] < max_age:
+            return list(_cache[3])
+    start = time.perf_counter()
+    found = detect(users_dir, max_age)
+    logger.debug("Perfiles huérfanos: %s en %.3fs", len(found), time.perf_counter() - start)
+    with _lock:
+        _cache = (gen, mtime, time.monotonic(), found)
+    return list(found)
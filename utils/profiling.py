@@ -0,0 +1,197 @@
+# utils/profiling.py
+
+from __future__ import annotations
+import io
+import os
+import re
+import time
+import pstats
+import logging
+import cProfile
+import threading
+import contextvars
+import tracemalloc
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_ENV = "LABTOOL_PROFILE"          # 1 = perfilar todas las acciones
+PROFILE_TOP_ENV = "LABTOOL_PROFILE_TOP"  # nº de funciones / asignaciones en el log
+PROFILE_DIR: Optional[str] = None        # None = "profiles" junto a labtool.log
+
+_enabled = os.environ.get(PROFILE_ENV, "").strip().lower() in ("1", "true", "yes", "si", "sí")
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def set_enabled(flag: bool) -> None:
+    """Activa/desactiva el perfilado (p. ej. desde el menú Ayuda)."""
+    global _enabled
+    _enabled = bool(flag)
+    logger.info("Perfilado de acciones %s", "activado" if _enabled else "desactivado")
+
+
+def profile_dir() -> str:
+    """Carpeta de los perfiles: PROFILE_DIR o "profiles" junto al log de LabTool."""
+    if PROFILE_DIR:
+        return PROFILE_DIR
+    for handler in logging.getLogger().handlers:
+        path = getattr(handler, "baseFilename", "")
+        if os.path.basename(path).lower() == "labtool.log":
+            return os.path.join(os.path.dirname(path), "profiles")
+    return os.path.abspath("profiles")
+
+
+# tracemalloc es global: varias acciones perfiladas a la vez lo comparten y
+# solo se para cuando acaba la última (y solo si lo arrancamos nosotros).
+_trace_lock = threading.Lock()
+_trace_users = 0
+_trace_owned = False
+
+
+def _trace_acquire() -> tracemalloc.Snapshot:
+    global _trace_users, _trace_owned
+    with _trace_lock:
+        if _trace_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(25)
+            _trace_owned = True
+        _trace_users += 1
+        return tracemalloc.take_snapshot()
+
+
+def _trace_release() -> None:
+    global _trace_users, _trace_owned
+    with _trace_lock:
+        _trace_users -= 1
+        if _trace_users == 0 and _trace_owned:
+            tracemalloc.stop()
+            _trace_owned = False
+
+
+def _top_n() -> int:
+    try:
+        return max(1, int(os.environ.get(PROFILE_TOP_ENV, "15")))
+    except ValueError:
+        return 15
+
+
+class _Session:
+    """
+    Perfilado de una acción: un cProfile por hilo que trabaja para ella
+    (el de la interfaz y los lanzados con metrics.carry) y un único
+    informe cuando termina el último, no cuando vuelve la interfaz.
+    """
+
+    def __init__(self, name: str, base: str):
+        self.name = name
+        self.base = base
+        self.before = _trace_acquire()
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._holders = 0
+        self._profiles: List[cProfile.Profile] = []
+
+    @contextmanager
+    def thread(self, warn: bool = False) -> Iterator[None]:
+        """Perfila el hilo actual mientras dure el bloque."""
+        with self._lock:
+            self._holders += 1
+        prof: Optional[cProfile.Profile] = cProfile.Profile()
+        try:
+            prof.enable()
+        except ValueError:  # otro perfilador ya activo (en 3.12+ es uno por proceso)
+            if warn:
+                logger.warning("No se pudo perfilar '%s': hay otro perfilador activo", self.name)
+            prof = None
+        try:
+            yield
+        finally:
+            if prof is not None:
+                prof.disable()
+            with self._lock:
+                if prof is not None:
+                    self._profiles.append(prof)
+                self._holders -= 1
+                last = self._holders == 0
+            if last:
+                self._finish()
+
+    def _finish(self) -> None:
+        elapsed = time.perf_counter() - self.start
+        try:
+            _report(self.name, self.base, self._profiles, self.before, elapsed)
+        except Exception:
+            logger.exception("No se pudo guardar el perfil de '%s'", self.name)
+        finally:
+            _trace_release()
+
+
+_session: contextvars.ContextVar[Optional[_Session]] = contextvars.ContextVar(
+    "labtool_profile", default=None)
+
+
+@contextmanager
+def profile_action(name: str) -> Iterator[None]:
+    """
+    Si el perfilado está activo, ejecuta el bloque bajo cProfile y
+    tracemalloc y deja en profile_dir():
+      • <accion>_<fecha>.prof  (abrir con snakeviz / pstats)
+      • <accion>_<fecha>.mem   (tracemalloc.Snapshot.load)
+    Además escribe en el log las funciones más costosas y los mayores
+    asignadores de memoria. Los hilos de trabajo lanzados con
+    metrics.carry() se perfilan también y el informe se escribe cuando
+    acaba el último, con todos los hilos juntos.
+    """
+    if not _enabled:
+        yield
+        return
+
+    slug = re.sub(r"[^\w-]+", "_", name).strip("_") or "accion"
+    base = os.path.join(profile_dir(), f"{slug}_{time.strftime('%Y%m%d-%H%M%S')}")
+    sess = _Session(name, base)
+    token = _session.set(sess)
+    try:
+        with sess.thread(warn=True):
+            yield
+    finally:
+        _session.reset(token)
+
+
+@contextmanager
+def worker_scope() -> Iterator[None]:
+    """Perfila el hilo actual si trabaja para una acción perfilada."""
+    sess = _session.get()
+    if sess is None:
+        yield
+        return
+    with sess.thread():
+        yield
+
+
+def _report(name: str, base: str, profiles: List[cProfile.Profile],
+            before: tracemalloc.Snapshot, elapsed: float) -> None:
+    snap = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    snap.dump(base + ".mem")
+    top = _top_n()
+
+    if profiles:
+        buf = io.StringIO()
+        stats = pstats.Stats(*profiles, stream=buf)
+        stats.dump_stats(base + ".prof")
+        stats.sort_stats("cumulative").print_stats(top)
+        logger.info("Perfil de '%s' (%.2fs, %s hilo(s)) → %s.prof\n%s",
+                    name, elapsed, len(profiles), base, buf.getvalue())
+
+    ignore = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    )
+    diff = snap.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+    lines = [f"  {stat}" for stat in diff[:top]]
+    logger.info("Memoria de '%s': pico %.1f KiB → %s.mem\n%s",
+                name, peak / 1024, base, "\n".join(lines))
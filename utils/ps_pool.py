@@ -0,0 +1,354 @@
+# utils/ps_pool.py
+
+from __future__ import annotations
+import os
+import json
+import queue
+import base64
+import logging
+import itertools
+import threading
+import subprocess
+from typing import Callable, Tuple, List, Optional, Mapping, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Prefijo de las líneas de respuesta del host; cualquier otra línea en stdout
+# (p. ej. procesos hijos que escriben directo en la consola) se trata como
+# salida “suelta” del script en curso.
+FRAME_PREFIX = "##LABTOOL-FRAME "
+
+# Bucle del host: lee una petición JSON por línea en stdin, ejecuta el .ps1
+# capturando todos los streams y responde con una línea enmarcada en stdout.
+# Con "stream" en la petición, la salida normal se escribe al momento (línea
+# a línea, sin marco) en vez de ir en la respuesta.
+_HOST_SCRIPT = r"""
+$ErrorActionPreference = 'Continue'
+$ProgressPreference    = 'SilentlyContinue'
+[Console]::InputEncoding  = New-Object System.Text.UTF8Encoding $false
+[Console]::OutputEncoding = New-Object System.Text.UTF8Encoding $false
+$stdin = [Console]::In
+while ($true) {
+    $line = $stdin.ReadLine()
+    if ($null -eq $line) { break }
+    if (-not $line.Trim()) { continue }
+    $req  = $line | ConvertFrom-Json
+    $out  = New-Object System.Text.StringBuilder
+    $err  = New-Object System.Text.StringBuilder
+    $code = 0
+    if (-not $req.ping) {
+        $prevLocation = Get-Location
+        $prevEnv = @{}
+        try {
+            if ($req.cwd) { Set-Location -LiteralPath $req.cwd }
+            if ($req.env) {
+                foreach ($p in $req.env.PSObject.Properties) {
+                    $prevEnv[$p.Name] = [Environment]::GetEnvironmentVariable($p.Name)
+                    [Environment]::SetEnvironmentVariable($p.Name, [string]$p.Value)
+                }
+            }
+            $argv = @()
+            if ($req.args) { $argv = @($req.args) }
+            $global:LASTEXITCODE = 0
+            & $req.script @argv 2>&1 3>&1 4>&1 6>&1 | ForEach-Object {
+                if ($_ -is [System.Management.Automation.ErrorRecord]) {
+                    [void]$err.AppendLine($_.ToString())
+                }
+                elseif ($_ -is [System.Management.Automation.WarningRecord]) {
+                    [void]$out.AppendLine('ADVERTENCIA: ' + $_.Message)
+                }
+                elseif ($req.stream) {
+                    [Console]::Out.WriteLine("$_")
+                    [Console]::Out.Flush()
+                }
+                else {
+                    [void]$out.AppendLine("$_")
+                }
+            }
+            if ($global:LASTEXITCODE) { $code = [int]$global:LASTEXITCODE }
+        }
+        catch {
+            [void]$err.AppendLine($_.ToString())
+            $code = 1
+        }
+        finally {
+            foreach ($k in $prevEnv.Keys) {
+                [Environment]::SetEnvironmentVariable($k, $prevEnv[$k])
+            }
+            Set-Location -LiteralPath $prevLocation
+        }
+    }
+    $resp = @{ id = $req.id; stdout = $out.ToString(); stderr = $err.ToString(); code = $code }
+    [Console]::Out.WriteLine('##LABTOOL-FRAME ' + ($resp | ConvertTo-Json -Compress))
+    [Console]::Out.Flush()
+}
+"""
+
+
+def _encoded_command(script: str) -> str:
+    """Codifica un script para -EncodedCommand (Base64 de UTF-16LE)."""
+    return base64.b64encode(script.encode("utf-16-le")).decode("ascii")
+
+
+class PowerShellHost:
+    """
+    Proceso PowerShell de larga duración que ejecuta scripts bajo demanda.
+
+    Protocolo: una petición JSON por línea en stdin y una respuesta por línea
+    en stdout precedida de FRAME_PREFIX. Las peticiones son secuenciales:
+    un host solo atiende una invocación a la vez.
+    """
+
+    def __init__(self, exe: str):
+        self.exe = exe
+        self._proc: Optional[subprocess.Popen] = None
+        self._frames: "queue.Queue[Optional[dict]]" = queue.Queue()
+        self._stray: List[str] = []
+        self._on_line: Optional[Callable[[str], None]] = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    # ——— Ciclo de vida ———
+    def start(self) -> None:
+        """Arranca el proceso y los hilos lectores."""
+        cmd = [
+            self.exe,
+            "-NoProfile",
+            "-NonInteractive",
+            "-ExecutionPolicy", "Bypass",
+            "-EncodedCommand", _encoded_command(_HOST_SCRIPT),
+        ]
+        self._proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+        threading.Thread(target=self._read_stdout, daemon=True).start()
+        threading.Thread(target=self._drain_stderr, daemon=True).start()
+        logger.debug("Host PowerShell iniciado (pid=%s)", self._proc.pid)
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def close(self, wait: float = 2.0) -> None:
+        """Cierra stdin para terminar el bucle; si no sale a tiempo, lo mata."""
+        proc = self._proc
+        if proc is None:
+            return
+        try:
+            if proc.stdin:
+                proc.stdin.close()
+            proc.wait(timeout=wait)
+        except Exception:
+            self.kill()
+
+    def kill(self) -> None:
+        proc = self._proc
+        if proc is not None and proc.poll() is None:
+            try:
+                proc.kill()
+                proc.wait(timeout=5)
+            except Exception:
+                logger.exception("No se pudo terminar el host PowerShell")
+
+    # ——— Lectura ———
+    def _read_stdout(self) -> None:
+        assert self._proc and self._proc.stdout
+        for line in self._proc.stdout:
+            if line.startswith(FRAME_PREFIX):
+                try:
+                    self._frames.put(json.loads(line[len(FRAME_PREFIX):]))
+                except ValueError:
+                    logger.error("Respuesta mal formada del host: %r", line)
+            else:
+                on_line = self._on_line
+                if on_line is not None:
+                    on_line(line.rstrip("\r\n"))
+                else:
+                    self._stray.append(line.rstrip("\r\n"))
+        self._frames.put(None)  # EOF: el host murió
+
+    def _drain_stderr(self) -> None:
+        assert self._proc and self._proc.stderr
+        for line in self._proc.stderr:
+            self._stray.append(line.rstrip("\r\n"))
+
+    # ——— Peticiones ———
+    def _request(self, payload: dict, timeout: Optional[float]) -> dict:
+        if not self.alive:
+            raise RuntimeError("El host PowerShell no está activo.")
+        req_id = next(self._ids)
+        payload = dict(payload, id=req_id)
+        assert self._proc and self._proc.stdin
+        self._stray.clear()
+        self._proc.stdin.write(json.dumps(payload) + "\n")
+        self._proc.stdin.flush()
+        while True:
+            frame = self._frames.get(timeout=timeout)
+            if frame is None:
+                raise RuntimeError("El host PowerShell terminó inesperadamente.")
+            if frame.get("id") == req_id:
+                return frame
+
+    def ping(self, timeout: float = 60) -> None:
+        """Espera a que el host haya arrancado y responda."""
+        with self._lock:
+            self._request({"ping": True}, timeout)
+
+    def invoke(
+        self,
+        path: str,
+        args: Sequence[str] = (),
+        cwd: Optional[str] = None,
+        env: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = 300,
+        on_line: Optional[Callable[[str], None]] = None,
+    ) -> Tuple[str, str, int]:
+        """
+        Ejecuta un .ps1 dentro del host y devuelve (stdout, stderr, exit_code).
+        Con on_line, cada línea de salida normal se entrega al llegar (desde
+        el hilo lector) y no vuelve en stdout. Si vence el timeout el host
+        se mata (queda inservible).
+        """
+        cwd = cwd or os.getcwd()
+        payload = {
+            "script": os.path.abspath(os.path.join(cwd, path)),
+            "args": [str(a) for a in args],
+            "cwd": cwd,
+            "env": dict(env) if env else None,
+            "stream": on_line is not None,
+        }
+        with self._lock:
+            self._on_line = on_line
+            try:
+                frame = self._request(payload, timeout)
+            except queue.Empty:
+                self.kill()
+                return "", f"Timeout: el script superó {timeout}s", 1
+            finally:
+                self._on_line = None
+            stray = "\n".join(self._stray)
+        stdout = frame.get("stdout") or ""
+        if stray:
+            stdout = f"{stray}\n{stdout}" if stdout else stray
+        return stdout.strip(), (frame.get("stderr") or "").strip(), int(frame.get("code") or 0)
+
+
+class PowerShellPool:
+    """
+    Pool de hosts PowerShell reutilizables con un máximo de hosts simultáneos.
+
+    Los hosts se crean bajo demanda y se devuelven al pool tras cada
+    invocación; los que mueren (timeout, crash) se descartan.
+    """
+
+    def __init__(self, exe: str, max_hosts: int = 2):
+        self.exe = exe
+        self.max_hosts = max(1, max_hosts)
+        self._slots = threading.BoundedSemaphore(self.max_hosts)
+        self._idle: List[PowerShellHost] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _spawn(self) -> PowerShellHost:
+        host = PowerShellHost(self.exe)
+        host.start()
+        return host
+
+    def _checkout(self) -> PowerShellHost:
+        with self._lock:
+            while self._idle:
+                host = self._idle.pop()
+                if host.alive:
+                    return host
+        return self._spawn()
+
+    def _checkin(self, host: PowerShellHost) -> None:
+        with self._lock:
+            if host.alive and not self._closed:
+                self._idle.append(host)
+                return
+        host.close(wait=0.5)
+
+    def invoke(
+        self,
+        path: str,
+        args: Sequence[str] = (),
+        cwd: Optional[str] = None,
+        env: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = 300,
+        on_line: Optional[Callable[[str], None]] = None,
+    ) -> Tuple[str, str, int]:
+        """Ejecuta el script en un host libre (bloquea si todos están ocupados)."""
+        with self._slots:
+            host = self._checkout()
+            try:
+                return host.invoke(path, args, cwd=cwd, env=env, timeout=timeout,
+                                   on_line=on_line)
+            finally:
+                self._checkin(host)
+
+    def invoke_batch(
+        self,
+        invocations: Sequence[Tuple[str, Sequence[str]]],
+        cwd: Optional[str] = None,
+        env: Optional[Mapping[str, str]] = None,
+        timeout: Optional[float] = 300,
+    ) -> List[Tuple[str, str, int]]:
+        """
+        Ejecuta varias invocaciones (script, args) seguidas en un mismo host.
+        Un fallo (o un host que muere) solo afecta a su entrada: para las
+        siguientes se arranca un host nuevo.
+        """
+        results: List[Tuple[str, str, int]] = []
+        with self._slots:
+            host: Optional[PowerShellHost] = None
+            try:
+                for path, args in invocations:
+                    try:
+                        if host is None or not host.alive:
+                            host = self._checkout() if host is None else self._spawn()
+                        results.append(host.invoke(path, args, cwd=cwd, env=env, timeout=timeout))
+                    except Exception as e:
+                        logger.exception("Invocación en lote falló: %s", path)
+                        results.append(("", str(e), 1))
+            finally:
+                if host is not None:
+                    self._checkin(host)
+        return results
+
+    def prewarm(self) -> threading.Thread:
+        """Arranca un host en segundo plano y espera su primera respuesta."""
+        def _warm():
+            if not self._slots.acquire(blocking=False):
+                return  # pool ya ocupado: no hace falta calentar
+            host = None
+            try:
+                host = self._spawn()
+                host.ping()
+                logger.debug("Host PowerShell precalentado.")
+            except Exception:
+                logger.exception("No se pudo precalentar el host PowerShell")
+            finally:
+                if host is not None:
+                    self._checkin(host)
+                self._slots.release()
+
+        th = threading.Thread(target=_warm, name="ps-prewarm", daemon=True)
+        th.start()
+        return th
+
+    def close(self) -> None:
+        """Cierra todos los hosts inactivos."""
+        with self._lock:
+            self._closed = True
+            hosts, self._idle = self._idle, []
+        for host in hosts:
+            host.close()
@@ -0,0 +1,243 @@
+# utils/replace_pipeline.py
+
+from __future__ import annotations
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils import metrics, tombstones
+from utils.run_powershell import run_powershell_script
+
+logger = logging.getLogger(__name__)
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+PS_DIR = os.path.abspath(os.path.join(BASE_DIR, os.pardir, "powershell"))
+
+RETIRE_SCRIPT = os.path.join(PS_DIR, "cerrar_sesion.ps1")
+CREATE_SCRIPT = os.path.join(PS_DIR, "crear_usuario.ps1")
+DELETE_SCRIPT = os.path.join(PS_DIR, "borrar_usuario_completo.ps1")
+RESTORE_SCRIPT = os.path.join(PS_DIR, "habilitar_usuario.ps1")
+
+# Etapas por par (en orden de aparición en el resumen)
+STAGE_LABELS = {
+    "retire":   "Cerrar y deshabilitar",
+    "create":   "Crear nueva",
+    "delete":   "Borrar antigua",
+    "rollback": "Deshacer",
+    "discard":  "Quitar nueva a medias",
+}
+# crear_usuario.ps1: falló y la cuenta a medio crear sigue existiendo
+CREATE_LEFT_BEHIND = 2
+STATE_LABELS = {
+    "queued":      "En cola",
+    "running":     "Cerrando sesión y creando cuenta",
+    "deleting":    "Borrando cuenta antigua",
+    "rolling":     "Deshaciendo",
+    "done":        "Hecho",
+    "rolled_back": "Revertido",
+    "failed":      "Error",
+}
+FINAL_STATES = ("done", "rolled_back", "failed")
+
+
+class ReplaceJob:
+    """Estado del reemplazo de una cuenta por otra."""
+
+    __slots__ = ("old", "new", "state", "detail", "timings", "started", "finished")
+
+    def __init__(self, old: str, new: str):
+        self.old = old
+        self.new = new
+        self.state = "queued"
+        self.detail = ""
+        self.timings: Dict[str, float] = {}   # etapa → segundos
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.old}→{self.new}"
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def label(self) -> str:
+        return STATE_LABELS.get(self.state, self.state)
+
+    def timings_text(self) -> str:
+        return ", ".join(f"{STAGE_LABELS[s]} {t:.1f}s"
+                         for s, t in self.timings.items())
+
+
+class ReplacePipeline:
+    """
+    Reemplaza pares (antigua, nueva) por etapas:
+
+      1. En paralelo: deshabilitar la antigua + cerrar sus sesiones, y
+         crear la nueva (no dependen una de otra).
+      2. Si la creación falla, se vuelve a habilitar la antigua: queda
+         como estaba, nunca a medio borrar. Si la nueva quedó a medio
+         crear (crear_usuario.ps1 no pudo quitarla), se borra.
+      3. Si no, se borra la cuenta antigua; su carpeta de perfil se aparta
+         y la borra el recolector de tombstones mientras siguen los demás
+         pares.
+
+    Varios pares se procesan a la vez con `workers` trabajadores; cada
+    cambio se notifica con on_update(ReplaceJob) desde el hilo trabajador.
+    """
+
+    def __init__(
+        self,
+        pairs: Sequence[Tuple[str, str]],
+        workers: int = 2,
+        on_update: Optional[Callable[[ReplaceJob], None]] = None,
+        defer_profile: bool = True,
+        timeout: int = 1800,
+    ):
+        self.jobs: List[ReplaceJob] = [ReplaceJob(o, n) for o, n in pairs]
+        self.workers = max(1, workers)
+        self.on_update = on_update
+        self.defer_profile = defer_profile
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.started = 0.0
+        self.finished: Optional[float] = None
+
+    # ——— Ejecución ———
+    def start(self) -> None:
+        """Lanza los reemplazos en segundo plano y vuelve enseguida."""
+        self.started = time.monotonic()
+        self._thread = threading.Thread(target=metrics.carry(self._run), name="replace-pipeline", daemon=True)
+        self._thread.start()
+
+    def run(self) -> List[ReplaceJob]:
+        """Reemplazo bloqueante; devuelve los estados finales."""
+        self.started = time.monotonic()
+        self._run()
+        return list(self.jobs)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.done
+
+    @property
+    def done(self) -> bool:
+        return self.finished is not None
+
+    def _run(self) -> None:
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="replace") as pool:
+            list(pool.map(metrics.carry(self._replace_one), self.jobs))
+        self.finished = time.monotonic()
+        ok = sum(1 for j in self.jobs if j.state == "done")
+        logger.info("Reemplazo por etapas: %s/%s pares en %.1fs",
+                    ok, len(self.jobs), self.finished - self.started)
+
+    def _set(self, job: ReplaceJob, state: str, detail: str = "") -> None:
+        with self._lock:
+            job.state = state
+            if detail:
+                job.detail = detail
+            if state in FINAL_STATES:
+                job.finished = time.monotonic()
+        self._notify(job)
+
+    def _notify(self, job: ReplaceJob) -> None:
+        if self.on_update:
+            try:
+                self.on_update(job)
+            except Exception:
+                logger.exception("on_update falló")
+
+    def _stage(self, job: ReplaceJob, stage: str, script: str, *args: str) -> Tuple[bool, str, int]:
+        """Ejecuta una etapa y guarda su duración; devuelve (ok, mensaje, código)."""
+        start = time.monotonic()
+        try:
+            with metrics.span(f"replace:{stage}", cat="stage", old=job.old, new=job.new):
+                out, err, code = run_powershell_script(script, *args, timeout=self.timeout)
+        except Exception as e:
+            out, err, code = "", str(e), 1
+        with self._lock:
+            job.timings[stage] = time.monotonic() - start
+        msg = err.strip() or out.strip() or f"Exit code {code}"
+        if code != 0:
+            logger.error("Etapa %s de %s falló → %s", stage, job.key, msg)
+        self._notify(job)
+        return code == 0, msg, code
+
+    def _replace_one(self, job: ReplaceJob) -> None:
+        job.started = time.monotonic()
+        self._set(job, "running")
+
+        # 1) Retirar la antigua y crear la nueva a la vez
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix="replace-stage") as ex:
+            f_retire = ex.submit(metrics.carry(self._stage), job, "retire",
+                                 RETIRE_SCRIPT, "-Username", job.old, "-Disable")
+            f_create = ex.submit(metrics.carry(self._stage), job, "create",
+                                 CREATE_SCRIPT, "-Username", job.new, "-NoPassword", "-NeverExpire")
+            retired, retire_msg, _ = f_retire.result()
+            created, create_msg, create_code = f_create.result()
+
+        # 2) Si no se pudo crear la nueva, la antigua vuelve a su estado y
+        #    la nueva no se deja a medias
+        if not created:
+            problems = []
+            if retired or create_code == CREATE_LEFT_BEHIND:
+                self._set(job, "rolling")
+            if retired:
+                restored, restore_msg, _ = self._stage(job, "rollback",
+                                                       RESTORE_SCRIPT, "-Username", job.old)
+                if not restored:
+                    problems.append(f"y '{job.old}' quedó deshabilitada: {restore_msg}")
+            if create_code == CREATE_LEFT_BEHIND:
+                discarded, discard_msg, _ = self._stage(job, "discard", DELETE_SCRIPT,
+                                                        "-Username", job.new, "-Force")
+                if not discarded:
+                    problems.append(f"y '{job.new}' quedó a medio crear: {discard_msg}")
+            if problems:
+                self._set(job, "failed",
+                          f"No se pudo crear '{job.new}': {create_msg}\n" + "\n".join(problems))
+                return
+            self._set(job, "rolled_back", f"No se pudo crear '{job.new}': {create_msg}")
+            return
+        if not retired:
+            # La cuenta nueva ya existe; el borrado cierra sesiones igualmente
+            logger.warning("No se pudo deshabilitar %s antes de borrarla: %s", job.old, retire_msg)
+
+        # 3) Borrar la antigua (perfil apartado para el recolector)
+        self._set(job, "deleting")
+        args = ["-Username", job.old, "-Force"]
+        if self.defer_profile:
+            args += ["-TombstoneDir", tombstones.TOMBSTONE_DIR]
+        deleted, delete_msg, _ = self._stage(job, "delete", DELETE_SCRIPT, *args)
+        if self.defer_profile:
+            tombstones.wake()
+        if not deleted:
+            self._set(job, "failed",
+                      f"'{job.new}' creada, pero no se pudo borrar '{job.old}': {delete_msg}")
+            return
+        logger.info("Usuario '%s' reemplazado por '%s' (%.1fs: %s)",
+                    job.old, job.new, job.elapsed, job.timings_text())
+        self._set(job, "done")
+
+    # ——— Resumen ———
+    def summary(self) -> str:
+        """Texto con el resultado y el tiempo de cada etapa por par."""
+        lines = []
+        for job in self.jobs:
+            line = f"{job.old} → {job.new}: {job.label} ({job.elapsed:.1f}s)"
+            if job.timings:
+                line += f"\n    {job.timings_text()}"
+            if job.state != "done" and job.detail:
+                line += f"\n    {job.detail.splitlines()[0]}"
+            lines.append(line)
+        total = (self.finished or time.monotonic()) - self.started
+        lines.append(f"\nTiempo total: {total:.1f}s con {self.workers} reemplazo(s) en paralelo")
+        return "\n".join(lines)
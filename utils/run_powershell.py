@@ -1,4 +1,5 @@
-﻿
+# utils/run_powershell.py
+
 from __future__ import annotations
 import os
 import sys
@@ -7,14 +8,147 @@ import shutil
 import logging
 import subprocess
 import tempfile
+import re
+import json
 import shlex
-from typing import Tuple, List, Optional, Mapping
+import queue
+import locale
+import asyncio
+import atexit
+import hashlib
+import threading
+import functools
+from contextlib import contextmanager
+from collections import deque
+from typing import (
+    Any, Deque, Tuple, List, Optional, Mapping, Sequence, Iterator, Callable, NamedTuple,
+)
+
+from utils import metrics
+from utils.ps_pool import PowerShellPool
 
 logger = logging.getLogger(__name__)
 
+# Pool de hosts PowerShell persistentes (opt-in con LABTOOL_PS_POOL=1)
+POOL_ENV = "LABTOOL_PS_POOL"
+POOL_SIZE_ENV = "LABTOOL_PS_POOL_SIZE"
+_pool: Optional[PowerShellPool] = None
+_pool_lock = threading.Lock()
+
+# Caché de scripts embebidos (PyInstaller): una carpeta por hash de contenido
+SCRIPT_CACHE_DIR = os.path.join(
+    os.environ.get("LOCALAPPDATA") or tempfile.gettempdir(), "LabTool", "ps-cache"
+)
+_scripts_dir: Optional[str] = None
+_scripts_lock = threading.Lock()
+
+# Límite global de procesos PowerShell simultáneos (sync, stream y async)
+MAX_PROCS_ENV = "LABTOOL_PS_MAX_PROCS"
+try:
+    MAX_PROCS = max(1, int(os.environ.get(MAX_PROCS_ENV, "4")))
+except ValueError:
+    MAX_PROCS = 4
+
+
+class _ProcessSlots:
+    """
+    Semáforo del límite global compartido por hilos y por asyncio. Los
+    hilos esperan en una Condition; las corrutinas, en un futuro de su
+    propio loop (sin ocupar ningún hilo). Al liberar, el hueco pasa
+    directamente a la primera corrutina en espera con
+    call_soon_threadsafe; si no hay ninguna, a un hilo.
+    """
+
+    def __init__(self, value: int):
+        self._free = value
+        self._cond = threading.Condition(threading.Lock())
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+
+    def acquire(self, blocking: bool = True) -> bool:
+        with self._cond:
+            while self._free == 0:
+                if not blocking:
+                    return False
+                self._cond.wait()
+            self._free -= 1
+            return True
+
+    def release(self) -> None:
+        with self._cond:
+            while self._waiters:
+                loop, fut = self._waiters.popleft()
+                try:
+                    loop.call_soon_threadsafe(self._hand_over, fut)
+                    return
+                except RuntimeError:   # loop ya cerrado: siguiente
+                    continue
+            self._free += 1
+            self._cond.notify()
+
+    def _hand_over(self, fut: asyncio.Future) -> None:
+        """En el loop de la corrutina: le da el hueco, o lo devuelve si ya no espera."""
+        if fut.done():
+            self.release()
+        else:
+            fut.set_result(None)
+
+    async def acquire_async(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            if self._free > 0 and not self._waiters:
+                self._free -= 1
+                return
+            fut = loop.create_future()
+            self._waiters.append((loop, fut))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            with self._cond:
+                try:
+                    self._waiters.remove((loop, fut))
+                    queued = True
+                except ValueError:
+                    queued = False
+            if not queued and fut.done() and not fut.cancelled():
+                self.release()   # el hueco llegó justo antes de cancelar
+            raise
 
+    def __enter__(self) -> "_ProcessSlots":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.release()
+
+
+_process_slots = _ProcessSlots(MAX_PROCS)
+
+# Convención de progreso: los scripts pueden emitir "##PROGRESS 3/10 texto"
+PROGRESS_PREFIX = "##PROGRESS"
+_PROGRESS_RE = re.compile(r"^##PROGRESS\s+(\d+)\s*/\s*(\d+)\s?(.*)$")
+
+# Canal de resultados: una línea "##RECORD {json}" por registro (NDJSON)
+RECORD_PREFIX = "##RECORD"
+_MARKERS = (PROGRESS_PREFIX, RECORD_PREFIX)
+
+
+class PSEvent(NamedTuple):
+    """Evento de ejecución en streaming."""
+    time: float            # marca de tiempo (time.time()) de llegada
+    stream: str            # "stdout" | "stderr" | "progress" | "record" | "exit"
+    text: str              # línea sin salto final (o texto del progreso)
+    current: int = 0       # progreso: paso actual
+    total: int = 0         # progreso: total de pasos
+    code: Optional[int] = None  # solo en "exit"
+    data: Any = None       # solo en "record": el objeto JSON ya decodificado
+
+
+@functools.lru_cache(maxsize=None)
 def _powershell_exe() -> str:
-    """Devuelve el ejecutable de PowerShell disponible (pwsh.exe o powershell.exe)."""
+    """
+    Devuelve el ejecutable de PowerShell disponible (pwsh.exe o powershell.exe).
+    El resultado se memoriza para todo el proceso.
+    """
     for exe in ("pwsh.exe", "powershell.exe"):
         path = shutil.which(exe)
         if path:
@@ -22,12 +156,196 @@ def _powershell_exe() -> str:
     raise FileNotFoundError("No se encontró PowerShell ('pwsh.exe' ni 'powershell.exe') en PATH.")
 
 
+def pool_enabled() -> bool:
+    """¿Está activado el pool de hosts persistentes?"""
+    return os.environ.get(POOL_ENV, "").strip().lower() in ("1", "true", "yes", "si", "sí")
+
+
+def _get_pool() -> PowerShellPool:
+    """Devuelve (creándolo si hace falta) el pool global de hosts."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            try:
+                size = int(os.environ.get(POOL_SIZE_ENV, "2"))
+            except ValueError:
+                size = 2
+            _pool = PowerShellPool(_powershell_exe(), max_hosts=size)
+            atexit.register(_pool.close)
+        return _pool
+
+
+@contextmanager
+def host_pool(max_hosts: int) -> Iterator[Optional[PowerShellPool]]:
+    """
+    Hosts PowerShell reutilizables para una tanda de scripts: el pool
+    global si LABTOOL_PS_POOL está activo y, si no, uno desechable de
+    max_hosts hosts que se cierra al salir (N scripts → max_hosts
+    arranques de PowerShell). None si no hay PowerShell.
+    """
+    if pool_enabled():
+        yield _get_pool()
+        return
+    try:
+        exe = _powershell_exe()
+    except FileNotFoundError:
+        yield None
+        return
+    pool = PowerShellPool(exe, max_hosts=max_hosts)
+    try:
+        yield pool
+    finally:
+        pool.close()
+
+
+def prewarm_pool() -> None:
+    """Arranca un host en segundo plano si el pool está activado."""
+    if not pool_enabled():
+        return
+    try:
+        _get_pool().prewarm()
+    except FileNotFoundError as e:
+        logger.error("No se pudo precalentar PowerShell: %s", e)
+
+
+def _gc_script_cache(keep: str) -> None:
+    """Borra las extracciones de versiones anteriores (y temporales abandonados)."""
+    now = time.time()
+    for entry in os.scandir(SCRIPT_CACHE_DIR):
+        if entry.name == keep or not entry.is_dir():
+            continue
+        if entry.name.startswith(".tmp-") and now - entry.stat().st_mtime < 3600:
+            continue  # otra instancia podría estar extrayendo ahora mismo
+        shutil.rmtree(entry.path, ignore_errors=True)
+        logger.debug("Caché de scripts obsoleta eliminada: %s", entry.path)
+
+
+def _bundled_scripts_dir(bundle_root: str) -> str:
+    """
+    Extrae todos los powershell/*.ps1 embebidos a SCRIPT_CACHE_DIR/<hash>
+    la primera vez y devuelve esa carpeta. El hash cubre nombre y contenido
+    de cada script, así que cada versión de la app tiene su propia carpeta,
+    reutilizable entre ejecuciones.
+    """
+    global _scripts_dir
+    with _scripts_lock:
+        if _scripts_dir:
+            return _scripts_dir
+
+        src_dir = os.path.join(bundle_root, "powershell")
+        blobs: dict[str, bytes] = {}
+        digest = hashlib.sha256()
+        for name in sorted(os.listdir(src_dir)):
+            if not name.lower().endswith(".ps1"):
+                continue
+            with open(os.path.join(src_dir, name), "rb") as fh:
+                data = fh.read()
+            blobs[name] = data
+            digest.update(name.encode("utf-8") + b"\0" + data + b"\0")
+        key = digest.hexdigest()[:16]
+        target = os.path.join(SCRIPT_CACHE_DIR, key)
+
+        complete = os.path.isdir(target) and all(
+            os.path.isfile(os.path.join(target, n))
+            and os.path.getsize(os.path.join(target, n)) == len(d)
+            for n, d in blobs.items()
+        )
+        if not complete:
+            os.makedirs(SCRIPT_CACHE_DIR, exist_ok=True)
+            tmp = tempfile.mkdtemp(prefix=".tmp-", dir=SCRIPT_CACHE_DIR)
+            for name, data in blobs.items():
+                with open(os.path.join(tmp, name), "wb") as fh:
+                    fh.write(data)
+            shutil.rmtree(target, ignore_errors=True)
+            try:
+                os.replace(tmp, target)
+            except OSError:
+                # Otra instancia ganó la carrera: su copia es idéntica
+                shutil.rmtree(tmp, ignore_errors=True)
+            logger.debug("Scripts extraídos en caché: %s", target)
+
+        try:
+            _gc_script_cache(keep=key)
+        except OSError:
+            logger.exception("No se pudo limpiar la caché de scripts")
+
+        _scripts_dir = target
+        return target
+
+
+def _resolve_script(path: str) -> str:
+    """
+    Si la app está congelada con PyInstaller y el script viene embebido,
+    devuelve su ruta dentro de la caché de extracción.
+    """
+    if not getattr(sys, 'frozen', False):
+        return path
+    base_path = sys._MEIPASS
+    embedded_path = os.path.join(base_path, path)
+    if not os.path.isfile(embedded_path):
+        return path
+    try:
+        rel = os.path.relpath(embedded_path, base_path)
+    except ValueError:  # otra unidad
+        return embedded_path
+    if os.path.dirname(rel).lower() != "powershell":
+        return embedded_path
+    try:
+        return os.path.join(_bundled_scripts_dir(base_path), os.path.basename(rel))
+    except OSError:
+        logger.exception("No se pudo usar la caché de scripts; se usa la copia embebida")
+        return embedded_path
+
+
+def _build_command(exe: str, path: str, args: Tuple[str, ...]) -> List[str]:
+    return [
+        exe,
+        "-NoProfile",
+        "-ExecutionPolicy", "Bypass",
+        "-File", path,
+        *args
+    ]
+
+
+def _strip_markers(text: str) -> str:
+    """Quita las líneas ##PROGRESS / ##RECORD de una salida ya capturada."""
+    if "##" not in text:
+        return text
+    return "\n".join(
+        line for line in text.splitlines()
+        if not line.lstrip().startswith(_MARKERS)
+    ).strip()
+
+
+def _parse_record(text: str) -> Any:
+    """Decodifica el JSON de una línea ##RECORD (ValueError si está mal)."""
+    return json.loads(text.strip()[len(RECORD_PREFIX):])
+
+
+def _make_event(stream: str, line: str) -> PSEvent:
+    text = line.rstrip("\r\n")
+    if stream == "stdout":
+        stripped = text.strip()
+        m = _PROGRESS_RE.match(stripped)
+        if m:
+            return PSEvent(time.time(), "progress", m.group(3).strip(),
+                           int(m.group(1)), int(m.group(2)))
+        if stripped.startswith(RECORD_PREFIX):
+            try:
+                return PSEvent(time.time(), "record", stripped,
+                               data=_parse_record(stripped))
+            except ValueError:
+                logger.warning("Registro NDJSON mal formado: %r", text)
+    return PSEvent(time.time(), stream, text)
+
+
 def run_powershell_script(
     path: str,
     *args: str,
     cwd: Optional[str] = None,
     env: Optional[Mapping[str, str]] = None,
     timeout: int = 300,
+    pooled: Optional[bool] = None,
 ) -> Tuple[str, str, int]:
     """
     Ejecuta un .ps1 y devuelve (stdout, stderr, exit_code).
@@ -38,59 +356,80 @@ def run_powershell_script(
         cwd:     Directorio de trabajo (opcional).
         env:     Variables de entorno adicionales/override (opcional).
         timeout: Segundos antes de matar el proceso (300s por defecto).
+        pooled:  Ejecutar en un host persistente del pool. None = según
+                 la variable de entorno LABTOOL_PS_POOL.
 
     Returns:
         Tuple[str, str, int]: stdout, stderr, returncode
     """
+    t_start = time.perf_counter()
     exe = _powershell_exe()
 
-    # Extraer script temporal si está embebido en PyInstaller
-    if getattr(sys, 'frozen', False):
-        base_path = sys._MEIPASS
-        embedded_path = os.path.join(base_path, path)
-        if os.path.isfile(embedded_path):
-            temp_dir = tempfile.mkdtemp()
-            temp_script = os.path.join(temp_dir, os.path.basename(path))
-            shutil.copyfile(embedded_path, temp_script)
-            path = temp_script
-
-    cmd: List[str] = [
-        exe,
-        "-NoProfile",
-        "-ExecutionPolicy", "Bypass",
-        "-File", path,
-        *args
-    ]
+    # Script embebido en PyInstaller → copia extraída una sola vez por versión
+    path = _resolve_script(path)
+
+    cmd = _build_command(exe, path, args)
+    t_resolved = time.perf_counter()
 
     cmd_str = " ".join(shlex.quote(part) for part in cmd)
     logger.debug("⤷ Ejecutando PowerShell: %s", cmd_str)
 
+    if pooled is None:
+        pooled = pool_enabled()
+
     start = time.time()
+    if pooled:
+        try:
+            stdout, stderr, code = _get_pool().invoke(
+                path, args, cwd=cwd, env=env, timeout=timeout
+            )
+        except Exception as e:
+            logger.exception("run_powershell_script (pool) falló inesperadamente")
+            return "", str(e), 1
+        elapsed = time.time() - start
+        logger.debug("⤶ Fin en pool (%ss) ➜ exit=%s", round(elapsed, 2), code)
+        metrics.record_invocation(path, "pool", t_start, t_resolved, t_resolved,
+                                  time.perf_counter(), len(stdout) + len(stderr), code)
+        return _strip_markers(stdout), stderr, code
+
+    t_spawned = t_resolved
     try:
         full_env = os.environ.copy()
         if env:
             full_env.update(env)
 
-        proc = subprocess.run(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            cwd=cwd or os.getcwd(),
-            env=full_env,
-            timeout=timeout
-        )
+        with _process_slots:
+            with subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                cwd=cwd or os.getcwd(),
+                env=full_env,
+            ) as proc:
+                t_spawned = time.perf_counter()
+                try:
+                    stdout, stderr = proc.communicate(timeout=timeout)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+                    proc.communicate()
+                    raise
 
-        stdout = proc.stdout or ""
-        stderr = proc.stderr or ""
+        stdout = stdout or ""
+        stderr = stderr or ""
         elapsed = time.time() - start
         logger.debug("⤶ Fin (%ss) ➜ exit=%s", round(elapsed, 2), proc.returncode)
+        metrics.record_invocation(path, "process", t_start, t_resolved, t_spawned,
+                                  time.perf_counter(), len(stdout) + len(stderr),
+                                  proc.returncode)
 
-        return stdout.strip(), stderr.strip(), proc.returncode
+        return _strip_markers(stdout.strip()), stderr.strip(), proc.returncode
 
     except subprocess.TimeoutExpired:
         elapsed = time.time() - start
         logger.error("Timeout (%ss) ejecutando: %s", round(elapsed, 2), cmd_str)
+        metrics.record_invocation(path, "process", t_start, t_resolved, t_spawned,
+                                  time.perf_counter(), 0, 1)
         return "", f"Timeout: el script superó {timeout}s", 1
 
     except FileNotFoundError as e:
@@ -102,5 +441,379 @@ def run_powershell_script(
         return "", str(e), 1
 
 
+def stream_powershell_script(
+    path: str,
+    *args: str,
+    cwd: Optional[str] = None,
+    env: Optional[Mapping[str, str]] = None,
+    timeout: int = 300,
+    pool: Optional[PowerShellPool] = None,
+) -> Iterator[PSEvent]:
+    """
+    Ejecuta un .ps1 y va generando PSEvent a medida que llegan las líneas.
+
+    Las líneas "##PROGRESS n/total texto" de stdout se entregan como eventos
+    "progress" y las "##RECORD {json}" como eventos "record" con el objeto
+    ya decodificado en .data. El último evento siempre es "exit" con el código de salida
+    (1 si hubo timeout o error al lanzar). Si el consumidor deja de iterar,
+    el proceso hijo se mata.
+
+    Con pool (ver host_pool) el script corre en un host ya arrancado en
+    vez de en un proceso nuevo; stdout llega igual línea a línea y stderr
+    al final. Ahí dejar de iterar no corta el script: termina en su host.
+    """
+    t_start = time.perf_counter()
+    if pool is not None:
+        yield from _stream_pooled(pool, path, args, cwd, env, timeout, t_start)
+        return
+    try:
+        exe = _powershell_exe()
+    except FileNotFoundError as e:
+        logger.exception("PowerShell no encontrado: %s", e)
+        yield PSEvent(time.time(), "stderr", str(e))
+        yield PSEvent(time.time(), "exit", "", code=1)
+        return
+
+    cmd = _build_command(exe, _resolve_script(path), args)
+    t_resolved = time.perf_counter()
+    logger.debug("⤷ Ejecutando PowerShell (stream): %s",
+                 " ".join(shlex.quote(part) for part in cmd))
+
+    full_env = os.environ.copy()
+    if env:
+        full_env.update(env)
+
+    _process_slots.acquire()
+    start = time.time()
+    try:
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors="replace",
+            bufsize=1,
+            cwd=cwd or os.getcwd(),
+            env=full_env,
+        )
+    except Exception as e:
+        _process_slots.release()
+        logger.exception("stream_powershell_script no pudo lanzar PowerShell")
+        yield PSEvent(time.time(), "stderr", str(e))
+        yield PSEvent(time.time(), "exit", "", code=1)
+        return
+
+    t_spawned = time.perf_counter()
+    out_bytes = 0
+    code = 1
+    lines: "queue.Queue[Tuple[str, Optional[str]]]" = queue.Queue()
+
+    def _pump(pipe, stream: str) -> None:
+        for line in pipe:
+            lines.put((stream, line))
+        lines.put((stream, None))
+
+    for pipe, stream in ((proc.stdout, "stdout"), (proc.stderr, "stderr")):
+        threading.Thread(target=_pump, args=(pipe, stream), daemon=True).start()
+
+    deadline = start + timeout
+    open_streams = 2
+    try:
+        while open_streams:
+            try:
+                stream, line = lines.get(timeout=max(0.0, deadline - time.time()))
+            except queue.Empty:
+                logger.error("Timeout (%ss) en stream de %s", timeout, path)
+                yield PSEvent(time.time(), "stderr", f"Timeout: el script superó {timeout}s")
+                yield PSEvent(time.time(), "exit", "", code=1)
+                return
+            if line is None:
+                open_streams -= 1
+                continue
+            out_bytes += len(line)
+            yield _make_event(stream, line)
+
+        code = proc.wait()
+        logger.debug("⤶ Fin stream (%ss) ➜ exit=%s", round(time.time() - start, 2), code)
+        yield PSEvent(time.time(), "exit", "", code=code)
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+        _process_slots.release()
+        metrics.record_invocation(path, "stream", t_start, t_resolved, t_spawned,
+                                  time.perf_counter(), out_bytes, code)
+
+
+def _stream_pooled(
+    pool: PowerShellPool,
+    path: str,
+    args: Tuple[str, ...],
+    cwd: Optional[str],
+    env: Optional[Mapping[str, str]],
+    timeout: int,
+    t_start: float,
+) -> Iterator[PSEvent]:
+    """stream_powershell_script sobre un host del pool."""
+    resolved = _resolve_script(path)
+    t_resolved = time.perf_counter()
+    logger.debug("⤷ Ejecutando PowerShell (stream en pool): %s %s", resolved, " ".join(args))
+    lines: "queue.Queue[Optional[str]]" = queue.Queue()
+    result: List[Tuple[str, str, int]] = []
+
+    def invoke() -> None:
+        try:
+            result.append(pool.invoke(resolved, args, cwd=cwd, env=env, timeout=timeout,
+                                      on_line=lines.put))
+        except Exception as e:
+            logger.exception("stream_powershell_script (pool) falló inesperadamente")
+            result.append(("", str(e), 1))
+        finally:
+            lines.put(None)
+
+    threading.Thread(target=invoke, name="ps-stream-pool", daemon=True).start()
+    out_bytes = 0
+    code = 1
+    try:
+        while True:
+            line = lines.get()
+            if line is None:
+                break
+            out_bytes += len(line)
+            yield _make_event("stdout", line)
+        stdout, stderr, code = result[0]
+        out_bytes += len(stdout) + len(stderr)
+        for line in stdout.splitlines():
+            yield _make_event("stdout", line)
+        for line in stderr.splitlines():
+            yield _make_event("stderr", line)
+        logger.debug("⤶ Fin stream en pool ➜ exit=%s", code)
+        yield PSEvent(time.time(), "exit", "", code=code)
+    finally:
+        metrics.record_invocation(path, "pool-stream", t_start, t_resolved, t_resolved,
+                                  time.perf_counter(), out_bytes, code)
+
+
+def run_powershell_script_streaming(
+    path: str,
+    *args: str,
+    on_event: Callable[[PSEvent], None],
+    cwd: Optional[str] = None,
+    env: Optional[Mapping[str, str]] = None,
+    timeout: int = 300,
+) -> Tuple[str, str, int]:
+    """
+    Variante con callback: llama on_event por cada PSEvent y al final
+    devuelve (stdout, stderr, exit_code) como run_powershell_script
+    (sin las líneas de progreso ni de registros).
+    """
+    out: List[str] = []
+    err: List[str] = []
+    code = 1
+    for ev in stream_powershell_script(path, *args, cwd=cwd, env=env, timeout=timeout):
+        if ev.stream == "stdout":
+            out.append(ev.text)
+        elif ev.stream == "stderr":
+            err.append(ev.text)
+        elif ev.stream == "exit":
+            code = ev.code if ev.code is not None else 1
+        on_event(ev)
+    return "\n".join(out).strip(), "\n".join(err).strip(), code
+
+
+def run_powershell_batch(
+    invocations: Sequence[Tuple[str, Sequence[str]]],
+    cwd: Optional[str] = None,
+    env: Optional[Mapping[str, str]] = None,
+    timeout: int = 300,
+    pooled: Optional[bool] = None,
+) -> List[Tuple[str, str, int]]:
+    """
+    Ejecuta una lista de invocaciones (script, args) dentro de un único
+    proceso PowerShell y devuelve un (stdout, stderr, exit_code) por entrada,
+    en el mismo orden. Un fallo no interrumpe el resto del lote.
+
+    Args:
+        invocations: Pares (ruta al .ps1, argumentos).
+        cwd, env:    Igual que en run_powershell_script (para todo el lote).
+        timeout:     Segundos máximos por invocación.
+        pooled:      Usar un host del pool global. None = LABTOOL_PS_POOL.
+    """
+    if not invocations:
+        return []
+    try:
+        exe = _powershell_exe()
+    except FileNotFoundError as e:
+        logger.exception("PowerShell no encontrado: %s", e)
+        return [("", str(e), 1) for _ in invocations]
+
+    t_start = time.perf_counter()
+    resolved = [(_resolve_script(script), list(a)) for script, a in invocations]
+    t_resolved = time.perf_counter()
+    if pooled is None:
+        pooled = pool_enabled()
+
+    logger.debug("⤷ Lote PowerShell: %s invocación(es)", len(resolved))
+    start = time.time()
+    if pooled:
+        results = _get_pool().invoke_batch(resolved, cwd=cwd, env=env, timeout=timeout)
+    else:
+        # Pool desechable de un solo host: una sola arrancada de PowerShell
+        batch_pool = PowerShellPool(exe, max_hosts=1)
+        try:
+            with _process_slots:
+                results = batch_pool.invoke_batch(resolved, cwd=cwd, env=env, timeout=timeout)
+        finally:
+            batch_pool.close()
+
+    elapsed = time.time() - start
+    failed = sum(1 for _, _, code in results if code != 0)
+    metrics.record_invocation(
+        f"lote:{os.path.basename(resolved[0][0])}×{len(resolved)}",
+        "batch", t_start, t_resolved, t_resolved, time.perf_counter(),
+        sum(len(o) + len(e) for o, e, _ in results), 1 if failed else 0,
+    )
+    logger.debug("⤶ Fin lote (%ss) ➜ %s ok, %s con error",
+                 round(elapsed, 2), len(results) - failed, failed)
+    return [(_strip_markers(out), err, code) for out, err, code in results]
+
+
+async def _acquire_slot_async() -> None:
+    """
+    Espera un hueco en el límite global sin bloquear el event loop ni
+    ocupar un hilo: despierta en cuanto otro libera el suyo. Si la tarea
+    se cancela mientras espera, el hueco que le llegue se devuelve.
+    """
+    await _process_slots.acquire_async()
+
+
+async def run_powershell_script_async(
+    path: str,
+    *args: str,
+    cwd: Optional[str] = None,
+    env: Optional[Mapping[str, str]] = None,
+    timeout: int = 300,
+) -> Tuple[str, str, int]:
+    """
+    Versión asyncio de run_powershell_script: mismos argumentos, entorno,
+    timeout y resultado (stdout, stderr, exit_code).
+
+    Respeta el límite global de procesos (LABTOOL_PS_MAX_PROCS). Si la tarea
+    se cancela, el proceso hijo se mata antes de propagar CancelledError.
+    """
+    t_start = time.perf_counter()
+    try:
+        exe = _powershell_exe()
+    except FileNotFoundError as e:
+        logger.exception("PowerShell no encontrado: %s", e)
+        return "", str(e), 1
+
+    cmd = _build_command(exe, _resolve_script(path), args)
+    t_resolved = time.perf_counter()
+    cmd_str = " ".join(shlex.quote(part) for part in cmd)
+    logger.debug("⤷ Ejecutando PowerShell (async): %s", cmd_str)
+
+    full_env = os.environ.copy()
+    if env:
+        full_env.update(env)
+
+    await _acquire_slot_async()
+    proc: Optional[asyncio.subprocess.Process] = None
+    start = time.time()
+    t_spawned = time.perf_counter()
+    out_bytes = 0
+    code = 1
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=cwd or os.getcwd(),
+            env=full_env,
+        )
+        t_spawned = time.perf_counter()
+        try:
+            out_b, err_b = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            elapsed = time.time() - start
+            logger.error("Timeout (%ss) ejecutando: %s", round(elapsed, 2), cmd_str)
+            return "", f"Timeout: el script superó {timeout}s", 1
+
+        encoding = locale.getpreferredencoding(False)
+        stdout = out_b.decode(encoding, errors="replace")
+        stderr = err_b.decode(encoding, errors="replace")
+        out_bytes = len(out_b) + len(err_b)
+        code = proc.returncode
+        elapsed = time.time() - start
+        logger.debug("⤶ Fin async (%ss) ➜ exit=%s", round(elapsed, 2), proc.returncode)
+        return _strip_markers(stdout.strip()), stderr.strip(), proc.returncode
+
+    except asyncio.CancelledError:
+        logger.debug("Ejecución cancelada: %s", cmd_str)
+        raise
+
+    except Exception as e:
+        logger.exception("run_powershell_script_async falló inesperadamente")
+        return "", str(e), 1
+
+    finally:
+        if proc is not None and proc.returncode is None:
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+            await proc.wait()
+        _process_slots.release()
+        metrics.record_invocation(path, "async", t_start, t_resolved, t_spawned,
+                                  time.perf_counter(), out_bytes, code)
+
+
+def iter_powershell_records(
+    path: str,
+    *args: str,
+    cwd: Optional[str] = None,
+    env: Optional[Mapping[str, str]] = None,
+    timeout: int = 300,
+) -> Iterator[Any]:
+    """
+    Ejecuta un .ps1 y genera, según llegan, los objetos que el script
+    emite por el canal ##RECORD. Si el script termina con código distinto
+    de 0 lanza RuntimeError con su stderr (o stdout) al final.
+    """
+    out: List[str] = []
+    err: List[str] = []
+    for ev in stream_powershell_script(path, *args, cwd=cwd, env=env, timeout=timeout):
+        if ev.stream == "record":
+            yield ev.data
+        elif ev.stream == "stdout":
+            out.append(ev.text)
+        elif ev.stream == "stderr":
+            err.append(ev.text)
+        elif ev.stream == "exit" and ev.code != 0:
+            msg = "\n".join(err).strip() or "\n".join(out).strip()
+            raise RuntimeError(msg or f"Exit code {ev.code}")
+
+
+def run_powershell_records(
+    path: str,
+    *args: str,
+    cwd: Optional[str] = None,
+    env: Optional[Mapping[str, str]] = None,
+    timeout: int = 300,
+) -> Tuple[List[Any], str, int]:
+    """Como run_powershell_script pero devuelve (registros, stderr, exit_code)."""
+    records: List[Any] = []
+    err: List[str] = []
+    code = 1
+    for ev in stream_powershell_script(path, *args, cwd=cwd, env=env, timeout=timeout):
+        if ev.stream == "record":
+            records.append(ev.data)
+        elif ev.stream == "stderr":
+            err.append(ev.text)
+        elif ev.stream == "exit":
+            code = ev.code if ev.code is not None else 1
+    return records, "\n".join(err).strip(), code
+
+
 # ——— Compatibilidad hacia atrás ———
 run_script = run_powershell_script
@@ -0,0 +1,63 @@
+# utils/selection_model.py
+
+from __future__ import annotations
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+
+class SelectionModel:
+    """
+    Reparte un conjunto fijo de elementos entre "disponibles" y
+    "seleccionados". La pertenencia vive en un set y el orden original en
+    un índice, así que mover k elementos cuesta O(k) y recalcular una
+    vista O(n log n), sin búsquedas lineales por elemento.
+    """
+
+    def __init__(self, items: Iterable[str]):
+        self.items: List[str] = list(dict.fromkeys(items))   # sin duplicados
+        self.index: Dict[str, int] = {it: i for i, it in enumerate(self.items)}
+        self.selected: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def is_selected(self, item: str) -> bool:
+        return item in self.selected
+
+    def select(self, items: Iterable[str]) -> int:
+        """Pasa items a seleccionados; devuelve cuántos cambiaron."""
+        before = len(self.selected)
+        self.selected.update(it for it in items if it in self.index)
+        return len(self.selected) - before
+
+    def deselect(self, items: Iterable[str]) -> int:
+        """Devuelve items a disponibles; devuelve cuántos cambiaron."""
+        before = len(self.selected)
+        self.selected.difference_update(items)
+        return before - len(self.selected)
+
+    def view(
+        self,
+        selected: bool,
+        text: str = "",
+        key: Optional[Callable[[str], object]] = None,
+        reverse: bool = False,
+    ) -> List[str]:
+        """
+        Elementos de un lado (selected=True/False) que contienen `text`
+        (sin distinguir mayúsculas), ordenados por key o por el orden
+        original.
+        """
+        needle = text.strip().lower()
+        out = [
+            it for it in self.items
+            if (it in self.selected) == selected and (not needle or needle in it.lower())
+        ]
+        if key is not None:
+            out.sort(key=key, reverse=reverse)
+        elif reverse:
+            out.reverse()
+        return out
+
+    def selected_in_order(self) -> List[str]:
+        """Seleccionados en el orden original."""
+        return sorted(self.selected, key=self.index.__getitem__)
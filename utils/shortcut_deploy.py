@@ -0,0 +1,248 @@
+# utils/shortcut_deploy.py
+
+from __future__ import annotations
+import os
+import json
+import time
+import ctypes
+import shutil
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from utils import user_inventory
+
+logger = logging.getLogger(__name__)
+
+# Registro oculto en cada Escritorio con lo que puso LabTool:
+# { "archivo.lnk": [tamaño, mtime_ns] }. Solo se quita lo que figura aquí.
+MANIFEST = ".labtool-shortcuts.json"
+_FILE_ATTRIBUTE_HIDDEN = 0x2
+_FILE_ATTRIBUTE_NORMAL = 0x80
+
+
+class Target(NamedTuple):
+    """Escritorio de destino."""
+    label: str       # usuario o "Público"
+    desktop: str
+
+
+class ProfileReport(NamedTuple):
+    label: str
+    desktop: str
+    copied: List[str]
+    skipped: List[str]       # ya idénticos
+    removed: List[str]       # salieron del conjunto
+    conflicts: List[str]     # ya había uno distinto que no puso LabTool: no se toca
+    errors: List[Tuple[str, str]]
+    seconds: float
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+def public_desktop() -> str:
+    return os.path.join(os.environ.get("PUBLIC") or
+                        os.path.join(os.environ.get("SystemDrive", "C:") + os.sep,
+                                     "Users", "Public"), "Desktop")
+
+
+def profile_targets(users: Optional[Sequence[str]] = None) -> List[Target]:
+    """
+    Escritorios de las cuentas locales gestionadas que ya tienen perfil
+    (todas, o solo las de `users`). Las cuentas sin perfil todavía no
+    tienen Escritorio: recibirán los accesos del Público o al reintentar.
+    """
+    wanted = {u.lower() for u in users} if users is not None else None
+    out = []
+    for rec in user_inventory.managed_users():
+        if wanted is not None and rec.name.lower() not in wanted:
+            continue
+        if not rec.profile_path:
+            continue
+        desktop = os.path.join(rec.profile_path, "Desktop")
+        if os.path.isdir(desktop):
+            out.append(Target(rec.name, desktop))
+    return out
+
+
+def _sha1(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(2**16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _identical(src: os.stat_result, src_path: str, dst_path: str) -> bool:
+    """Mismo tamaño y mtime, o mismo tamaño y mismo contenido."""
+    try:
+        dst = os.stat(dst_path)
+    except OSError:
+        return False
+    if dst.st_size != src.st_size:
+        return False
+    if dst.st_mtime_ns == src.st_mtime_ns:
+        return True
+    if _sha1(src_path) == _sha1(dst_path):
+        os.utime(dst_path, ns=(src.st_atime_ns, src.st_mtime_ns))   # la próxima vez basta el stat
+        return True
+    return False
+
+
+def _read_manifest(desktop: str) -> Dict[str, list]:
+    try:
+        with open(os.path.join(desktop, MANIFEST), encoding="utf-8") as fh:
+            data = json.load(fh)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(desktop: str, data: Dict[str, list]) -> None:
+    path = os.path.join(desktop, MANIFEST)
+    if os.name == "nt" and os.path.exists(path):
+        # Un archivo oculto no se puede abrir para escribir: se quita el atributo
+        ctypes.windll.kernel32.SetFileAttributesW(path, _FILE_ATTRIBUTE_NORMAL)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, ensure_ascii=False, separators=(",", ":"))
+    if os.name == "nt":
+        ctypes.windll.kernel32.SetFileAttributesW(path, _FILE_ATTRIBUTE_HIDDEN)
+
+
+def sync_desktop(target: Target, sources: Dict[str, str], prune: bool = True) -> ProfileReport:
+    """
+    Deja en target.desktop exactamente los accesos de sources
+    ({archivo.lnk: ruta origen}) que gestiona LabTool: copia lo que falta
+    o cambió, se salta lo idéntico y, con prune, quita lo que puso LabTool
+    antes y ya no está en el conjunto (solo si nadie lo modificó). Un
+    archivo del mismo nombre que no figura en el registro es del usuario:
+    no se sobrescribe ni se adopta (sale en conflicts).
+    """
+    start = time.perf_counter()
+    copied: List[str] = []
+    skipped: List[str] = []
+    removed: List[str] = []
+    conflicts: List[str] = []
+    errors: List[Tuple[str, str]] = []
+    old = _read_manifest(target.desktop)
+    manifest: Dict[str, list] = {}
+
+    for fname, src in sources.items():
+        dst = os.path.join(target.desktop, fname)
+        try:
+            st = os.stat(src)
+            if fname not in old and os.path.lexists(dst):
+                if _identical(st, src, dst):
+                    skipped.append(fname)      # igual, pero no es nuestro: no se registra
+                else:
+                    conflicts.append(fname)
+                continue
+            if _identical(st, src, dst):
+                skipped.append(fname)
+            else:
+                shutil.copy2(src, dst)
+                copied.append(fname)
+            manifest[fname] = [st.st_size, st.st_mtime_ns]
+        except OSError as e:
+            errors.append((fname, str(e)))
+
+    for fname, (size, mtime) in old.items():
+        if fname in sources:
+            continue
+        dst = os.path.join(target.desktop, fname)
+        if not prune:
+            manifest[fname] = [size, mtime]
+            continue
+        try:
+            st = os.stat(dst)
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            errors.append((fname, str(e)))
+            continue
+        if st.st_size != size or st.st_mtime_ns != mtime:
+            logger.info("%s: %s cambió desde que se copió; no se quita.", target.label, fname)
+            continue
+        try:
+            os.remove(dst)
+            removed.append(fname)
+        except OSError as e:
+            errors.append((fname, str(e)))
+            manifest[fname] = [size, mtime]
+
+    if manifest != old:
+        try:
+            _write_manifest(target.desktop, manifest)
+        except OSError as e:
+            errors.append((MANIFEST, str(e)))
+    return ProfileReport(target.label, target.desktop, copied, skipped, removed, conflicts, errors,
+                         time.perf_counter() - start)
+
+
+def deploy(
+    sources: Sequence[str],
+    targets: Sequence[Target],
+    prune: bool = True,
+    workers: int = 8,
+    on_report: Optional[Callable[[ProfileReport], None]] = None,
+) -> List[ProfileReport]:
+    """
+    Lleva el conjunto de .lnk `sources` a todos los Escritorios de
+    targets en paralelo (un trabajo por perfil). Devuelve un informe por
+    perfil, en el orden de targets.
+    """
+    by_name: Dict[str, str] = {}
+    for src in sources:
+        fname = os.path.basename(src)
+        stem, ext = os.path.splitext(fname)
+        taken = {n.lower() for n in by_name}
+        if fname.lower() in taken:
+            # Homónimo de otra carpeta del Menú Inicio: "Léeme (Git).lnk",
+            # y si aun así se repite, "Léeme (Git) 2.lnk"…
+            stem = f"{stem} ({os.path.basename(os.path.dirname(src))})"
+            fname = stem + ext
+            n = 2
+            while fname.lower() in taken:
+                fname = f"{stem} {n}{ext}"
+                n += 1
+        by_name[fname] = src
+    start = time.perf_counter()
+
+    def one(target: Target) -> ProfileReport:
+        try:
+            rep = sync_desktop(target, by_name, prune)
+        except Exception as e:
+            logger.exception("Error desplegando accesos en %s", target.desktop)
+            rep = ProfileReport(target.label, target.desktop, [], [], [], [], [("", str(e))], 0.0)
+        if on_report:
+            on_report(rep)
+        return rep
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="lnk-deploy") as pool:
+        reports = list(pool.map(one, targets))
+    logger.info(
+        "Accesos desplegados en %s escritorio(s) en %.2fs: %s copiados, %s iguales, "
+        "%s quitados, %s en conflicto, %s errores",
+        len(reports), time.perf_counter() - start,
+        sum(len(r.copied) for r in reports), sum(len(r.skipped) for r in reports),
+        sum(len(r.removed) for r in reports), sum(len(r.conflicts) for r in reports),
+        sum(len(r.errors) for r in reports))
+    return reports
+
+
+def report_text(reports: Sequence[ProfileReport]) -> str:
+    """Resumen de una línea por perfil para mostrar al técnico."""
+    lines = []
+    for r in reports:
+        line = (f"{r.label}: {len(r.copied)} copiado(s), {len(r.skipped)} igual(es), "
+                f"{len(r.removed)} quitado(s)")
+        if r.conflicts:
+            line += f", {len(r.conflicts)} sin tocar (ya había otro): {', '.join(r.conflicts[:3])}"
+        if r.errors:
+            name, msg = r.errors[0]
+            line += f" – {len(r.errors)} error(es): {name} {msg}".rstrip()
+        lines.append(line)
+    return "\n".join(lines)
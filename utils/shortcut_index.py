@@ -0,0 +1,245 @@
+# utils/shortcut_index.py
+
+from __future__ import annotations
+import os
+import json
+import time
+import logging
+import tempfile
+import ntpath
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from utils import lnk
+
+logger = logging.getLogger(__name__)
+
+INDEX_PATH = os.path.join(
+    os.environ.get("LOCALAPPDATA") or tempfile.gettempdir(), "LabTool", "shortcut-index.json"
+)
+_VERSION = 3
+
+
+def start_menu_roots() -> List[str]:
+    """Carpetas Programs del Menú Inicio (todos los usuarios y el actual)."""
+    return [
+        os.path.join(os.getenv("ProgramData", ""), "Microsoft\\Windows\\Start Menu\\Programs"),
+        os.path.join(os.getenv("APPDATA", ""), "Microsoft\\Windows\\Start Menu\\Programs"),
+    ]
+
+
+class Shortcut(NamedTuple):
+    """Un .lnk del índice."""
+    name: str      # nombre sin extensión
+    path: str      # ruta completa al .lnk
+    root: str      # raíz del Menú Inicio donde está
+    size: int
+    mtime: int     # ns
+    link: Optional[lnk.LinkInfo] = None   # destino, argumentos… (None si ilegible)
+
+
+# Índice en disco, compacto: por raíz, cada carpeta (ruta relativa, "" = la
+# raíz) → [mtime_ns, [subcarpetas], [[archivo.lnk, tamaño, mtime_ns, lnk], …]]
+# donde lnk es LinkInfo como lista (o null): se parsea una vez al listar.
+_DirRow = list
+
+
+class ShortcutIndex:
+    """
+    Índice persistente de los .lnk del Menú Inicio validado por el mtime
+    de cada carpeta: al refrescar, una carpeta cuyo mtime no cambió no se
+    vuelve a listar (basta un stat) y solo se baja a sus subcarpetas.
+    Crear, borrar o renombrar un acceso cambia el mtime de su carpeta, así
+    que se detecta sin recorrer el resto. Cada .lnk nuevo se parsea al
+    listarlo (utils.lnk) y su destino queda guardado en el índice.
+    """
+
+    def __init__(self, path: str = INDEX_PATH, roots: Optional[Sequence[str]] = None):
+        self.path = path
+        self.roots = [r for r in (roots if roots is not None else start_menu_roots()) if r]
+        self._dirs: Dict[str, Dict[str, _DirRow]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    # ——— Persistencia ———
+    def _load(self) -> None:
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                data = json.load(fh)
+            if data.get("version") == _VERSION:
+                self._dirs = data.get("roots", {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning("Índice de accesos ilegible (%s); se reconstruye.", e)
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"version": _VERSION, "roots": self._dirs}, fh,
+                      ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+    # ——— Consulta ———
+    def entries(self) -> List[Shortcut]:
+        """Accesos del índice tal como está (sin tocar el disco), por nombre."""
+        out: List[Shortcut] = []
+        with self._lock:
+            for root in self.roots:
+                for rel, (_, _, files) in self._dirs.get(root, {}).items():
+                    folder = os.path.join(root, rel) if rel else root
+                    for fname, size, mtime, link in files:
+                        out.append(Shortcut(os.path.splitext(fname)[0],
+                                            os.path.join(folder, fname), root, size, mtime,
+                                            lnk.LinkInfo.from_list(link) if link else None))
+        out.sort(key=lambda s: (s.name.lower(), s.path.lower()))
+        return out
+
+    @property
+    def empty(self) -> bool:
+        return not any(self._dirs.get(r) for r in self.roots)
+
+    # ——— Refresco incremental ———
+    @staticmethod
+    def _file_row(path: str, name: str, st: os.stat_result, old: Dict[str, list]) -> list:
+        """Fila de un .lnk; reutiliza el parseo anterior si no cambió."""
+        prev = old.get(name)
+        if prev is not None and prev[1:3] == [st.st_size, st.st_mtime_ns]:
+            return prev
+        info = lnk.try_parse(path)
+        return [name, st.st_size, st.st_mtime_ns, info.as_list() if info else None]
+
+    def _walk(self, root: str, old: Dict[str, _DirRow]) -> Tuple[Dict[str, _DirRow], int]:
+        """Nuevo mapa de carpetas de root y nº de carpetas que se listaron."""
+        new: Dict[str, _DirRow] = {}
+        listed = 0
+        stack = [""]
+        while stack:
+            rel = stack.pop()
+            folder = os.path.join(root, rel) if rel else root
+            try:
+                mtime = os.stat(folder).st_mtime_ns
+            except OSError:
+                continue
+            row = old.get(rel)
+            if row is None or row[0] != mtime:
+                subdirs, files = [], []
+                prev_files = {f[0]: f for f in row[2]} if row is not None else {}
+                try:
+                    with os.scandir(folder) as it:
+                        for e in it:
+                            try:
+                                if e.is_dir(follow_symlinks=False):
+                                    subdirs.append(e.name)
+                                elif e.name.lower().endswith(".lnk"):
+                                    st = e.stat(follow_symlinks=False)
+                                    files.append(self._file_row(e.path, e.name, st, prev_files))
+                            except OSError:
+                                continue
+                except OSError as ex:
+                    logger.debug("No se pudo listar %s: %s", folder, ex)
+                    continue
+                row = [mtime, sorted(subdirs), sorted(files)]
+                listed += 1
+            new[rel] = row
+            stack.extend(os.path.join(rel, d) if rel else d for d in row[1])
+        return new, listed
+
+    def refresh(self) -> bool:
+        """
+        Pone el índice al día recorriendo solo lo que cambió y lo guarda.
+        Devuelve True si cambió algo.
+        """
+        start = time.perf_counter()
+        changed = False
+        total = listed = 0
+        with self._lock:
+            old_all = dict(self._dirs)
+        for root in self.roots:
+            old = old_all.get(root, {})
+            new, n = self._walk(root, old)
+            total += len(new)
+            listed += n
+            if new != old:
+                changed = True
+                with self._lock:
+                    self._dirs[root] = new
+        if changed:
+            try:
+                with self._lock:
+                    self._save()
+            except OSError as e:
+                logger.warning("No se pudo guardar el índice de accesos: %s", e)
+        logger.debug("Índice de accesos: %s carpetas, %s listadas, %.3fs%s",
+                     total, listed, time.perf_counter() - start,
+                     " (con cambios)" if changed else "")
+        return changed
+
+    def refresh_async(self, on_done: Callable[[bool], None]) -> threading.Thread:
+        """refresh() en un hilo; on_done(cambió) se llama desde ese hilo."""
+        def run():
+            try:
+                changed = self.refresh()
+            except Exception:
+                logger.exception("Error refrescando el índice de accesos")
+                changed = False
+            on_done(changed)
+        t = threading.Thread(target=run, name="shortcut-index", daemon=True)
+        t.start()
+        return t
+
+
+# ——— Catálogo para el selector ———
+class CatalogItem(NamedTuple):
+    display: str               # nombre único para mostrar
+    shortcut: Shortcut
+    group: str                 # aplicación (carpeta bajo Program Files…)
+    broken: bool               # el destino local ya no existe
+    duplicates: List[str]      # otros .lnk que abren lo mismo (ocultos)
+
+
+def catalog(entries: Sequence[Shortcut], roots: Optional[Sequence[str]] = None) -> List[CatalogItem]:
+    """
+    Lista de accesos para elegir, a partir de entries:
+      • Los que abren lo mismo (destino + argumentos) se juntan en uno: se
+        queda el de la primera raíz (todos los usuarios) y el nombre más corto.
+      • Si dos distintos se llaman igual, se añade su carpeta del Menú
+        Inicio: "Léeme (Python 3.12)".
+      • Los rotos (destino local que no existe) llevan " (roto)".
+    """
+    roots = list(roots if roots is not None else start_menu_roots())
+    rank = {r: i for i, r in enumerate(roots)}
+    best: Dict[Tuple[str, str], Shortcut] = {}
+    dups: Dict[Tuple[str, str], List[str]] = {}
+    order = sorted(entries, key=lambda s: (rank.get(s.root, len(rank)), len(s.name), s.name.lower()))
+    for sc in order:
+        key = lnk.dedupe_key(sc.link, sc.path)
+        if key in best:
+            dups[key].append(sc.path)
+        else:
+            best[key] = sc
+            dups[key] = []
+
+    by_name: Dict[str, List[Tuple[str, str]]] = {}
+    for key, sc in best.items():
+        by_name.setdefault(sc.name.lower(), []).append(key)
+
+    items: List[CatalogItem] = []
+    for keys in by_name.values():
+        for n, key in enumerate(keys, 1):
+            sc = best[key]
+            display = sc.name
+            if len(keys) > 1:
+                folder = os.path.relpath(os.path.dirname(sc.path), sc.root)
+                display += f" ({folder if folder != '.' else 'Menú Inicio'})"
+                if sum(1 for k in keys if best[k].name == sc.name and
+                       os.path.dirname(best[k].path) == os.path.dirname(sc.path)) > 1:
+                    display += f" #{n}"
+            broken = lnk.is_broken(sc.link)
+            if broken:
+                display += " (roto)"
+            group = lnk.app_group(sc.link, fallback=ntpath.basename(os.path.dirname(sc.path)))
+            items.append(CatalogItem(display, sc, group, broken, dups[key]))
+    items.sort(key=lambda it: it.display.lower())
+    return items
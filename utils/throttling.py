@@ -0,0 +1,216 @@
+# utils/throttling.py
+
+from __future__ import annotations
+import os
+import time
+import ctypes
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+_THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+_THREAD_MODE_BACKGROUND_END = 0x00020000
+
+
+class TokenBucket:
+    """
+    Limita a `rate` unidades por segundo con ráfagas de hasta `burst`
+    (por defecto un cuarto de segundo de margen). Seguro entre hilos: quien se pasa
+    queda en deuda y duerme lo necesario fuera del lock.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1.0, rate / 4))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Consume amount; devuelve los segundos que tuvo que esperar."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class Throttle:
+    """Tope combinado de archivos/s y MB/s (0 o None = sin tope)."""
+
+    def __init__(self, files_per_sec: float = 0, mb_per_sec: float = 0):
+        self.files = TokenBucket(files_per_sec) if files_per_sec else None
+        self.bytes = TokenBucket(mb_per_sec * 2**20) if mb_per_sec else None
+
+    @property
+    def active(self) -> bool:
+        return bool(self.files or self.bytes)
+
+    def acquire(self, files: int = 1, nbytes: int = 0) -> float:
+        waited = 0.0
+        if self.files:
+            waited += self.files.acquire(files)
+        if self.bytes and nbytes:
+            waited += self.bytes.acquire(nbytes)
+        return waited
+
+    def describe(self) -> str:
+        parts = []
+        if self.files:
+            parts.append(f"{self.files.rate:,.0f} arch/s")
+        if self.bytes:
+            parts.append(f"{self.bytes.rate / 2**20:,.1f} MB/s")
+        return " y ".join(parts) or "sin tope"
+
+
+# ——— Prioridad baja del hilo (CPU + E/S) ———
+def _set_background(begin: bool) -> None:
+    if os.name == "nt":
+        k32 = ctypes.windll.kernel32
+        mode = _THREAD_MODE_BACKGROUND_BEGIN if begin else _THREAD_MODE_BACKGROUND_END
+        if not k32.SetThreadPriority(k32.GetCurrentThread(), mode):
+            logger.debug("SetThreadPriority(%#x) falló", mode)
+    elif hasattr(os, "setpriority"):
+        # En Linux la prioridad por hilo se fija con su TID
+        tid = threading.get_native_id()
+        try:
+            os.setpriority(os.PRIO_PROCESS, tid, 19 if begin else 0)
+        except OSError:
+            pass  # volver a subir la prioridad exige privilegios
+
+
+def enter_background() -> None:
+    """Baja la prioridad de CPU y E/S del hilo actual (initializer de pools)."""
+    try:
+        _set_background(True)
+    except Exception:
+        logger.debug("No se pudo bajar la prioridad del hilo", exc_info=True)
+
+
+@contextmanager
+def background_priority(enabled: bool = True) -> Iterator[None]:
+    """Ejecuta el bloque con el hilo actual en modo de baja prioridad."""
+    if not enabled:
+        yield
+        return
+    enter_background()
+    try:
+        yield
+    finally:
+        try:
+            _set_background(False)
+        except Exception:
+            logger.debug("No se pudo restaurar la prioridad del hilo", exc_info=True)
+
+
+# ——— Carga del equipo ———
+class _FILETIME(ctypes.Structure):
+    _fields_ = [("low", ctypes.c_uint32), ("high", ctypes.c_uint32)]
+
+    @property
+    def value(self) -> int:
+        return (self.high << 32) | self.low
+
+
+def _own_cpu() -> float:
+    """CPU (s) gastada por este proceso: usuario + núcleo, todos los hilos."""
+    t = os.times()
+    return t.user + t.system
+
+
+def _cpu_times() -> Optional[tuple]:
+    """
+    (ocioso, total, propio) acumulados, en las unidades del sistema, o
+    None si no se sabe. "propio" es la CPU de LabTool en esas unidades.
+    """
+    if os.name == "nt":
+        idle, kernel, user = _FILETIME(), _FILETIME(), _FILETIME()
+        if ctypes.windll.kernel32.GetSystemTimes(ctypes.byref(idle), ctypes.byref(kernel),
+                                                 ctypes.byref(user)):
+            # kernel incluye el tiempo ocioso; FILETIME va en unidades de 100 ns
+            return idle.value, kernel.value + user.value, _own_cpu() * 1e7
+        return None
+    try:
+        with open("/proc/stat") as fh:
+            fields = [int(x) for x in fh.readline().split()[1:]]
+        return fields[3] + fields[4], sum(fields), _own_cpu() * os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class LoadMonitor:
+    """
+    Mide el uso de CPU del equipo sin contar el de LabTool (muestreo como
+    mucho cada `interval` s) y dice si hay que pausar: se pausa por encima
+    de `threshold` % y se reanuda por debajo de threshold - `hysteresis`.
+    Descontar lo propio evita que un borrado intenso se pause a sí mismo.
+    """
+
+    def __init__(self, threshold: float = 60.0, interval: float = 1.0, hysteresis: float = 15.0):
+        self.threshold = threshold
+        self.interval = interval
+        self.hysteresis = hysteresis
+        self._lock = threading.Lock()
+        self._prev = _cpu_times()
+        self._last = time.monotonic()
+        self._usage = 0.0
+        self._busy = False
+        self._busy_since = 0.0
+        self._paused_total = 0.0
+
+    def usage(self) -> float:
+        """Uso de CPU (%) del último intervalo por lo que no es LabTool."""
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last >= self.interval:
+                cur = _cpu_times()
+                if cur and self._prev and cur[1] > self._prev[1]:
+                    idle = cur[0] - self._prev[0]
+                    total = cur[1] - self._prev[1]
+                    own = cur[2] - self._prev[2]
+                    others = total - idle - own
+                    self._usage = max(0.0, min(100.0, 100.0 * others / total))
+                self._prev, self._last = cur, now
+                limit = self.threshold - self.hysteresis if self._busy else self.threshold
+                busy = self._usage > limit
+                if busy != self._busy:
+                    logger.info("Equipo %s (CPU al %.0f %%)",
+                                "ocupado: borrado en pausa" if busy else "libre: se reanuda",
+                                self._usage)
+                    if busy:
+                        self._busy_since = now
+                    else:
+                        self._paused_total += now - self._busy_since
+                self._busy = busy
+            return self._usage
+
+    def paused_seconds(self) -> float:
+        """Tiempo total (reloj de pared) que el equipo ha estado ocupado."""
+        with self._lock:
+            extra = time.monotonic() - self._busy_since if self._busy else 0.0
+            return self._paused_total + extra
+
+    def busy(self) -> bool:
+        self.usage()
+        return self._busy
+
+    def wait_while_busy(self, cancel: threading.Event,
+                        on_pause: Optional[Callable[[bool], None]] = None) -> float:
+        """Bloquea mientras el equipo esté ocupado; devuelve los segundos de espera."""
+        if not self.busy():
+            return 0.0
+        start = time.monotonic()
+        if on_pause:
+            on_pause(True)
+        while self.busy() and not cancel.is_set():
+            cancel.wait(self.interval)
+        if on_pause:
+            on_pause(False)
+        return time.monotonic() - start
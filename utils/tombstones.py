@@ -0,0 +1,168 @@
+# utils/tombstones.py
+
+from __future__ import annotations
+import os
+import time
+import ctypes
+import logging
+import threading
+from typing import Optional, Tuple
+
+from utils.fast_delete import TreeDeleter
+from utils.throttling import LoadMonitor
+
+logger = logging.getLogger(__name__)
+
+# Carpeta oculta en el mismo volumen que los perfiles: mover ahí es un
+# rename atómico e instantáneo; el borrado real lo hace el recolector.
+TOMBSTONE_DIR = os.path.join(
+    os.environ.get("SystemDrive", "C:") + os.sep, "Users", ".labtool-tombstones"
+)
+_FILE_ATTRIBUTE_HIDDEN = 0x2
+# Sufijo de lo apartado que el recolector no debe borrar nunca (p. ej. un
+# perfil que no se pudo archivar)
+KEEP_SUFFIX = ".conservar"
+
+_lock = threading.Lock()
+_wake = threading.Event()
+_thread: Optional[threading.Thread] = None
+_reclaimed_bytes = 0
+_reclaimed_dirs = 0
+_monitor = LoadMonitor()
+_held: set[str] = set()     # nombres cuyo apartado aún no se puede borrar
+
+
+def _hide(path: str) -> None:
+    if os.name != "nt":
+        return
+    try:
+        attrs = ctypes.windll.kernel32.GetFileAttributesW(path)
+        if attrs != -1 and attrs != 0xFFFFFFFF:
+            ctypes.windll.kernel32.SetFileAttributesW(path, attrs | _FILE_ATTRIBUTE_HIDDEN)
+    except Exception:
+        logger.debug("No se pudo ocultar %s", path, exc_info=True)
+
+
+def tombstone(path: str, tomb_dir: str = TOMBSTONE_DIR) -> str:
+    """
+    Aparta una carpeta para borrarla después (rename dentro del volumen).
+    Devuelve la ruta nueva; lanza OSError si no se pudo mover.
+    """
+    if not os.path.isdir(tomb_dir):
+        os.makedirs(tomb_dir, exist_ok=True)
+        _hide(tomb_dir)
+    name = os.path.basename(os.path.normpath(path))
+    dest = os.path.join(tomb_dir, f"{name}.{time.strftime('%Y%m%d-%H%M%S')}")
+    n = 1
+    while os.path.exists(dest):
+        n += 1
+        dest = os.path.join(tomb_dir, f"{name}.{time.strftime('%Y%m%d-%H%M%S')}.{n}")
+    os.rename(path, dest)
+    logger.info("Carpeta apartada para borrado diferido: %s → %s", path, dest)
+    wake()
+    return dest
+
+
+def hold(name: str) -> None:
+    """
+    Impide que el recolector borre lo que se aparte como "<name>.*" hasta
+    release(name). Se llama antes de apartar, así no hay carrera.
+    """
+    with _lock:
+        _held.add(name.lower())
+
+
+def release(name: str) -> None:
+    with _lock:
+        _held.discard(name.lower())
+    wake()
+
+
+def keep(path: str) -> str:
+    """Marca una carpeta apartada para que no se borre; devuelve la ruta nueva."""
+    dest = path + KEEP_SUFFIX
+    os.rename(path, dest)
+    logger.warning("Carpeta apartada conservada sin borrar: %s", dest)
+    return dest
+
+
+def _is_held(name: str) -> bool:
+    name = name.lower()
+    if name.endswith(KEEP_SUFFIX):
+        return True
+    with _lock:
+        return any(name.startswith(h + ".") for h in _held)
+
+
+def pending(tomb_dir: str = TOMBSTONE_DIR) -> list[str]:
+    """Carpetas apartadas que aún no se han borrado (sin las retenidas)."""
+    try:
+        return sorted(e.path for e in os.scandir(tomb_dir)
+                      if e.is_dir(follow_symlinks=False) and not _is_held(e.name))
+    except OSError:
+        return []
+
+
+def _reclaim_one(path: str) -> Tuple[int, int]:
+    """
+    Borra una carpeta apartada; devuelve (bytes liberados, errores).
+    Nadie espera este borrado: va con baja prioridad, pocos hilos y se
+    pausa mientras el equipo esté ocupado.
+    """
+    stats = TreeDeleter(workers=2, low_priority=True, load_monitor=_monitor).delete(path)
+    return stats.bytes, stats.error_count
+
+
+def reclaim_now(tomb_dir: str = TOMBSTONE_DIR) -> int:
+    """Borra todo lo apartado (bloqueante). Devuelve los bytes liberados."""
+    global _reclaimed_bytes, _reclaimed_dirs
+    total = 0
+    for path in pending(tomb_dir):
+        start = time.perf_counter()
+        freed, errors = _reclaim_one(path)
+        total += freed
+        with _lock:
+            _reclaimed_bytes += freed
+            _reclaimed_dirs += 0 if errors else 1
+        if errors:
+            logger.warning("Borrado diferido de %s incompleto (%s errores); se reintentará.",
+                           path, errors)
+        logger.info("Recuperados %.1f MiB de %s en %.1fs",
+                    freed / 2**20, os.path.basename(path), time.perf_counter() - start)
+    return total
+
+
+def _loop(tomb_dir: str, interval: float) -> None:
+    while True:
+        try:
+            reclaim_now(tomb_dir)
+        except Exception:
+            logger.exception("Error en el recolector de carpetas apartadas")
+        _wake.wait(interval)
+        _wake.clear()
+
+
+def start_reclaimer(tomb_dir: str = TOMBSTONE_DIR, interval: float = 600.0) -> threading.Thread:
+    """
+    Arranca (una sola vez) el hilo que borra las carpetas apartadas.
+    Al arrancar recoge lo que quedó de sesiones anteriores; luego despierta
+    con wake() o cada `interval` segundos.
+    """
+    global _thread
+    with _lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_loop, args=(tomb_dir, interval),
+                                       name="tombstone-reclaimer", daemon=True)
+            _thread.start()
+        return _thread
+
+
+def wake() -> None:
+    """Pide al recolector que revise ya la carpeta de apartados."""
+    _wake.set()
+
+
+def reclaimed() -> Tuple[int, int]:
+    """(bytes, carpetas) liberados por el recolector en esta sesión."""
+    with _lock:
+        return _reclaimed_bytes, _reclaimed_dirs
@@ -0,0 +1,258 @@
+# utils/user_deletion.py
+
+from __future__ import annotations
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+
+from utils import archiver, journal, metrics, tombstones
+from utils.ps_pool import PowerShellPool
+from utils.run_powershell import host_pool, stream_powershell_script
+
+logger = logging.getLogger(__name__)
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+DELETE_SCRIPT = os.path.abspath(
+    os.path.join(BASE_DIR, os.pardir, "powershell", "borrar_usuario_completo.ps1")
+)
+
+# Estados por usuario y su texto para la interfaz
+STATE_LABELS = {
+    "queued":  "En cola",
+    "logoff":  "Cerrando sesión",
+    "account": "Eliminando cuenta",
+    "hives":   "Descargando hives",
+    "profile": "Borrando perfil",
+    "archive": "Archivando perfil",
+    "done":    "Hecho",
+    "failed":  "Error",
+}
+# Paso "##PROGRESS n/4" de borrar_usuario_completo.ps1 → estado
+_STEP_STATES = {1: "logoff", 2: "account", 3: "hives", 4: "profile"}
+FINAL_STATES = ("done", "failed")
+
+
+class UserStatus:
+    """Estado de borrado de una cuenta."""
+
+    __slots__ = ("user", "state", "detail", "started", "finished")
+
+    def __init__(self, user: str):
+        self.user = user
+        self.state = "queued"
+        self.detail = ""
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def label(self) -> str:
+        return STATE_LABELS.get(self.state, self.state)
+
+
+class UserDeletionEngine:
+    """
+    Borra varias cuentas en paralelo (borrar_usuario_completo.ps1 por
+    cuenta) con un número fijo de trabajadores. Los scripts corren en
+    hosts PowerShell reutilizados (uno por trabajador, ver host_pool), no
+    en un proceso por cuenta. Cada cambio de estado se notifica con
+    on_update(UserStatus) desde el hilo trabajador.
+
+    Con archive_dir, cada perfil se aparta (tombstone), se archiva en
+    archive_dir y solo cuando el archivo está verificado se suelta para
+    que lo borre el recolector; si falla, el perfil se conserva.
+
+    Con run (lote del diario de operaciones) cada cuenta se anota al
+    empezar y al terminar, y el lote se cierra al acabar todas.
+    """
+
+    def __init__(
+        self,
+        users: Sequence[str],
+        workers: int = 4,
+        on_update: Optional[Callable[[UserStatus], None]] = None,
+        extra_args: Sequence[str] = ("-Force",),
+        timeout: int = 1800,
+        archive_dir: Optional[str] = None,
+        archive_format: str = "zip",
+        run: Optional[journal.Run] = None,
+    ):
+        self.statuses: Dict[str, UserStatus] = {u: UserStatus(u) for u in users}
+        self.workers = max(1, workers)
+        self.on_update = on_update
+        self.extra_args = list(extra_args)
+        self.timeout = timeout
+        self.archive_dir = archive_dir
+        self.archive_format = archive_format
+        self.journal_run = run
+        self._hosts: Optional[PowerShellPool] = None
+        if archive_dir:
+            self.extra_args += ["-TombstoneDir", tombstones.TOMBSTONE_DIR, "-RequireTombstone"]
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.started = 0.0
+        self.finished: Optional[float] = None
+
+    # ——— Ejecución ———
+    def start(self) -> None:
+        """Lanza el borrado en segundo plano y vuelve enseguida."""
+        self.started = time.monotonic()
+        self._thread = threading.Thread(target=metrics.carry(self._run), name="user-deletion", daemon=True)
+        self._thread.start()
+
+    def run(self) -> List[UserStatus]:
+        """Borrado bloqueante; devuelve los estados finales."""
+        self.started = time.monotonic()
+        self._run()
+        return list(self.statuses.values())
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.done
+
+    @property
+    def done(self) -> bool:
+        return self.finished is not None
+
+    def _run(self) -> None:
+        with host_pool(min(self.workers, len(self.statuses)) or 1) as hosts, \
+                ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="del-user") as pool:
+            self._hosts = hosts
+            list(pool.map(metrics.carry(self._delete_one), list(self.statuses)))
+        self._hosts = None
+        if self.journal_run is not None:
+            self.journal_run.close()
+        self.finished = time.monotonic()
+        ok = sum(1 for st in self.statuses.values() if st.state == "done")
+        logger.info("Borrado paralelo: %s/%s cuentas en %.1fs",
+                    ok, len(self.statuses), self.finished - self.started)
+
+    def _set(self, st: UserStatus, state: str, detail: str = "") -> None:
+        with self._lock:
+            st.state = state
+            if detail:
+                st.detail = detail
+            if state in FINAL_STATES:
+                st.finished = time.monotonic()
+        if self.journal_run is not None:
+            if state == "done":
+                self.journal_run.done(st.user)
+            elif state == "failed":
+                self.journal_run.failed(st.user, st.detail.splitlines()[0] if st.detail else "")
+        if self.on_update:
+            try:
+                self.on_update(st)
+            except Exception:
+                logger.exception("on_update falló")
+
+    def _delete_one(self, user: str) -> None:
+        st = self.statuses[user]
+        st.started = time.monotonic()
+        if self.journal_run is not None:
+            self.journal_run.started(user)
+        self._set(st, "logoff")
+        out: List[str] = []
+        err: List[str] = []
+        code = 1
+        tomb: Optional[str] = None
+        profile: Optional[dict] = None     # registro "profile" del script
+        if self.archive_dir:
+            tombstones.hold(user)
+        try:
+            for ev in stream_powershell_script(
+                DELETE_SCRIPT, "-Username", user, *self.extra_args, timeout=self.timeout,
+                pool=self._hosts,
+            ):
+                if ev.stream == "progress":
+                    state = _STEP_STATES.get(ev.current)
+                    if state and state != st.state:
+                        self._set(st, state, ev.text)
+                elif ev.stream == "stdout":
+                    out.append(ev.text)
+                elif ev.stream == "stderr":
+                    err.append(ev.text)
+                elif ev.stream == "record" and isinstance(ev.data, dict) \
+                        and ev.data.get("type") == "profile":
+                    profile = ev.data
+                    tomb = ev.data.get("tombstone") or tomb
+                elif ev.stream == "exit":
+                    code = ev.code if ev.code is not None else 1
+        except Exception as e:
+            logger.exception("Error borrando %s", user)
+            err.append(str(e))
+
+        if code == 0 and self.archive_dir and not tomb and self._profile_left(user, profile):
+            # -RequireTombstone: sin apartar no se borró el perfil, pero la cuenta sí
+            tombstones.release(user)
+            reason = (profile or {}).get("error") or "no se pudo apartar"
+            msg = (f"Cuenta eliminada, pero el perfil no se archivó ni se borró "
+                   f"({reason}); sigue en su sitio")
+            logger.error("Error borrando %s → %s", user, msg)
+            self._set(st, "failed", msg)
+            return
+        if code == 0 and tomb and not self._archive(st, tomb):
+            # Si no se pudo marcar para conservar, sigue retenido en esta sesión
+            if not os.path.isdir(tomb):
+                tombstones.release(user)
+            return
+        if self.archive_dir:
+            tombstones.release(user)
+
+        if code == 0:
+            logger.info("Usuario %s eliminado (%.1fs).", user, st.elapsed)
+            self._set(st, "done", "")
+        else:
+            msg = "\n".join(err).strip() or "\n".join(out).strip() or f"Exit code {code}"
+            logger.error("Error borrando %s → %s", user, msg)
+            self._set(st, "failed", msg)
+
+    @staticmethod
+    def _profile_left(user: str, profile: Optional[dict]) -> bool:
+        """¿Quedó un perfil sin apartar? (sin registro: si la carpeta sigue)."""
+        if profile is not None:
+            return not profile.get("tombstone")
+        return os.path.isdir(os.path.join(os.environ.get("SystemDrive", "C:") + os.sep,
+                                          "Users", user))
+
+    def _archive(self, st: UserStatus, tomb: str) -> bool:
+        """Archiva el perfil apartado; si no queda verificado lo conserva."""
+        self._set(st, "archive")
+        try:
+            res = archiver.archive_folder(tomb, self.archive_dir, fmt=self.archive_format,
+                                          name=st.user)
+            if res.verified:
+                return True
+            first = res.errors[0] if res.errors else ("", "verificación fallida")
+            reason = f"{first[0]} {first[1]}".strip()
+        except Exception as e:
+            logger.exception("Error archivando el perfil de %s", st.user)
+            reason = str(e)
+        try:
+            kept = tombstones.keep(tomb)
+        except OSError:
+            kept = tomb
+        self._set(st, "failed", f"Cuenta eliminada, pero el perfil no se pudo archivar "
+                                f"({reason}); se conserva en {kept}")
+        return False
+
+    # ——— Resumen ———
+    def summary(self) -> str:
+        """Texto con el resultado y el tiempo de cada cuenta."""
+        lines = []
+        for st in self.statuses.values():
+            line = f"{st.user}: {st.label} ({st.elapsed:.1f}s)"
+            if st.state == "failed" and st.detail:
+                line += f" – {st.detail.splitlines()[0]}"
+            lines.append(line)
+        total = (self.finished or time.monotonic()) - self.started
+        lines.append(f"\nTiempo total: {total:.1f}s con {self.workers} trabajo(s) en paralelo")
+        return "\n".join(lines)
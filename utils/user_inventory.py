@@ -0,0 +1,110 @@
+# utils/user_inventory.py
+
+from __future__ import annotations
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.account_providers import (
+    AccountProvider, ProfileRecord, UserRecord, default_provider, timed,
+)
+
+logger = logging.getLogger(__name__)
+
+# Cuentas integradas que nunca se ofrecen para borrar/reemplazar
+SYSTEM_ACCOUNTS = {"Administrator", "DefaultAccount", "Guest", "WDAGUtilityAccount"}
+DEFAULT_TTL = 120  # segundos que se considera fresco el inventario
+
+_lock = threading.Lock()
+_provider: Optional[AccountProvider] = None
+_cache: Dict[str, Tuple[float, List[Any]]] = {}   # método → (marca, datos)
+_generation = 0
+
+
+def get_provider() -> AccountProvider:
+    """Proveedor de enumeración en uso (se elige la primera vez)."""
+    global _provider
+    with _lock:
+        if _provider is None:
+            _provider = default_provider()
+            logger.debug("Proveedor de cuentas: %s", _provider.name)
+        return _provider
+
+
+def set_provider(provider: AccountProvider) -> None:
+    """Sustituye el proveedor (p. ej. FakeAccountProvider en pruebas)."""
+    global _provider
+    with _lock:
+        _provider = provider
+    invalidate()
+
+
+def _cached(method: str, max_age: float) -> List[Any]:
+    """Resultado de provider.<method>() con caché TTL; [] si falla."""
+    with _lock:
+        hit = _cache.get(method)
+        if hit is not None and time.monotonic() - hit[0] < max_age:
+            return list(hit[1])
+        generation = _generation
+
+    try:
+        data = timed(get_provider(), method)
+    except Exception as e:
+        logger.error("Error en inventario (%s): %s", method, e)
+        return []
+
+    with _lock:
+        # Si alguien invalidó mientras consultábamos, no guardar datos viejos
+        if generation == _generation:
+            _cache[method] = (time.monotonic(), data)
+    return list(data)
+
+
+def get_users(max_age: float = DEFAULT_TTL) -> List[UserRecord]:
+    """
+    Devuelve todas las cuentas locales (incluidas las deshabilitadas).
+    Usa la caché si tiene menos de max_age segundos; si la consulta falla
+    devuelve [] y no cachea nada.
+    """
+    return _cached("list_users", max_age)
+
+
+def get_profiles(max_age: float = DEFAULT_TTL) -> List[ProfileRecord]:
+    """Perfiles registrados (con o sin cuenta), con la misma caché."""
+    return _cached("list_profiles", max_age)
+
+
+def managed_users(max_age: float = DEFAULT_TTL) -> List[UserRecord]:
+    """Cuentas habilitadas que no son de sistema, ordenadas por nombre."""
+    return sorted(
+        (u for u in get_users(max_age) if u.enabled and u.name not in SYSTEM_ACCOUNTS),
+        key=lambda u: u.name.lower(),
+    )
+
+
+def enabled_user_names(max_age: float = DEFAULT_TTL) -> List[str]:
+    """Nombres de managed_users()."""
+    return [u.name for u in managed_users(max_age)]
+
+
+def invalidate() -> None:
+    """Descarta la caché (llamar tras crear, borrar o reemplazar cuentas)."""
+    global _generation
+    with _lock:
+        _cache.clear()
+        _generation += 1
+    logger.debug("Inventario de usuarios invalidado")
+
+
+def generation() -> int:
+    """Contador que sube con cada invalidate() (para cachés derivadas)."""
+    with _lock:
+        return _generation
+
+
+def prefetch() -> threading.Thread:
+    """Llena la caché en segundo plano para que los diálogos abran al instante."""
+    th = threading.Thread(target=get_users, name="user-inventory", daemon=True)
+    th.start()
+    return th
@@ -0,0 +1,172 @@
+# utils/user_provisioning.py
+
+from __future__ import annotations
+import os
+import re
+import csv
+import math
+import logging
+import tempfile
+import itertools
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from utils.run_powershell import stream_powershell_script
+
+logger = logging.getLogger(__name__)
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+
+BULK_SCRIPT = os.path.abspath(
+    os.path.join(BASE_DIR, os.pardir, "powershell", "crear_usuarios_lote.ps1")
+)
+
+MAX_NAME_LEN = 20          # límite de SAM para cuentas locales
+MAX_BATCH = 1000           # protección contra patrones desbocados
+_INVALID_CHARS = set('"/\\[]:;|=,+*?<>@')
+_BRACE = re.compile(r"\{([^{}]*)\}")
+_RANGE = re.compile(r"^\s*(-?\d+)\s*\.\.\s*(-?\d+)\s*$")
+_CSV_COLUMNS = ("usuario", "username", "user", "nombre", "name")
+
+
+def expand_pattern(pattern: str) -> List[str]:
+    """
+    Expande llaves al estilo bash:
+      alumno{01..40}   → alumno01 … alumno40 (respeta los ceros)
+      pc{1..3}-{a,b}   → pc1-a, pc1-b, pc2-a, …
+    Un texto sin llaves se devuelve tal cual.
+    """
+    parts: List[List[str]] = []
+    pos = 0
+    for m in _BRACE.finditer(pattern):
+        parts.append([pattern[pos:m.start()]])
+        body = m.group(1)
+        rng = _RANGE.match(body)
+        if rng:
+            a, b = rng.group(1), rng.group(2)
+            start, end = int(a), int(b)
+            width = max(len(a.lstrip("-")), len(b.lstrip("-"))) if (
+                a.lstrip("-").startswith("0") or b.lstrip("-").startswith("0")) else 0
+            step = 1 if end >= start else -1
+            if abs(end - start) + 1 > MAX_BATCH:
+                raise ValueError(f"Rango demasiado grande en '{pattern}' (máx. {MAX_BATCH}).")
+            parts.append([str(n).zfill(width) for n in range(start, end + step, step)])
+        elif "," in body:
+            parts.append([s.strip() for s in body.split(",")])
+        else:
+            parts.append([m.group(0)])   # llaves literales
+        pos = m.end()
+    parts.append([pattern[pos:]])
+
+    # El tamaño se conoce sin expandir: se rechaza antes de generar nada
+    total = math.prod(len(p) for p in parts)
+    if total > MAX_BATCH:
+        raise ValueError(f"El patrón '{pattern}' genera {total} nombres (máx. {MAX_BATCH}).")
+    return ["".join(combo) for combo in itertools.product(*parts)]
+
+
+def parse_names(text: str) -> List[str]:
+    """
+    Convierte el texto del diálogo en nombres: admite uno por línea,
+    separados por espacios o ';', y patrones con llaves en cada elemento.
+    """
+    names: List[str] = []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0]          # comentarios
+        for token in re.split(r"[\s;]+", line):
+            if token:
+                names.extend(expand_pattern(token))
+    return names
+
+
+def read_csv_names(path: str) -> List[str]:
+    """
+    Lee nombres de un CSV: usa la columna usuario/username/nombre/name si
+    hay cabecera y, si no, la primera columna.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        sample = fh.read(4096)
+        fh.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        rows = [r for r in csv.reader(fh, dialect) if r and any(c.strip() for c in r)]
+    if not rows:
+        return []
+    header = [c.strip().lower() for c in rows[0]]
+    col = next((header.index(c) for c in _CSV_COLUMNS if c in header), None)
+    if col is not None:
+        rows = rows[1:]
+    else:
+        col = 0
+    return [r[col].strip() for r in rows if len(r) > col and r[col].strip()]
+
+
+def validate_names(names: Sequence[str], existing: Iterable[str] = ()) -> Dict[int, str]:
+    """
+    Comprueba todos los nombres antes de crear nada.
+    Devuelve {posición: motivo} solo con los inválidos; de un nombre
+    repetido solo se marcan las copias posteriores a la primera.
+    """
+    taken = {n.lower() for n in existing}
+    seen: set[str] = set()
+    errors: Dict[int, str] = {}
+    for idx, name in enumerate(names):
+        low = name.lower()
+        if len(name) > MAX_NAME_LEN:
+            errors[idx] = f"más de {MAX_NAME_LEN} caracteres"
+        elif any(c in _INVALID_CHARS or ord(c) < 32 for c in name):
+            errors[idx] = "contiene caracteres no permitidos"
+        elif name.endswith(".") or not name.strip(". "):
+            errors[idx] = "no puede terminar en punto ni ser solo puntos/espacios"
+        elif low in seen:
+            errors[idx] = "repetido en la lista"
+        elif low in taken:
+            errors[idx] = "la cuenta ya existe"
+        seen.add(low)
+    return errors
+
+
+def provision_users(
+    names: Sequence[str],
+    never_expire: bool = False,
+    on_result: Optional[Callable[[str, bool, str], None]] = None,
+    timeout: int = 1800,
+) -> List[Tuple[str, bool, str]]:
+    """
+    Crea todas las cuentas sin contraseña con una sola ejecución de
+    crear_usuarios_lote.ps1. Llama on_result(nombre, ok, error) según
+    llega cada resultado y devuelve la lista completa.
+    """
+    fd, names_file = tempfile.mkstemp(prefix="labtool-users-", suffix=".txt")
+    with os.fdopen(fd, "w", encoding="utf-8-sig") as fh:
+        fh.write("\n".join(names))
+
+    args = ["-NamesFile", names_file, "-NoPassword"]
+    if never_expire:
+        args.append("-NeverExpire")
+
+    results: List[Tuple[str, bool, str]] = []
+    err: List[str] = []
+    code = 1
+    try:
+        for ev in stream_powershell_script(BULK_SCRIPT, *args, timeout=timeout):
+            if ev.stream == "record" and isinstance(ev.data, dict):
+                res = (ev.data.get("name") or "", bool(ev.data.get("ok")), ev.data.get("error") or "")
+                results.append(res)
+                if on_result:
+                    on_result(*res)
+            elif ev.stream == "stderr":
+                err.append(ev.text)
+            elif ev.stream == "exit":
+                code = ev.code if ev.code is not None else 1
+    finally:
+        try:
+            os.remove(names_file)
+        except OSError:
+            pass
+
+    ok = sum(1 for _, good, _ in results if good)
+    logger.info("Alta en lote: %s/%s cuentas creadas.", ok, len(names))
+    if code != 0 and not results:
+        raise RuntimeError("\n".join(err).strip() or f"Exit code {code}")
+    return results